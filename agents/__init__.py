@@ -1,11 +1,6 @@
 """Agents package for Second Brain."""
 
-from .agents import (
-    calendar_agent,
-    notes_agent,
-    general_agent,
-    coordinator,
-)
+import importlib
 
 __all__ = [
     "calendar_agent",
@@ -13,3 +8,10 @@ __all__ = [
     "general_agent",
     "coordinator",
 ]
+
+
+def __getattr__(name):
+    # Imported on first use, so agents.router loads without google-adk
+    if name in __all__:
+        return getattr(importlib.import_module(".agents", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,11 @@
 """Agent definitions for Second Brain."""
 
+import time
+from typing import Dict, Tuple
+
 from google.adk.agents import LlmAgent
 
+from rate_limiter import estimate_tokens, get_rate_limiter
 from tools import (
     calendar_add_tool,
     calendar_list_tool,
@@ -11,6 +15,67 @@ from tools import (
 )
 
 
+# (invocation, agent) -> (model, estimated tokens, start time) of the model call in flight
+_pending_estimates: Dict[Tuple[str, str], Tuple[str, int, float]] = {}
+
+# Seconds after which an estimate whose call never reported back (cancelled,
+# or failed without the error callback) is dropped and its tokens returned
+PENDING_ESTIMATE_TTL = 300.0
+
+
+def _expire_pending_estimates(now: float):
+    """Return the tokens of calls that never completed."""
+    for key, (model, estimate, started) in list(_pending_estimates.items()):
+        if now - started > PENDING_ESTIMATE_TTL:
+            del _pending_estimates[key]
+            get_rate_limiter(model).refund(estimate)
+
+
+async def acquire_model_quota(callback_context, llm_request):
+    """Wait for the shared per-model rate limiter before every model call."""
+    model = llm_request.model or "gemini-2.0-flash"
+    prompt = "".join(
+        part.text or ""
+        for content in (llm_request.contents or [])
+        for part in (content.parts or [])
+    )
+    max_output = getattr(llm_request.config, "max_output_tokens", None) or 512
+    estimate = estimate_tokens(prompt, max_output)
+
+    await get_rate_limiter(model).acquire(estimate)
+    now = time.monotonic()
+    _expire_pending_estimates(now)
+    _pending_estimates[(callback_context.invocation_id, callback_context.agent_name)] = (model, estimate, now)
+    return None
+
+
+def record_model_usage(callback_context, llm_response):
+    """Correct the token estimate with the usage the model reported."""
+    pending = _pending_estimates.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    usage = getattr(llm_response, "usage_metadata", None)
+    if pending is not None and usage is not None:
+        model, estimate, _ = pending
+        get_rate_limiter(model).record_usage(estimate, usage.total_token_count or 0)
+    return None
+
+
+def refund_model_quota(callback_context, llm_request, error):
+    """Give a failed call's estimated tokens back (a 429 used none); the error still propagates."""
+    pending = _pending_estimates.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if pending is not None:
+        model, estimate, _ = pending
+        get_rate_limiter(model).refund(estimate)
+    return None
+
+
+# Every agent's model calls go through the process-wide rate limiter
+_rate_limited = dict(
+    before_model_callback=acquire_model_quota,
+    after_model_callback=record_model_usage,
+    on_model_error_callback=refund_model_quota,
+)
+
+
 # Define specialized subagents
 calendar_agent = LlmAgent(
     name="calendar_agent",
@@ -36,6 +101,7 @@ calendar_agent = LlmAgent(
     
     After executing, briefly confirm what you did (e.g., "Added meeting with John tomorrow at 2pm").""",
     tools=[calendar_add_tool, calendar_list_tool, calendar_delete_tool],
+    **_rate_limited,
 )
 
 notes_agent = LlmAgent(
@@ -57,6 +123,7 @@ notes_agent = LlmAgent(
     
     After saving, briefly confirm (e.g., "Noted: idea about project restructuring").""",
     tools=[notes_save_tool, notes_search_tool],
+    **_rate_limited,
 )
 
 general_agent = LlmAgent(
@@ -66,6 +133,7 @@ general_agent = LlmAgent(
     instruction="""You are GeneralAgent. Handle general conversation and answer questions.
     - Be concise and helpful.
     - If the user mentions something that should be a note or a calendar event, you can just acknowledge it, but usually the Coordinator handles the routing.""",
+    **_rate_limited,
 )
 
 
@@ -97,4 +165,5 @@ coordinator = LlmAgent(
 
     Execute tasks immediately. Be brief.""",
     sub_agents=[calendar_agent, notes_agent, general_agent],
+    **_rate_limited,
 )
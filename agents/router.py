@@ -0,0 +1,520 @@
+"""
+Local intent pre-router for Second Brain.
+
+Picks calendar_agent, notes_agent or general_agent on-box so confident
+utterances skip the coordinator's Gemini round trip. Two signals are
+combined: keyword/date heuristics that mirror the coordinator's delegation
+rules, and nearest-centroid similarity over the sentence-transformers
+embeddings already computed for memory retrieval. When the signals are
+missing, weak or disagree, the utterance falls back to the coordinator.
+
+Run `python -m agents.router` to measure accuracy and routing latency on a
+labeled set.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from loop_lag import LatencyHistogram
+
+
+AGENTS = ("calendar_agent", "notes_agent", "general_agent")
+
+# Example utterances per sub-agent; their mean embedding is the agent's centroid
+EXAMPLES: Dict[str, List[str]] = {
+    "calendar_agent": [
+        "I have a dentist appointment tomorrow at 3pm",
+        "Schedule a meeting with Sarah next Tuesday morning",
+        "Put lunch with Mike on Friday at noon on my calendar",
+        "I need to pick up the kids at 4 today",
+        "Book a call with the client on January 5th at 10",
+        "Add my flight to Denver on the 14th",
+        "What's on my calendar this week?",
+        "Cancel my haircut on Saturday",
+        "Move the team standup to 9:30 tomorrow",
+        "Remind me to call mom on Sunday evening",
+        "Dinner reservation at Luigi's Thursday at 7",
+        "Do I have anything scheduled for Monday afternoon?",
+    ],
+    "notes_agent": [
+        "I just realized we could cache the search results",
+        "Note that the wifi password is on the fridge",
+        "Idea for the blog: write about voice interfaces",
+        "I learned that octopuses have three hearts",
+        "Remember that Jake prefers email over Slack",
+        "Save this: the best coffee shop downtown is Blue Bottle",
+        "Thought about restructuring the project into smaller services",
+        "My shopping list is eggs, milk, bread and coffee",
+        "Books to read: Dune, Project Hail Mary, The Martian",
+        "I should start going to the gym more regularly",
+        "Jot down that the car needs an oil change soon",
+        "Insight from today's retro: we ship faster with smaller PRs",
+        "What did I save about the kitchen renovation?",
+        "Show me my notes on the marketing plan",
+    ],
+    "general_agent": [
+        "What's the capital of Australia?",
+        "How are you doing today?",
+        "Tell me a joke",
+        "Explain how photosynthesis works",
+        "What's a good name for a golden retriever?",
+        "Can you help me understand recursion?",
+        "Hello there",
+        "Why is the sky blue?",
+        "Thanks, that's all for now",
+        "How many ounces are in a cup?",
+        "What do you think about remote work?",
+        "Translate good morning into Spanish",
+    ],
+}
+
+# Held-out utterances for `python -m agents.router` (not used for centroids)
+EVAL_SET: List[Tuple[str, str]] = [
+    ("Meeting with the design team on Wednesday at 2", "calendar_agent"),
+    ("I've got a doctor's appointment next Monday", "calendar_agent"),
+    ("Schedule gym session tomorrow morning", "calendar_agent"),
+    ("Parent teacher conference on March 3rd at 6pm", "calendar_agent"),
+    ("Am I free on Friday afternoon?", "calendar_agent"),
+    ("Delete the dentist event next week", "calendar_agent"),
+    ("Soccer practice at 5 tonight", "calendar_agent"),
+    ("Call the plumber in two days", "calendar_agent"),
+    ("I realized the onboarding flow is too long", "notes_agent"),
+    ("Note: Anna's birthday gift idea is a pottery class", "notes_agent"),
+    ("Remember that the spare key is under the blue pot", "notes_agent"),
+    ("Idea: a podcast about local history", "notes_agent"),
+    ("I learned that honey never spoils", "notes_agent"),
+    ("Things to pack for camping: tent, stove, headlamp", "notes_agent"),
+    ("I think we should rewrite the billing module", "notes_agent"),
+    ("Write down that the router admin password changed", "notes_agent"),
+    ("What did I note about the garden?", "notes_agent"),
+    ("What were my ideas for the app?", "notes_agent"),
+    ("Did I write anything down about the meeting with Sam?", "notes_agent"),
+    ("Do you remember what I said about the new laptop?", "notes_agent"),
+    ("What are my thoughts on hiring so far?", "notes_agent"),
+    ("What's the tallest mountain in Europe?", "general_agent"),
+    ("Good morning!", "general_agent"),
+    ("How do vaccines work?", "general_agent"),
+    ("Give me a synonym for happy", "general_agent"),
+    ("Who wrote Pride and Prejudice?", "general_agent"),
+    ("Can you recommend a sci-fi movie?", "general_agent"),
+    ("What is 15 percent of 80?", "general_agent"),
+    ("Tell me something interesting", "general_agent"),
+]
+
+_WEEKDAYS = r"monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+    r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+
+# A date or time of day
+_TIME_PATTERN = re.compile(
+    rf"\b(?:today|tonight|tomorrow|yesterday|weekend|noon|midnight|o'clock"
+    rf"|(?:this|next|on)\s+(?:{_WEEKDAYS}|week|month|morning|afternoon|evening)"
+    rf"|{_WEEKDAYS}"
+    rf"|(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)\b"
+    rf"|\d{{1,2}}(?::\d{{2}})?\s*(?:am|pm|a\.m\.|p\.m\.)"
+    rf"|(?:at|by)\s+\d{{1,2}}(?::\d{{2}})?"
+    rf"|in\s+(?:\d+|a|an|one|two|three|a\s+few)\s+(?:minutes?|hours?|days?|weeks?))\b",
+    re.IGNORECASE,
+)
+
+# Something that belongs on a calendar
+_EVENT_PATTERN = re.compile(
+    r"\b(?:meeting|appointment|schedule[ds]?|calendar|event|reservation|booking|book|"
+    r"reschedule|cancel|deadline|standup|interview|conference|flight|call with|"
+    r"dinner with|lunch with|remind me|free on|busy on|anything scheduled)\b",
+    re.IGNORECASE,
+)
+
+# Information worth capturing
+_NOTE_PATTERN = re.compile(
+    r"^(?:note|idea|thought|insight|reminder to self)\b|"
+    r"\b(?:note (?:that|this|down)|remember (?:that|this)|save (?:this|that)|"
+    r"(?:write|jot) (?:this |that |it )?down|i (?:just )?(?:realized|learned|noticed|figured out)|"
+    r"i think (?:we|i) should|idea for|to-?do list|shopping list|things to)\b",
+    re.IGNORECASE,
+)
+
+# Questions about what the user captured earlier, answered from their notes
+_RECALL_PATTERN = re.compile(
+    r"\b(?:(?:did|have) i (?:ever )?(?:note|save|write|jot|mention|say|tell you|add)|"
+    r"i(?:'ve)? (?:noted|saved|wrote|written|jotted|mentioned|told you)|"
+    r"(?:do|did) you remember|what (?:do|did) i (?:know|learn)|"
+    r"my (?:notes?|ideas?|thoughts?|insights?|lists?)|"
+    r"what i (?:said|wrote|saved|noted))\b",
+    re.IGNORECASE,
+)
+
+# Questions and small talk
+_QUESTION_PATTERN = re.compile(
+    r"^(?:what|who|whom|why|how|when|where|which|is|are|can|could|would|do|does|did|"
+    r"should|tell me|explain|give me|hi|hello|hey|good (?:morning|afternoon|evening)|thanks|thank you)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of routing one utterance."""
+    agent: Optional[str]  # Sub-agent to run directly, or None to use the coordinator
+    predicted: Optional[str]  # Best guess even when not confident (shadow accuracy)
+    method: str  # 'heuristic', 'centroid', 'combined' or 'fallback'
+    margin: float = 0.0  # Centroid similarity lead of the best agent over the runner-up
+    scores: Dict[str, float] = field(default_factory=dict)
+    route_ms: float = 0.0
+
+
+class IntentRouter:
+    """Classifies utterances into sub-agents, deferring to the coordinator when unsure."""
+
+    # Longer inputs are prompts with injected context (notes, calendar), not utterances
+    MAX_ROUTED_CHARS = 400
+
+    def __init__(self, mode: Optional[str] = None, min_margin: Optional[float] = None):
+        """
+        Initialize the router.
+
+        Args:
+            mode: 'on' (dispatch confident utterances), 'shadow' (always use the
+                coordinator but measure agreement) or 'off'. Defaults to INTENT_ROUTER.
+            min_margin: Centroid similarity lead required to route on embeddings
+                alone. Defaults to INTENT_ROUTER_MIN_MARGIN.
+        """
+        self.mode = (mode or os.getenv("INTENT_ROUTER", "on")).lower()
+        if self.mode not in ("on", "shadow", "off"):
+            print(f"Warning: Unknown INTENT_ROUTER '{self.mode}', using 'on'")
+            self.mode = "on"
+        self.min_margin = (
+            min_margin if min_margin is not None
+            else float(os.getenv("INTENT_ROUTER_MIN_MARGIN", "0.05"))
+        )
+
+        self._centroids: Optional[np.ndarray] = None
+        self._centroid_lock: Optional[asyncio.Lock] = None
+
+        # Reporting
+        self.route_latency = LatencyHistogram(max_samples=1000)
+        self.routed: Dict[str, int] = {agent: 0 for agent in AGENTS}
+        self.fallbacks = 0
+        self.compared = 0  # Coordinator runs with a router guess to compare against
+        self.agreed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # -------------------------------------------------------------------------
+    # Classification
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def heuristic_intent(text: str) -> Optional[str]:
+        """
+        Keyword/date rules following the coordinator's delegation priority.
+
+        Returns:
+            Agent name, or None if the rules don't apply or conflict
+        """
+        has_time = bool(_TIME_PATTERN.search(text))
+        has_event = bool(_EVENT_PATTERN.search(text))
+        is_note = bool(_NOTE_PATTERN.search(text))
+        is_question = bool(_QUESTION_PATTERN.search(text.strip())) or text.strip().endswith("?")
+
+        # Questions about saved notes need notes_search_tool, even when they mention an event
+        if is_question and _RECALL_PATTERN.search(text):
+            return "notes_agent"
+        # Calendar takes precedence for anything with an event or a timed activity
+        if has_event:
+            return "calendar_agent"
+        if has_time and not is_note:
+            return None if is_question else "calendar_agent"
+        if is_note:
+            return "notes_agent"
+        if is_question:
+            return "general_agent"
+        return None
+
+    def centroid_scores(self, embedding: np.ndarray) -> Dict[str, float]:
+        """Cosine similarity of an utterance embedding to each agent centroid."""
+        if self._centroids is None:
+            return {}
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return {}
+        similarities = self._centroids @ (np.asarray(embedding, dtype=np.float32) / norm)
+        return {agent: float(score) for agent, score in zip(AGENTS, similarities)}
+
+    def classify(self, text: str, embedding: Optional[np.ndarray] = None) -> RouteDecision:
+        """
+        Decide where an utterance goes.
+
+        Args:
+            text: User utterance
+            embedding: Utterance embedding (centroid signal is skipped if None)
+
+        Returns:
+            RouteDecision; agent is None when the coordinator should decide
+        """
+        start = time.perf_counter()
+        if len(text) > self.MAX_ROUTED_CHARS:
+            return RouteDecision(agent=None, predicted=None, method="fallback")
+
+        heuristic = self.heuristic_intent(text)
+        scores = self.centroid_scores(embedding) if embedding is not None else {}
+
+        centroid, margin = None, 0.0
+        if scores:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            centroid, margin = ranked[0][0], ranked[0][1] - ranked[1][1]
+
+        if heuristic and centroid == heuristic:
+            agent, method = heuristic, "combined"
+        elif heuristic and centroid is None:
+            agent, method = heuristic, "heuristic"
+        elif centroid and heuristic is None and margin >= self.min_margin:
+            agent, method = centroid, "centroid"
+        elif heuristic == "calendar_agent" and margin < self.min_margin:
+            # A date/time or event keyword outweighs an unsure embedding
+            agent, method = heuristic, "heuristic"
+        else:
+            agent, method = None, "fallback"
+
+        return RouteDecision(
+            agent=agent,
+            predicted=agent or heuristic or centroid,
+            method=method,
+            margin=round(margin, 4),
+            scores={name: round(score, 4) for name, score in scores.items()},
+            route_ms=(time.perf_counter() - start) * 1000,
+        )
+
+    # -------------------------------------------------------------------------
+    # Async entry point
+    # -------------------------------------------------------------------------
+
+    async def route(self, text: str, embedding: Optional[np.ndarray] = None) -> RouteDecision:
+        """
+        Route an utterance, embedding it through the shared EmbeddingWorker if needed.
+
+        In shadow mode the decision's agent is always None (coordinator), but
+        its prediction is still recorded for record_outcome().
+        """
+        start = time.perf_counter()
+        if embedding is None:
+            embedding = await self._embed(text)
+        elif self._centroids is None:
+            await self._ensure_centroids()
+
+        decision = self.classify(text, embedding)
+        if self.mode == "shadow":
+            decision.agent = None
+        decision.route_ms = (time.perf_counter() - start) * 1000
+        self.route_latency.record(decision.route_ms)
+
+        if decision.agent:
+            self.routed[decision.agent] += 1
+        else:
+            self.fallbacks += 1
+        return decision
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed the utterance (cached when memory retrieval already embedded it)."""
+        try:
+            from memory.embedding_worker import get_embedding_worker
+            await self._ensure_centroids()
+            if self._centroids is None:
+                return None
+            return await get_embedding_worker().embed(text)
+        except Exception:
+            # No embedding model: route on heuristics alone
+            return None
+
+    async def _ensure_centroids(self):
+        """Embed the example utterances once and average them per agent."""
+        if self._centroids is not None:
+            return
+        if self._centroid_lock is None:
+            self._centroid_lock = asyncio.Lock()
+        async with self._centroid_lock:
+            if self._centroids is not None:
+                return
+            try:
+                from memory.embedding_worker import get_embedding_worker
+                vectors = await get_embedding_worker().embed_many(
+                    [example for agent in AGENTS for example in EXAMPLES[agent]]
+                )
+            except Exception as e:
+                print(f"Warning: Intent router using heuristics only: {e}")
+                return
+            self.set_centroids(vectors)
+
+    def set_centroids(self, vectors: Sequence[np.ndarray]):
+        """Build centroids from embeddings of EXAMPLES, in AGENTS order."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        centroids = []
+        offset = 0
+        for agent in AGENTS:
+            count = len(EXAMPLES[agent])
+            centroid = matrix[offset:offset + count].mean(axis=0)
+            centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+            offset += count
+        self._centroids = np.vstack(centroids)
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def record_outcome(self, decision: RouteDecision, coordinator_agent: Optional[str]):
+        """Compare a fallback's prediction with the sub-agent the coordinator picked."""
+        if decision.agent is None and decision.predicted and coordinator_agent in AGENTS:
+            self.compared += 1
+            if decision.predicted == coordinator_agent:
+                self.agreed += 1
+
+    def stats(self, coordinator_ms: Optional[float] = None) -> Dict:
+        """
+        Routing counts, agreement with the coordinator and estimated latency saved.
+
+        Args:
+            coordinator_ms: Typical coordinator hop (e.g. p50 of the 'coordinator'
+                trace stage); every routed utterance saves about this much
+        """
+        routed = sum(self.routed.values())
+        total = routed + self.fallbacks
+        stats = {
+            'mode': self.mode,
+            'decisions': total,
+            'routed': dict(self.routed),
+            'fallbacks': self.fallbacks,
+            'routed_rate': round(routed / total, 4) if total else 0.0,
+            'coordinator_agreement': round(self.agreed / self.compared, 4) if self.compared else None,
+            'compared': self.compared,
+            'route_p50_ms': round(self.route_latency.percentile(50), 2),
+            'route_p95_ms': round(self.route_latency.percentile(95), 2),
+        }
+        if coordinator_ms is not None:
+            stats['saved_ms_per_routed'] = round(coordinator_ms - self.route_latency.percentile(50), 2)
+            stats['saved_ms_total'] = round(routed * stats['saved_ms_per_routed'], 2)
+        return stats
+
+
+# Singleton instance
+_intent_router: Optional[IntentRouter] = None
+
+
+def get_intent_router() -> IntentRouter:
+    """Get or create the shared intent router."""
+    global _intent_router
+    if _intent_router is None:
+        _intent_router = IntentRouter()
+    return _intent_router
+
+
+# =============================================================================
+# Offline evaluation
+# =============================================================================
+
+def evaluate(router: IntentRouter, labeled: List[Tuple[str, str]], use_embeddings: bool = True) -> Dict:
+    """
+    Measure routing quality on labeled utterances.
+
+    Args:
+        router: Router to evaluate (centroids built from EXAMPLES if embeddings are used)
+        labeled: (utterance, expected agent) pairs
+        use_embeddings: Include the centroid signal
+
+    Returns:
+        Dict with coverage (share routed locally), accuracy of routed
+        utterances, accuracy of the best guess over all utterances, and
+        per-utterance routing latency
+    """
+    embeddings: List[Optional[np.ndarray]] = [None] * len(labeled)
+    if use_embeddings:
+        from memory.embeddings import get_embedding_service
+        service = get_embedding_service()
+        router.set_centroids(service.embed_batch(
+            [example for agent in AGENTS for example in EXAMPLES[agent]]
+        ))
+        embeddings = service.embed_batch([text for text, _ in labeled])
+
+    routed = correct_routed = correct_predicted = 0
+    latencies = []
+    mistakes = []
+    for (text, expected), embedding in zip(labeled, embeddings):
+        decision = router.classify(text, embedding)
+        latencies.append(decision.route_ms)
+        if decision.predicted == expected:
+            correct_predicted += 1
+        if decision.agent:
+            routed += 1
+            if decision.agent == expected:
+                correct_routed += 1
+            else:
+                mistakes.append((text, expected, decision.agent))
+
+    total = len(labeled)
+    return {
+        'utterances': total,
+        'coverage': round(routed / total, 4) if total else 0.0,
+        'routed_accuracy': round(correct_routed / routed, 4) if routed else None,
+        'predicted_accuracy': round(correct_predicted / total, 4) if total else 0.0,
+        'route_p50_ms': round(float(np.percentile(latencies, 50)), 3) if latencies else 0.0,
+        'route_p95_ms': round(float(np.percentile(latencies, 95)), 3) if latencies else 0.0,
+        'mistakes': mistakes,
+    }
+
+
+def main():
+    """CLI interface for router evaluation."""
+    parser = argparse.ArgumentParser(description="Evaluate the local intent pre-router")
+    parser.add_argument(
+        "--file",
+        help="JSONL of {\"text\": ..., \"agent\": ...} to evaluate instead of the built-in set"
+    )
+    parser.add_argument("--heuristics-only", action="store_true", help="Skip the embedding centroids")
+    parser.add_argument("--min-margin", type=float, help="Centroid margin required to route")
+    parser.add_argument(
+        "--coordinator-ms",
+        type=float,
+        default=None,
+        help="Typical coordinator hop in ms (see stage_latency.coordinator in /health) to estimate savings"
+    )
+    args = parser.parse_args()
+
+    labeled = EVAL_SET
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            labeled = [(row["text"], row["agent"]) for row in map(json.loads, f) if row]
+
+    router = IntentRouter(mode="on", min_margin=args.min_margin)
+    result = evaluate(router, labeled, use_embeddings=not args.heuristics_only)
+
+    print(f"Utterances:         {result['utterances']}")
+    print(f"Routed locally:     {result['coverage']:.1%}")
+    if result['routed_accuracy'] is not None:
+        print(f"Routed accuracy:    {result['routed_accuracy']:.1%}")
+    print(f"Best-guess accuracy: {result['predicted_accuracy']:.1%}")
+    print(f"Routing latency:    p50 {result['route_p50_ms']:.3f} ms, p95 {result['route_p95_ms']:.3f} ms")
+    if args.coordinator_ms is not None:
+        saved = result['coverage'] * (args.coordinator_ms - result['route_p50_ms'])
+        print(f"Latency saved:      ~{saved:.0f} ms per utterance on average")
+    for text, expected, got in result['mistakes']:
+        print(f"  misrouted: {text!r} -> {got} (expected {expected})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -22,6 +22,7 @@ warnings.filterwarnings("ignore", message=".*there are non-text parts.*")
 warnings.filterwarnings("ignore", message=".*concatenated text result.*")
 
 from display import RichDisplay
+from ordered_executor import OrderedExecutor, depends_on_previous
 
 from speechmatics.rt import (
     AsyncClient,
@@ -70,11 +71,11 @@ class SecondBrainApp:
         self.client: Optional[AsyncClient] = None
         self.mic: Optional[Microphone] = None
         self.current_utterance: list = []
-        self.prompt_queue: Deque[QueuedPrompt] = deque()
+        self.prompt_queue: Deque[QueuedPrompt] = deque()  # Queued or processing, in order
         self.completed_prompts: list = []
         self.prompt_counter = 0
-        self.is_processing = False
-        self.processing_task: Optional[asyncio.Task] = None
+        # Processes independent prompts concurrently, completes them in order
+        self.executor = OrderedExecutor()
         self._agent_module = None
         
         # Session tracking
@@ -143,9 +144,12 @@ class SecondBrainApp:
         self.prompt_queue.append(prompt)
         self.on_utterance_queued(prompt)
         
-        # Start processing if not already running
-        if not self.is_processing:
-            self.processing_task = asyncio.create_task(self.process_queue())
+        # Follow-ups ("actually, make it 4pm") wait for the prompt they refer to
+        self.executor.submit(
+            lambda: self.process_prompt(prompt),
+            lambda result, error: self.complete_prompt(prompt, result, error),
+            after_previous=depends_on_previous(text),
+        )
 
     async def generate_session_summary(self) -> str:
         """Generate a high-level summary of the session using AI."""
@@ -230,43 +234,30 @@ Write only the summary, no preamble."""
         
         return filename
 
-    async def process_queue(self):
-        """Process prompts from the queue one by one."""
-        self.is_processing = True
-        first_item = True
+    async def process_prompt(self, prompt: QueuedPrompt):
+        """Process one prompt through the agent (several may run at once)."""
+        prompt.status = PromptStatus.PROCESSING
+        self.on_processing_start(prompt)
         
-        while self.prompt_queue:
-            # Delay between requests to avoid rate limits (Gemini free tier is strict)
-            if not first_item:
-                await asyncio.sleep(4.0)
-            first_item = False
-            
-            # Get next prompt
-            prompt = self.prompt_queue[0]
-            prompt.status = PromptStatus.PROCESSING
-            self.on_processing_start(prompt)
-            
-            try:
-                # Process through agent
-                process_fn = self.get_agent()
-                result = await process_fn(prompt.text)
-                
-                # Update prompt with results
-                prompt.status = PromptStatus.COMPLETED
-                prompt.response = result.response
-                prompt.tools_used = result.tools_used
-                prompt.agents_used = result.agents_used
-                
-            except Exception as e:
-                prompt.status = PromptStatus.ERROR
-                prompt.error = str(e)
-            
-            # Move to completed
-            self.prompt_queue.popleft()
-            self.completed_prompts.append(prompt)
-            self.on_processing_complete(prompt)
+        process_fn = self.get_agent()
+        return await process_fn(prompt.text)
+
+    async def complete_prompt(self, prompt: QueuedPrompt, result, error: Optional[BaseException]):
+        """Record a prompt's outcome; called in the order prompts were queued."""
+        if error is not None:
+            prompt.status = PromptStatus.ERROR
+            prompt.error = str(error)
+        else:
+            prompt.status = PromptStatus.COMPLETED
+            prompt.response = result.response
+            prompt.tools_used = result.tools_used
+            prompt.agents_used = result.agents_used
         
-        self.is_processing = False
+        # Move to completed (it may already have been cleared from the queue)
+        if prompt in self.prompt_queue:
+            self.prompt_queue.remove(prompt)
+        self.completed_prompts.append(prompt)
+        self.on_processing_complete(prompt)
 
     async def run(self, audio_file: Optional[str] = None):
         """Main run loop."""
@@ -386,8 +377,7 @@ Write only the summary, no preamble."""
             await self.client.close()
             
             # Wait for any pending processing
-            if self.processing_task and not self.processing_task.done():
-                await self.processing_task
+            await self.executor.join()
             
             # Write combined session output
             self.display.set_generating_summary(True)
@@ -410,13 +400,12 @@ async def chat_mode():
 
     # Try to use memory system for intelligent retrieval
     use_memory_system = False
-    db = None
     retrieval = None
+    stats = None
     try:
-        from memory.storage import MemoryDatabase
-        from memory.retrieval import MemoryRetrieval
-        db = MemoryDatabase("memory.db")
-        retrieval = MemoryRetrieval(db)
+        from memory.async_retrieval import get_async_retrieval
+        retrieval = await get_async_retrieval("memory.db")
+        stats = await retrieval.get_stats()
         use_memory_system = True
     except Exception:
         pass
@@ -440,7 +429,6 @@ async def chat_mode():
 
     # Show what's loaded
     if use_memory_system:
-        stats = db.get_stats()
         console.print(f"[dim]Memory system active: {stats['total_memories']} memories loaded[/dim]")
     else:
         # Fall back to file-based notes
@@ -474,7 +462,7 @@ async def chat_mode():
 
             # Use memory system for intelligent retrieval if available
             if use_memory_system and retrieval:
-                relevant_memories = retrieval.hybrid_search(user_input, top_k=10)
+                relevant_memories = await retrieval.hybrid_search(user_input, top_k=10)
                 if relevant_memories:
                     memory_lines = ["USER'S RELEVANT NOTES:"]
                     for mem in relevant_memories:
@@ -485,8 +473,9 @@ async def chat_mode():
                         memory_lines.append(f"  {content_preview}")
                     context_parts.append("\n".join(memory_lines))
 
-                    # Update access stats
-                    retrieval.update_access_stats([m.id for m in relevant_memories])
+                    # Update access stats (written in batches)
+                    from memory.access_stats import get_access_stats_buffer
+                    get_access_stats_buffer("memory.db").record(m.id for m in relevant_memories)
             else:
                 # Fall back to loading entire notes.txt
                 try:
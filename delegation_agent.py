@@ -3,14 +3,12 @@ Delegation Agent for Second Brain
 A coordinator agent that delegates tasks to specialized subagents.
 """
 
-import asyncio
-import io
 import os
-import sys
+import time
 import warnings
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 
@@ -25,14 +23,20 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
-from agents import coordinator, general_agent
+from agents import calendar_agent, coordinator, general_agent, notes_agent
+from agents.router import get_intent_router
+import rate_limiter
+import tracing
+from output_scope import suppress_output
+from session_manager import SessionManager
 
 load_dotenv()
 
 # Import memory system for intelligent context retrieval
 try:
-    from memory.storage import MemoryDatabase
-    from memory.retrieval import MemoryRetrieval
+    from memory.async_retrieval import AsyncMemoryRetrieval, get_async_retrieval
+    from memory.embedding_worker import get_embedding_worker
+    from memory.access_stats import get_access_stats_buffer
     MEMORY_AVAILABLE = True
 except ImportError:
     MEMORY_AVAILABLE = False
@@ -57,6 +61,7 @@ class ProcessingResult:
     response: str
     tools_used: List[str] = field(default_factory=list)
     agents_used: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # Milliseconds per pipeline stage
 
 
 def get_current_datetime_context() -> str:
@@ -77,6 +82,12 @@ runner = Runner(
     session_service=session_service,
 )
 
+# Runners that skip the coordinator when the intent router is confident
+direct_runners = {
+    agent.name: Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    for agent in (calendar_agent, notes_agent, general_agent)
+}
+
 # Separate runner for recall-only chat (no tool routing)
 recall_session_service = InMemorySessionService()
 recall_runner = Runner(
@@ -85,64 +96,60 @@ recall_runner = Runner(
     session_service=recall_session_service,
 )
 
-# Counter for unique session IDs
-_session_counter = 0
+# Sessions are deleted as soon as each utterance is done
+utterance_sessions = SessionManager(session_service, APP_NAME, USER_ID, prefix="session")
+recall_sessions = SessionManager(recall_session_service, f"{APP_NAME}_recall", USER_ID, prefix="recall")
 
-# Global memory system instances
-_memory_db: Optional[MemoryDatabase] = None
-_memory_retrieval: Optional[MemoryRetrieval] = None
+# Global memory system instance (native asyncio SQLite access)
+_memory_retrieval: Optional["AsyncMemoryRetrieval"] = None
 
 
-def _get_memory_system():
+async def _get_memory_system() -> Optional["AsyncMemoryRetrieval"]:
     """Get or initialize the memory system."""
-    global _memory_db, _memory_retrieval
-    if _memory_db is None and MEMORY_AVAILABLE:
+    global _memory_retrieval
+    if _memory_retrieval is None and MEMORY_AVAILABLE:
         try:
-            _memory_db = MemoryDatabase("memory.db")
-            _memory_retrieval = MemoryRetrieval(_memory_db)
+            _memory_retrieval = await get_async_retrieval("memory.db")
         except Exception as e:
             print(f"Warning: Memory system unavailable: {e}")
-            return None, None
-    return _memory_db, _memory_retrieval
+            return None
+    return _memory_retrieval
 
 
 async def create_fresh_session() -> str:
     """Create a fresh session for each utterance to ensure coordinator routing."""
-    global _session_counter
-    _session_counter += 1
-    session_id = f"session_{_session_counter}_{int(datetime.now().timestamp())}"
-    await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=session_id,
-    )
-    return session_id
+    return await utterance_sessions.create()
 
 
 async def create_fresh_recall_session() -> str:
     """Create a fresh session for recall queries."""
-    global _session_counter
-    _session_counter += 1
-    session_id = f"recall_{_session_counter}_{int(datetime.now().timestamp())}"
-    await recall_session_service.create_session(
-        app_name=f"{APP_NAME}_recall",
-        user_id=USER_ID,
-        session_id=session_id,
-    )
-    return session_id
+    return await recall_sessions.create()
+
+
+async def session_stats() -> Dict[str, Dict]:
+    """ADK session counts and the memory sessions held when released."""
+    return {
+        'utterance': await utterance_sessions.stats(),
+        'recall': await recall_sessions.stats(),
+    }
 
 
 async def _process_utterance_internal(text: str) -> ProcessingResult:
     """Internal processing function (no retry logic)."""
-    # Create a fresh session for each utterance to ensure proper coordinator routing
-    session_id = await create_fresh_session()
-
     # Retrieve relevant memories for context
     memory_context = ""
+    query_embedding = None
     try:
-        db, retrieval = _get_memory_system()
-        if db and retrieval:
-            relevant_memories = retrieval.hybrid_search(text, top_k=5)
+        retrieval = await _get_memory_system()
+        if retrieval:
+            with tracing.span("memory_retrieval"):
+                # Embed off the event loop, batched with other sessions' queries
+                with tracing.span("query_embedding"):
+                    query_embedding = await get_embedding_worker().embed(text)
+                with tracing.span("memory_search"):
+                    relevant_memories = await retrieval.hybrid_search(
+                        text, top_k=5, query_embedding=query_embedding
+                    )
 
             if relevant_memories:
                 context_parts = ["RELEVANT MEMORIES:"]
@@ -154,12 +161,20 @@ async def _process_utterance_internal(text: str) -> ProcessingResult:
                     context_parts.append(f"- {title}: {content_preview}")
                 memory_context = "\n".join(context_parts) + "\n\n"
 
-                # Update access stats for retrieved memories
-                retrieval.update_access_stats([m.id for m in relevant_memories])
+                # Update access stats for retrieved memories (written in batches)
+                get_access_stats_buffer("memory.db").record(m.id for m in relevant_memories)
     except Exception as e:
         # Fail gracefully if memory system unavailable
         pass
 
+    # Pick the sub-agent locally when confident, reusing the query embedding
+    router = get_intent_router()
+    decision = None
+    if router.enabled:
+        with tracing.span("intent_route"):
+            decision = await router.route(text, query_embedding)
+    active_runner = direct_runners[decision.agent] if decision and decision.agent else runner
+
     # Include current date/time context with the user's message
     context = get_current_datetime_context()
     message_with_context = f"{context}\n\n{memory_context}User: {text}"
@@ -174,43 +189,65 @@ async def _process_utterance_internal(text: str) -> ProcessingResult:
     tools_used = []
     agents_used = []
     all_text_responses = []
+    # Tool name -> when its call event arrived, to time sub-agent tool calls
+    pending_tools: Dict[str, float] = {}
     
-    # Suppress google.genai warnings printed to stdout/stderr
-    old_stdout, old_stderr = sys.stdout, sys.stderr
-    sys.stdout = io.StringIO()
-    sys.stderr = io.StringIO()
-    
+    # Create a fresh session for each utterance to ensure proper coordinator routing
+    # (right before the try, so it is always released)
+    with tracing.span("session_create"):
+        session_id = await create_fresh_session()
+
+    run_start = time.perf_counter()
     try:
-        # Run through the runner with proper session management
-        async for event in runner.run_async(
-            user_id=USER_ID,
-            session_id=session_id,
-            new_message=user_message,
-        ):
-            # Track agent transfers
-            if hasattr(event, 'author') and event.author:
-                agent_name = event.author
-                if agent_name not in agents_used and agent_name != "coordinator":
-                    agents_used.append(agent_name)
-            
-            # Track function/tool calls and text responses
-            if hasattr(event, 'content') and event.content:
-                if hasattr(event.content, 'parts'):
-                    for part in event.content.parts:
-                        # Check for function calls
-                        if hasattr(part, 'function_call') and part.function_call:
-                            tool_name = part.function_call.name
-                            if tool_name and tool_name not in tools_used:
-                                tools_used.append(tool_name)
-                        # Collect all text responses
-                        if hasattr(part, 'text') and part.text:
-                            all_text_responses.append(part.text)
-            
-            # Also check for direct text attribute on event
-            if hasattr(event, 'text') and event.text:
-                all_text_responses.append(event.text)
+        # Run through the runner with proper session management, hiding
+        # google.genai warnings printed to stdout/stderr by this task only
+        with suppress_output(), tracing.span("runner"):
+            async for event in active_runner.run_async(
+                user_id=USER_ID,
+                session_id=session_id,
+                new_message=user_message,
+            ):
+                # Track agent transfers
+                if hasattr(event, 'author') and event.author:
+                    agent_name = event.author
+                    if agent_name not in agents_used and agent_name != "coordinator":
+                        if not agents_used and active_runner is runner:
+                            # Coordinator hop: routing until the first sub-agent event
+                            tracing.record_stage("coordinator", (time.perf_counter() - run_start) * 1000)
+                        agents_used.append(agent_name)
+
+                # Track function/tool calls and text responses
+                if hasattr(event, 'content') and event.content:
+                    if hasattr(event.content, 'parts'):
+                        for part in event.content.parts:
+                            # Check for function calls
+                            if hasattr(part, 'function_call') and part.function_call:
+                                tool_name = part.function_call.name
+                                if tool_name and tool_name not in tools_used:
+                                    tools_used.append(tool_name)
+                                if tool_name and tool_name != "transfer_to_agent":
+                                    pending_tools[tool_name] = time.perf_counter()
+                            # Time tool calls up to their response event
+                            if hasattr(part, 'function_response') and part.function_response:
+                                called_at = pending_tools.pop(part.function_response.name, None)
+                                if called_at is not None:
+                                    tracing.record_stage(
+                                        f"tool:{part.function_response.name}",
+                                        (time.perf_counter() - called_at) * 1000,
+                                    )
+                            # Collect all text responses
+                            if hasattr(part, 'text') and part.text:
+                                all_text_responses.append(part.text)
+
+                # Also check for direct text attribute on event
+                if hasattr(event, 'text') and event.text:
+                    all_text_responses.append(event.text)
     finally:
-        sys.stdout, sys.stderr = old_stdout, old_stderr
+        await utterance_sessions.release(session_id)
+
+    if decision is not None:
+        # Coordinator runs tell us how often the router's guess was right
+        router.record_outcome(decision, agents_used[0] if agents_used else None)
     
     # Use the last non-empty text response (usually the final agent response)
     final_response = ""
@@ -239,7 +276,8 @@ async def _process_utterance_internal(text: str) -> ProcessingResult:
 
 async def _process_recall_internal(text: str) -> ProcessingResult:
     """Process a recall query using the general agent (no tool routing)."""
-    session_id = await create_fresh_recall_session()
+    with tracing.span("session_create"):
+        session_id = await create_fresh_recall_session()
     
     context = get_current_datetime_context()
     message_with_context = f"{context}\n\nUser: {text}"
@@ -251,25 +289,22 @@ async def _process_recall_internal(text: str) -> ProcessingResult:
     
     all_text_responses = []
     
-    old_stdout, old_stderr = sys.stdout, sys.stderr
-    sys.stdout = io.StringIO()
-    sys.stderr = io.StringIO()
-    
     try:
-        async for event in recall_runner.run_async(
-            user_id=USER_ID,
-            session_id=session_id,
-            new_message=user_message,
-        ):
-            if hasattr(event, 'content') and event.content:
-                if hasattr(event.content, 'parts'):
-                    for part in event.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            all_text_responses.append(part.text)
-            if hasattr(event, 'text') and event.text:
-                all_text_responses.append(event.text)
+        with suppress_output(), tracing.span("runner"):
+            async for event in recall_runner.run_async(
+                user_id=USER_ID,
+                session_id=session_id,
+                new_message=user_message,
+            ):
+                if hasattr(event, 'content') and event.content:
+                    if hasattr(event.content, 'parts'):
+                        for part in event.content.parts:
+                            if hasattr(part, 'text') and part.text:
+                                all_text_responses.append(part.text)
+                if hasattr(event, 'text') and event.text:
+                    all_text_responses.append(event.text)
     finally:
-        sys.stdout, sys.stderr = old_stdout, old_stderr
+        await recall_sessions.release(session_id)
     
     final_response = ""
     for resp in reversed(all_text_responses):
@@ -284,67 +319,62 @@ async def _process_recall_internal(text: str) -> ProcessingResult:
     )
 
 
-async def process_utterance_with_tools(text: str, max_retries: int = 5) -> ProcessingResult:
-    """Process a single utterance with automatic retry on rate limit errors."""
-    import random
-    
-    last_error = None
-    for attempt in range(max_retries):
-        try:
-            # Add delay between attempts with exponential backoff
-            if attempt > 0:
-                # Start at 5s, then 10s, 20s, 40s...
-                wait_time = (5 * (2 ** (attempt - 1))) + random.uniform(0, 2)
-                print(f"  [Retry {attempt + 1}/{max_retries}] waiting {wait_time:.0f}s...")
-                await asyncio.sleep(wait_time)
-            
-            return await _process_utterance_internal(text)
-            
-        except Exception as e:
-            error_str = str(e)
-            # Check for rate limit errors
-            if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str:
-                last_error = e
-                continue
-            else:
-                # Re-raise non-rate-limit errors immediately
-                raise
-    
-    # All retries exhausted
-    return ProcessingResult(
-        response=f"Rate limit exceeded after {max_retries} retries.",
-        tools_used=[],
-        agents_used=[],
-    )
-
-
-async def process_recall_query(text: str, max_retries: int = 5) -> ProcessingResult:
-    """Process a recall query with retry on rate limit errors."""
-    import random
-    
-    last_error = None
-    for attempt in range(max_retries):
-        try:
-            if attempt > 0:
-                wait_time = (5 * (2 ** (attempt - 1))) + random.uniform(0, 2)
-                print(f"  [Recall Retry {attempt + 1}/{max_retries}] waiting {wait_time:.0f}s...")
-                await asyncio.sleep(wait_time)
-            
-            return await _process_recall_internal(text)
-            
-        except Exception as e:
-            error_str = str(e)
-            if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str:
-                last_error = e
-                continue
-            else:
-                raise
-    
-    return ProcessingResult(
-        response=f"Rate limit exceeded after {max_retries} retries.",
-        tools_used=[],
-        agents_used=[],
-    )
+async def process_utterance_with_tools(text: str, max_retries: int = 3) -> ProcessingResult:
+    """Process a single utterance, retrying if the API still reports a rate limit.
+
+    Model calls wait on the shared rate limiter, so a 429 only happens when
+    the quota is used elsewhere; it pauses the limiter for every session
+    rather than each caller backing off on its own.
+
+    The result's timings hold milliseconds per pipeline stage (session
+    creation, memory retrieval, coordinator hop, tool calls, ...).
+    """
+    with tracing.trace("process_utterance") as trace:
+        for attempt in range(max_retries):
+            try:
+                result = await _process_utterance_internal(text)
+                result.timings = trace.snapshot()
+                return result
+                
+            except Exception as e:
+                if not rate_limiter.is_rate_limit_error(e):
+                    # Re-raise non-rate-limit errors immediately
+                    raise
+                delay = rate_limiter.retry_delay(e)
+                print(f"  [Rate limited {attempt + 1}/{max_retries}] pausing model calls for {delay:.0f}s")
+                rate_limiter.pause_all(delay)
+        
+        # All retries exhausted
+        return ProcessingResult(
+            response=f"Rate limit exceeded after {max_retries} retries.",
+            tools_used=[],
+            agents_used=[],
+            timings=trace.snapshot(),
+        )
+
+
+async def process_recall_query(text: str, max_retries: int = 3) -> ProcessingResult:
+    """Process a recall query, retrying if the API still reports a rate limit."""
+    with tracing.trace("process_recall") as trace:
+        for attempt in range(max_retries):
+            try:
+                result = await _process_recall_internal(text)
+                result.timings = trace.snapshot()
+                return result
+                
+            except Exception as e:
+                if not rate_limiter.is_rate_limit_error(e):
+                    raise
+                delay = rate_limiter.retry_delay(e)
+                print(f"  [Recall rate limited {attempt + 1}/{max_retries}] pausing model calls for {delay:.0f}s")
+                rate_limiter.pause_all(delay)
+        
+        return ProcessingResult(
+            response=f"Rate limit exceeded after {max_retries} retries.",
+            tools_used=[],
+            agents_used=[],
+            timings=trace.snapshot(),
+        )
 
 
 async def process_utterance_async(text: str) -> str:
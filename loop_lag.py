@@ -0,0 +1,91 @@
+"""
+Event loop lag monitoring for Second Brain.
+Measures how late the asyncio loop wakes up, which is how long blocking
+work (SQLite, embeddings, file I/O) stalled every other coroutine.
+"""
+
+import asyncio
+import bisect
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram (milliseconds) with recent-sample percentiles."""
+
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, max_samples: int = 10000):
+        self.counts: List[int] = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def record(self, value_ms: float):
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, value_ms)] += 1
+        self.total += 1
+        self.max_ms = max(self.max_ms, value_ms)
+        self._samples.append(value_ms)
+
+    def percentile(self, q: float) -> float:
+        """Percentile (0-100) over the most recent samples."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict:
+        """Counts per bucket plus p50/p95/p99/max."""
+        buckets = {}
+        for i, count in enumerate(self.counts):
+            label = f"<={self.BUCKETS_MS[i]}ms" if i < len(self.BUCKETS_MS) else f">{self.BUCKETS_MS[-1]}ms"
+            buckets[label] = count
+        return {
+            'count': self.total,
+            'p50_ms': round(self.percentile(50), 2),
+            'p95_ms': round(self.percentile(95), 2),
+            'p99_ms': round(self.percentile(99), 2),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': buckets,
+        }
+
+
+class EventLoopLagMonitor:
+    """Samples event loop lag by timing how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = 0.05):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.histogram = LatencyHistogram()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            self.histogram.record(max(lag, 0.0) * 1000)
+
+    def summary(self) -> Dict:
+        return self.histogram.summary()
@@ -0,0 +1,154 @@
+"""
+Write-behind buffer for memory access statistics.
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .storage import MemoryDatabase
+
+
+class AccessStatsBuffer:
+    """
+    Coalesces access-count increments and writes them in batches.
+
+    Retrievals only touch an in-memory dict; a background thread flushes it
+    in one transaction every `flush_interval` seconds, as soon as
+    `max_pending` accesses are waiting, and at interpreter exit. A crash
+    loses at most one interval's worth (and at most `max_pending`) of
+    counter updates.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "memory.db",
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            db_path: Memory database to update
+            flush_interval: Seconds between flushes (defaults to MEMORY_ACCESS_FLUSH_INTERVAL or 5)
+            max_pending: Buffered accesses that trigger an early flush
+                (defaults to MEMORY_ACCESS_MAX_PENDING or 256)
+        """
+        if flush_interval is None:
+            flush_interval = float(os.getenv("MEMORY_ACCESS_FLUSH_INTERVAL", "5"))
+        if max_pending is None:
+            max_pending = int(os.getenv("MEMORY_ACCESS_MAX_PENDING", "256"))
+
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: Dict[int, Tuple[int, str]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._db: Optional[MemoryDatabase] = None
+
+        self.flushes = 0
+        self.flushed_accesses = 0
+
+    def record(self, memory_ids: Iterable[int]):
+        """Count one access for each memory ID (cheap; never touches SQLite)."""
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            for memory_id in memory_ids:
+                count, _ = self._pending.get(memory_id, (0, now))
+                self._pending[memory_id] = (count + 1, now)
+                self._pending_count += 1
+            full = self._pending_count >= self.max_pending
+
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all buffered increments in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            accesses, self._pending_count = self._pending_count, 0
+        if not pending:
+            return
+
+        with self._flush_lock:
+            try:
+                if self._db is None:
+                    self._db = MemoryDatabase(self.db_path)
+                self._db.apply_access_stats(pending)
+            except Exception as e:
+                print(f"Warning: Failed to write access stats: {e}")
+                self._restore(pending, accesses)
+                return
+            self.flushes += 1
+            self.flushed_accesses += accesses
+
+    def close(self):
+        """Flush remaining increments and stop the background thread."""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+        with self._flush_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get buffered and flushed counters."""
+        with self._lock:
+            pending = self._pending_count
+        return {
+            'pending_accesses': pending,
+            'flushes': self.flushes,
+            'flushed_accesses': self.flushed_accesses,
+        }
+
+    def _restore(self, pending: Dict[int, Tuple[int, str]], accesses: int):
+        """Merge increments that failed to write back in, for the next flush."""
+        with self._lock:
+            for memory_id, (count, accessed_at) in pending.items():
+                newer_count, newer_at = self._pending.get(memory_id, (0, accessed_at))
+                self._pending[memory_id] = (count + newer_count, max(accessed_at, newer_at))
+            self._pending_count += accesses
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._closed:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="access-stats-flusher", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# Singleton instances, one per database
+_buffers: Dict[str, AccessStatsBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_access_stats_buffer(db_path: str = "memory.db") -> AccessStatsBuffer:
+    """Get or create the access stats buffer for a database (flushed at exit)."""
+    with _buffers_lock:
+        buffer = _buffers.get(db_path)
+        if buffer is None:
+            buffer = AccessStatsBuffer(db_path)
+            _buffers[db_path] = buffer
+            atexit.register(buffer.close)
+        return buffer
@@ -0,0 +1,286 @@
+"""
+Asyncio hybrid search on top of AsyncMemoryDatabase.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .async_storage import AsyncMemoryDatabase
+from .embedding_worker import get_embedding_worker
+from .retrieval import MemoryRetrieval, get_memory_retrieval
+from .storage import embedding_text
+from .types import Memory, SearchFilters
+
+
+class AsyncMemoryRetrieval:
+    """
+    Awaitable hybrid search for the event loop.
+
+    SQL (FTS, memory and embedding fetches, writes) goes through
+    AsyncMemoryDatabase, and query embeddings through the shared
+    EmbeddingWorker, so a search costs no thread hops of its own. The
+    resident vector index and the scoring (rerank, MMR) are shared with the
+    process-wide synchronous MemoryRetrieval (the one the note tools use);
+    (re)loading and updating the index run on a worker thread.
+    """
+
+    def __init__(self, database: AsyncMemoryDatabase, retrieval: Optional[MemoryRetrieval] = None):
+        """
+        Initialize retrieval system.
+
+        Args:
+            database: Connected AsyncMemoryDatabase
+            retrieval: MemoryRetrieval owning the vector index (the shared one for the file by default)
+        """
+        self.db = database
+        self.retrieval = retrieval or get_memory_retrieval(database.db_path)
+        self.embedder = self.retrieval.embedder
+        self.query_cache = self.retrieval.query_cache
+        self._index_lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, db_path: str = "memory.db") -> "AsyncMemoryRetrieval":
+        """Open the database and create the retrieval system."""
+        database = await AsyncMemoryDatabase.open(db_path)
+        retrieval = await asyncio.to_thread(get_memory_retrieval, db_path)
+        return cls(database, retrieval)
+
+    async def hybrid_search(
+        self,
+        query: str,
+        top_k: int = 10,
+        weights: Optional[Dict[str, float]] = None,
+        diversity_lambda: Optional[float] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        fusion: Optional[str] = None,
+        candidates: Optional[int] = None,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Memory]:
+        """
+        Perform hybrid search combining keyword and semantic search.
+
+        Same arguments, filters and ranking as MemoryRetrieval.hybrid_search.
+
+        Returns:
+            List of Memory objects sorted by relevance
+        """
+        if weights is None:
+            weights = {
+                'keyword_score': 0.3,
+                'semantic_score': 0.5,
+                'recency': 0.1,
+                'importance': 0.1,
+            }
+        fusion = fusion or self.retrieval.fusion
+        candidates = candidates or self.retrieval.candidate_pool
+        if filters is not None and filters.is_empty():
+            filters = None
+
+        normalized = " ".join(query.lower().split())
+        cache_key = (
+            'async',
+            normalized,
+            top_k,
+            tuple(sorted(weights.items())),
+            self.retrieval.diversity_lambda if diversity_lambda is None else diversity_lambda,
+            fusion,
+            candidates,
+            filters.cache_key() if filters is not None else None,
+            self.db.write_generation,
+            await self.db.get_data_version(),
+        )
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        if query_embedding is None:
+            query_embedding = await get_embedding_worker().embed(query)
+
+        allowed_ids = await self.db.filter_memory_ids(filters) if filters is not None else None
+        if allowed_ids is not None and not allowed_ids:
+            self.query_cache.put(cache_key, [])
+            return []
+
+        keyword_results, semantic_results = await asyncio.gather(
+            self.db.fts_search(query, limit=candidates, filters=filters),
+            self._vector_search(query_embedding, limit=candidates, allowed_ids=allowed_ids),
+        )
+
+        all_ids = set(keyword_results) | set(semantic_results)
+        merged = MemoryRetrieval._build_candidates(
+            keyword_results, semantic_results, await self.db.get_memories(all_ids)
+        )
+        ranked = self.retrieval._rerank(merged, weights, fusion)
+
+        embeddings_map = {}
+        if ranked:
+            blobs = await self.db.get_embeddings(result.memory.id for result in ranked)
+            embeddings_map = {
+                memory_id: self.embedder.deserialize_embedding(blob)
+                for memory_id, blob in blobs.items()
+            }
+        diverse = self.retrieval._select_diverse(ranked, embeddings_map, top_k, diversity_lambda)
+
+        memories = [result.memory for result in diverse[:top_k]]
+        self.query_cache.put(cache_key, memories)
+        return list(memories)
+
+    async def _vector_search(
+        self,
+        query_embedding: np.ndarray,
+        limit: int = 20,
+        allowed_ids: Optional[List[int]] = None
+    ) -> Dict[int, float]:
+        """Search the resident index, reloading it first if embeddings changed."""
+        await self._ensure_index()
+        # On a thread: tool threads may hold the index mutex while they update the index
+        return await asyncio.to_thread(self.retrieval._search_index, query_embedding, limit, allowed_ids)
+
+    async def _ensure_index(self):
+        """Reload the index on a worker thread when the embedding sequence moved."""
+        retrieval = self.retrieval
+        if retrieval._index_loaded and await self.db.get_embedding_sequence() == retrieval._index_seq:
+            if retrieval._index_seq - retrieval._log_pruned_seq >= retrieval.LOG_PRUNE_INTERVAL:
+                async with self._index_lock:
+                    await asyncio.to_thread(retrieval._prune_embedding_log)
+            return
+
+        async with self._index_lock:
+            await asyncio.to_thread(retrieval._ensure_index)
+
+    async def add_memory_with_embedding(
+        self,
+        content: str,
+        memory_type: str = "note",
+        title: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        source_type: str = "manual",
+        source_id: Optional[str] = None,
+    ) -> int:
+        """
+        Add a memory and generate its embedding.
+
+        Duplicates are skipped as in MemoryRetrieval.add_memory_if_new.
+
+        Returns:
+            Memory ID (of the existing memory for duplicates)
+        """
+        memory_id, _ = await self.add_memory_if_new(
+            content, memory_type, title, metadata, source_type, source_id
+        )
+        return memory_id
+
+    async def add_memory_if_new(
+        self,
+        content: str,
+        memory_type: str = "note",
+        title: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        source_type: str = "manual",
+        source_id: Optional[str] = None,
+    ) -> Tuple[int, bool]:
+        """
+        Add a memory and generate its embedding, unless it is a duplicate.
+
+        Returns:
+            Memory ID (of the existing memory for duplicates), and whether it was stored
+        """
+        existing = await self.db.find_duplicate(title, content)
+        if existing is not None:
+            return existing, False
+
+        embedding = await get_embedding_worker().embed(embedding_text(title, content))
+
+        existing = await self.find_near_duplicate(embedding)
+        if existing is not None:
+            return existing, False
+
+        serialized = self.embedder.serialize_embedding(embedding)
+
+        memory_id, sequence = await self.db.add_memory_with_embedding(
+            content,
+            serialized,
+            self.embedder.model_name,
+            memory_type=memory_type,
+            title=title,
+            metadata=metadata,
+            source_type=source_type,
+            source_id=source_id,
+        )
+
+        if sequence is None:
+            # A concurrent insert of the same text won
+            return memory_id, False
+
+        # Same thread handoff as reloads, so an add never races an index rebuild
+        async with self._index_lock:
+            await asyncio.to_thread(self.retrieval._apply_own_writes, [(memory_id, embedding)], [], sequence, 1)
+        return memory_id, True
+
+    async def find_near_duplicate(self, embedding: np.ndarray) -> Optional[int]:
+        """Find a stored memory at least dedup_threshold similar (see MemoryRetrieval)."""
+        threshold = self.retrieval.dedup_threshold
+        if threshold <= 0:
+            return None
+
+        await self._ensure_index()
+        matches = await asyncio.to_thread(self.retrieval._search_index, embedding, 1)
+        for memory_id, score in matches.items():
+            if score >= threshold:
+                return memory_id
+        return None
+
+    async def delete_memory(self, memory_id: int) -> bool:
+        """
+        Delete a memory, its embedding and its index entry.
+
+        Returns:
+            True if the memory existed
+        """
+        deleted, sequence = await self.db.delete_memory_with_embedding(memory_id)
+
+        async with self._index_lock:
+            await asyncio.to_thread(self.retrieval._apply_own_writes, [], [memory_id], sequence, 1)
+        return deleted
+
+    async def update_access_stats(self, memory_ids: List[int]):
+        """Update access statistics for retrieved memories (one transaction)."""
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        updates = {}
+        for memory_id in memory_ids:
+            count, _ = updates.get(memory_id, (0, now))
+            updates[memory_id] = (count + 1, now)
+        await self.db.apply_access_stats(updates)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get database statistics."""
+        return await self.db.get_stats()
+
+    async def close(self):
+        """Close the async database connections (the shared MemoryRetrieval stays open)."""
+        await self.db.close()
+
+
+# Singleton instances, one per database
+_retrievals: Dict[str, AsyncMemoryRetrieval] = {}
+_retrievals_lock: Optional[asyncio.Lock] = None
+
+
+async def get_async_retrieval(db_path: str = "memory.db") -> AsyncMemoryRetrieval:
+    """Get or open the shared async retrieval system for a database."""
+    global _retrievals_lock
+    retrieval = _retrievals.get(db_path)
+    if retrieval is not None:
+        return retrieval
+
+    if _retrievals_lock is None:
+        _retrievals_lock = asyncio.Lock()
+    async with _retrievals_lock:
+        retrieval = _retrievals.get(db_path)
+        if retrieval is None:
+            retrieval = await AsyncMemoryRetrieval.open(db_path)
+            _retrievals[db_path] = retrieval
+        return retrieval
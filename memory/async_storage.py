@@ -0,0 +1,423 @@
+"""
+Asyncio storage layer for the memory system using aiosqlite.
+"""
+
+import asyncio
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiosqlite
+
+from .pool import ConnectionPool, get_connection_pool
+from .storage import MemoryDatabase, content_hash, dedup_hash, embedding_text, filter_clause
+from .types import Memory, SearchFilters
+
+
+class AsyncMemoryDatabase:
+    """
+    Async counterpart of MemoryDatabase for code running on the event loop.
+
+    Uses the same schema, pragmas (WAL, synchronous=NORMAL, ...) and method
+    names as MemoryDatabase. Reads are spread over a few aiosqlite
+    connections; writes go through a single connection, one transaction at
+    a time. Open with `await AsyncMemoryDatabase.open(path)`.
+    """
+
+    def __init__(self, db_path: str = "memory.db", pool: Optional[ConnectionPool] = None):
+        """
+        Initialize (call `connect()` before use).
+
+        Args:
+            db_path: SQLite database file (':memory:' is not supported, since
+                each connection would see a different database)
+            pool: Connection pool whose pragma settings to apply
+        """
+        if db_path == ":memory:":
+            raise ValueError("AsyncMemoryDatabase needs a database file")
+
+        self.db_path = db_path
+        self.pool = pool or get_connection_pool(db_path)
+        self.conn: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._next_reader = None
+        self._write_lock = asyncio.Lock()
+        # Bumped on every content write made through this instance
+        self.write_generation = 0
+
+    @classmethod
+    async def open(cls, db_path: str = "memory.db") -> "AsyncMemoryDatabase":
+        """Create and connect a database."""
+        database = cls(db_path)
+        await database.connect()
+        return database
+
+    async def connect(self):
+        """Create the schema if needed and open the connections."""
+        # Schema creation is a one-off; reuse the synchronous definition
+        await asyncio.to_thread(lambda: MemoryDatabase(self.db_path, pool=self.pool).close())
+
+        self.conn = await self._connect()
+        self._readers = [await self._connect() for _ in range(max(1, self.pool.max_readers))]
+        self._next_reader = itertools.cycle(self._readers)
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path, timeout=self.pool.busy_timeout / 1000)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA synchronous={self.pool.synchronous}")
+        await conn.execute(f"PRAGMA mmap_size={self.pool.mmap_size}")
+        await conn.execute(f"PRAGMA cache_size={-abs(self.pool.cache_size)}")
+        await conn.execute(f"PRAGMA busy_timeout={self.pool.busy_timeout}")
+        return conn
+
+    def _reader(self) -> aiosqlite.Connection:
+        """Next read connection (each runs queries on its own thread)."""
+        return next(self._next_reader)
+
+    async def _fetchall(self, sql: str, params: Iterable = ()) -> List[aiosqlite.Row]:
+        async with self._reader().execute(sql, tuple(params)) as cursor:
+            return list(await cursor.fetchall())
+
+    async def _fetchone(self, sql: str, params: Iterable = ()) -> Optional[aiosqlite.Row]:
+        async with self._reader().execute(sql, tuple(params)) as cursor:
+            return await cursor.fetchone()
+
+    async def add_memory(
+        self,
+        content: str,
+        memory_type: str = "note",
+        title: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        source_type: str = "manual",
+        source_id: Optional[str] = None,
+        importance_score: float = 0.5,
+    ) -> int:
+        """
+        Add a new memory to the database.
+
+        Returns the memory ID.
+        """
+        memory_id, _ = await self.add_memory_with_embedding(
+            content, None, None, memory_type, title, metadata,
+            source_type, source_id, importance_score,
+        )
+        return memory_id
+
+    async def add_memory_with_embedding(
+        self,
+        content: str,
+        embedding: Optional[bytes],
+        model_version: Optional[str],
+        memory_type: str = "note",
+        title: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        source_type: str = "manual",
+        source_id: Optional[str] = None,
+        importance_score: float = 0.5,
+    ) -> Tuple[int, int]:
+        """
+        Add a memory and its serialized embedding in one transaction.
+
+        Returns:
+            (memory ID, embedding log sequence after the write). If a memory
+            with the same normalized title and content exists, nothing is
+            written and (its ID, None) is returned.
+        """
+        metadata_json = json.dumps(metadata) if metadata else "{}"
+        digest = dedup_hash(title, content)
+
+        async with self._write_lock:
+            try:
+                cursor = await self.conn.execute("""
+                    INSERT INTO memories (
+                        memory_type, title, content, metadata,
+                        importance_score, source_type, source_id, content_hash
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(content_hash) DO NOTHING
+                """, (
+                    memory_type, title, content, metadata_json,
+                    importance_score, source_type, source_id, digest
+                ))
+                if cursor.rowcount == 0:
+                    async with self.conn.execute(
+                        "SELECT id FROM memories WHERE content_hash = ?", (digest,)
+                    ) as existing:
+                        memory_id = (await existing.fetchone())[0]
+                    await self.conn.commit()
+                    return memory_id, None
+                memory_id = cursor.lastrowid
+
+                if embedding is not None:
+                    await self.conn.execute("""
+                        INSERT INTO embeddings (memory_id, embedding, model_version, content_hash)
+                        VALUES (?, ?, ?, ?)
+                    """, (memory_id, embedding, model_version, content_hash(embedding_text(title, content))))
+                sequence = await self._embedding_sequence(self.conn)
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                raise
+
+        self.write_generation += 1
+        return memory_id, sequence
+
+    async def find_duplicate(self, title: Optional[str], content: str) -> Optional[int]:
+        """Get the ID of a memory with the same normalized title and content, if any."""
+        row = await self._fetchone(
+            "SELECT id FROM memories WHERE content_hash = ?", (dedup_hash(title, content),)
+        )
+        return row[0] if row else None
+
+    async def get_memory(self, memory_id: int) -> Optional[Memory]:
+        """Retrieve a memory by ID."""
+        row = await self._fetchone("SELECT * FROM memories WHERE id = ?", (memory_id,))
+        return MemoryDatabase._row_to_memory(row) if row else None
+
+    async def get_memories(self, memory_ids: Iterable[int], chunk_size: int = 500) -> Dict[int, Memory]:
+        """
+        Retrieve several memories by ID in as few queries as possible.
+
+        Returns:
+            Dict mapping memory_id -> Memory (missing IDs are omitted)
+        """
+        memory_ids = list(dict.fromkeys(memory_ids))
+        memories = {}
+        for start in range(0, len(memory_ids), chunk_size):
+            chunk = memory_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = await self._fetchall(f"SELECT * FROM memories WHERE id IN ({placeholders})", chunk)
+            for row in rows:
+                memories[row['id']] = MemoryDatabase._row_to_memory(row)
+        return memories
+
+    async def update_memory(
+        self,
+        memory_id: int,
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        importance_score: Optional[float] = None,
+    ) -> bool:
+        """Update an existing memory. Returns True if successful."""
+        updates = []
+        params = []
+
+        if title is not None:
+            updates.append("title = ?")
+            params.append(title)
+
+        if content is not None:
+            updates.append("content = ?")
+            params.append(content)
+
+        if metadata is not None:
+            updates.append("metadata = ?")
+            params.append(json.dumps(metadata))
+
+        if importance_score is not None:
+            updates.append("importance_score = ?")
+            params.append(importance_score)
+
+        memory = await self.get_memory(memory_id)
+        if not memory:
+            return False
+        if not updates:
+            return True
+
+        if title is not None or content is not None:
+            # Keep the dedup hash current; an edit that duplicates another memory loses it
+            digest = dedup_hash(
+                title if title is not None else memory.title,
+                content if content is not None else memory.content,
+            )
+            updates.append("""content_hash = CASE
+                WHEN EXISTS (SELECT 1 FROM memories WHERE content_hash = ? AND id != ?) THEN NULL
+                ELSE ? END""")
+            params.extend([digest, memory_id, digest])
+
+        params.append(memory_id)
+        updated = await self._write(
+            f"UPDATE memories SET {', '.join(updates)} WHERE id = ?", params
+        )
+        return updated > 0
+
+    async def delete_memory(self, memory_id: int) -> bool:
+        """Delete a memory and its embedding. Returns True if successful."""
+        deleted, _ = await self.delete_memory_with_embedding(memory_id)
+        return deleted
+
+    async def delete_memory_with_embedding(self, memory_id: int) -> Tuple[bool, Optional[int]]:
+        """
+        Delete a memory and its embedding.
+
+        Returns:
+            Whether the memory existed, and the embedding log sequence of the
+            embedding delete (None if the memory had no embedding)
+        """
+        async with self._write_lock:
+            try:
+                cursor = await self.conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
+                deleted = cursor.rowcount > 0
+                cursor = await self.conn.execute("DELETE FROM embeddings WHERE memory_id = ?", (memory_id,))
+                sequence = await self._embedding_sequence(self.conn) if cursor.rowcount > 0 else None
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                raise
+
+        self.write_generation += 1
+        return deleted, sequence
+
+    async def filter_memory_ids(self, filters: SearchFilters) -> List[int]:
+        """Get IDs of all memories matching search filters (served by indexes)."""
+        condition, params = filter_clause(filters)
+        rows = await self._fetchall(f"SELECT m.id FROM memories m WHERE {condition}", params)
+        return [row[0] for row in rows]
+
+    async def get_all_memories(self, limit: Optional[int] = None) -> List[Memory]:
+        """Get all memories, optionally limited."""
+        if limit:
+            rows = await self._fetchall("SELECT * FROM memories ORDER BY timestamp DESC LIMIT ?", (limit,))
+        else:
+            rows = await self._fetchall("SELECT * FROM memories ORDER BY timestamp DESC")
+        return [MemoryDatabase._row_to_memory(row) for row in rows]
+
+    async def search_by_source_type(self, source_type: str) -> List[Memory]:
+        """Get all memories from a specific source type."""
+        rows = await self._fetchall(
+            "SELECT * FROM memories WHERE source_type = ? ORDER BY timestamp DESC",
+            (source_type,)
+        )
+        return [MemoryDatabase._row_to_memory(row) for row in rows]
+
+    async def fts_search(
+        self,
+        query: str,
+        limit: int = 20,
+        filters: Optional[SearchFilters] = None,
+    ) -> Dict[int, float]:
+        """
+        Perform FTS5 keyword search, optionally restricted by search filters.
+
+        Returns:
+            Dict mapping memory_id -> BM25 score (empty on FTS5 syntax errors)
+        """
+        restriction, params = "", ()
+        if filters is not None:
+            # Filter before LIMIT so filtered-out matches don't use up the candidates
+            condition, params = filter_clause(filters)
+            restriction = f"AND rowid IN (SELECT m.id FROM memories m WHERE {condition})"
+        try:
+            rows = await self._fetchall(f"""
+                SELECT rowid, rank
+                FROM memories_fts
+                WHERE memories_fts MATCH ? {restriction}
+                ORDER BY rank
+                LIMIT ?
+            """, (query, *params, limit))
+        except aiosqlite.OperationalError:
+            return {}
+        # BM25 rank is negative, closer to 0 is better
+        return {row[0]: -row[1] for row in rows}
+
+    async def get_embeddings(self, memory_ids: Iterable[int], chunk_size: int = 500) -> Dict[int, bytes]:
+        """
+        Retrieve serialized embeddings for several memories.
+
+        Returns:
+            Dict mapping memory_id -> embedding blob (missing IDs are omitted)
+        """
+        memory_ids = list(dict.fromkeys(memory_ids))
+        embeddings = {}
+        for start in range(0, len(memory_ids), chunk_size):
+            chunk = memory_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = await self._fetchall(
+                f"SELECT memory_id, embedding FROM embeddings WHERE memory_id IN ({placeholders})",
+                chunk
+            )
+            for memory_id, blob in rows:
+                embeddings[memory_id] = blob
+        return embeddings
+
+    async def get_embedding_sequence(self) -> int:
+        """Get the position of the latest embedding write (0 if none)."""
+        return await self._embedding_sequence(self._reader())
+
+    @staticmethod
+    async def _embedding_sequence(conn: aiosqlite.Connection) -> int:
+        async with conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'embedding_log'"
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def get_data_version(self) -> int:
+        """Get SQLite's data_version for the write connection."""
+        async with self.conn.execute("PRAGMA data_version") as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def apply_access_stats(self, updates: Dict[int, Tuple[int, str]]):
+        """Apply coalesced access statistics in a single transaction."""
+        if not updates:
+            return
+        async with self._write_lock:
+            try:
+                await self.conn.executemany("""
+                    UPDATE memories
+                    SET access_count = access_count + ?,
+                        last_accessed = ?
+                    WHERE id = ?
+                """, [(count, last_accessed, memory_id) for memory_id, (count, last_accessed) in updates.items()])
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                raise
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get database statistics."""
+        total = (await self._fetchone("SELECT COUNT(*) FROM memories"))[0]
+        rows = await self._fetchall("""
+            SELECT memory_type, COUNT(*) as count
+            FROM memories
+            GROUP BY memory_type
+        """)
+        by_type = {row[0]: row[1] for row in rows}
+
+        db_size = Path(self.db_path).stat().st_size if Path(self.db_path).exists() else 0
+
+        return {
+            'total_memories': total,
+            'by_type': by_type,
+            'db_size_bytes': db_size,
+            'db_size_mb': round(db_size / (1024 * 1024), 2),
+        }
+
+    async def _write(self, sql: str, params: Iterable = ()) -> int:
+        """Run one write statement in its own transaction. Returns the row count."""
+        async with self._write_lock:
+            try:
+                cursor = await self.conn.execute(sql, tuple(params))
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                raise
+        self.write_generation += 1
+        return cursor.rowcount
+
+    async def close(self):
+        """Close all connections."""
+        for conn in [self.conn, *self._readers]:
+            if conn is not None:
+                await conn.close()
+        self.conn = None
+        self._readers = []
+
+    async def __aenter__(self):
+        if self.conn is None:
+            await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,201 @@
+"""
+Bounded in-process caches for the memory system.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+import numpy as np
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional time-to-live.
+
+    Bounded by entry count and optionally by total size in bytes. Entries
+    past `ttl` seconds are treated as misses and dropped on access.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept (0 disables caching)
+            ttl: Seconds an entry stays valid (None = until evicted)
+            max_bytes: Maximum total size of cached values (None = unbounded)
+            sizeof: Size of a value in bytes (defaults to its `nbytes`, else 0)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: getattr(value, 'nbytes', 0))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._pop(key)
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (value, time.monotonic())
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _pop(self, key: Hashable):
+        """Remove an entry and release its size. Caller holds the lock."""
+        value, _ = self._entries.pop(key)
+        self.bytes -= self.sizeof(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskEmbeddingCache:
+    """
+    Persistent embedding cache in a small SQLite file.
+
+    Rows are keyed by text hash and model name, so switching models never
+    returns stale vectors. Vectors are stored as raw float32 bytes.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the cache, creating its table if needed.
+
+        Args:
+            path: SQLite file to store embeddings in
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                text_hash TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (text_hash, model_name)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def get_many(self, text_hashes: Iterable[str], model_name: str, chunk_size: int = 500) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings.
+
+        Returns:
+            Dict mapping text hash -> embedding for the hashes found
+        """
+        text_hashes = list(text_hashes)
+        found = {}
+        with self._lock:
+            for start in range(0, len(text_hashes), chunk_size):
+                chunk = text_hashes[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, embedding FROM embedding_cache "
+                    f"WHERE model_name = ? AND text_hash IN ({placeholders})",
+                    [model_name, *chunk]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype='<f4').copy()
+            self.hits += len(found)
+            self.misses += len(text_hashes) - len(found)
+        return found
+
+    def put_many(self, embeddings: Dict[str, np.ndarray], model_name: str):
+        """Store embeddings, replacing existing rows."""
+        if not embeddings:
+            return
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (text_hash, model_name, embedding) VALUES (?, ?, ?)",
+                [
+                    (text_hash, model_name, np.asarray(embedding, dtype='<f4').tobytes())
+                    for text_hash, embedding in embeddings.items()
+                ]
+            )
+            self.conn.commit()
+
+    def clear(self):
+        """Delete all cached embeddings."""
+        with self._lock:
+            self.conn.execute("DELETE FROM embedding_cache")
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the number of stored embeddings."""
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
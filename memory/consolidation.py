@@ -229,31 +229,31 @@ Do not include any other text or explanation."""
         Returns:
             Number of insights saved
         """
-        count = 0
-        for insight in insights:
-            try:
-                # Determine memory type from insight type
-                memory_type_map = {
-                    'fact': 'fact',
-                    'preference': 'insight',
-                    'topic': 'insight',
-                }
-                memory_type = memory_type_map.get(insight['type'], 'insight')
-
-                # Add to database with embedding
-                self.retrieval.add_memory_with_embedding(
-                    title=insight['title'],
-                    content=insight['content'],
-                    memory_type=memory_type,
-                    source_type='consolidated',
-                    source_id=source_id,
-                )
-                count += 1
-
-            except Exception as e:
-                print(f"Error saving insight '{insight.get('title')}': {e}")
+        # Determine memory type from insight type
+        memory_type_map = {
+            'fact': 'fact',
+            'preference': 'insight',
+            'topic': 'insight',
+        }
+        records = (
+            {
+                'title': insight['title'],
+                'content': insight['content'],
+                'memory_type': memory_type_map.get(insight['type'], 'insight'),
+                'source_type': 'consolidated',
+                'source_id': source_id,
+            }
+            for insight in insights
+        )
+
+        # Embed and insert all insights in one batch
+        try:
+            report = self.retrieval.add_memories_bulk(records, verbose=False)
+        except Exception as e:
+            print(f"Error saving insights from {source_id}: {e}")
+            return 0
 
-        return count
+        return report['inserted']
 
 
 def main():
@@ -0,0 +1,135 @@
+"""
+Micro-batching embedding worker for async callers.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingService, get_embedding_service
+
+
+class EmbeddingWorker:
+    """
+    Coalesces embed requests from many coroutines into batched encodes.
+
+    Requests are collected until `max_batch` texts are waiting or `max_wait`
+    seconds have passed since the first one, then embedded with a single
+    `embed_batch` call on a background thread. The event loop never blocks
+    on the model.
+    """
+
+    def __init__(
+        self,
+        service: Optional[EmbeddingService] = None,
+        max_batch: int = 64,
+        max_wait: float = 0.008,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            service: Embedding service to use (defaults to the shared instance)
+            max_batch: Maximum texts per encode call
+            max_wait: Seconds to wait for more requests after the first arrives
+        """
+        self.service = service or get_embedding_service()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        # One model thread: batches run back to back instead of contending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-worker")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed a single text, batched with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # First use, or a new event loop (e.g. successive asyncio.run calls)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed several texts; they join the same batches as other callers."""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def _run(self):
+        """Collect requests into batches and embed them until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._embed_batch(loop, batch)
+
+    async def _embed_batch(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[str, asyncio.Future]]):
+        """Run one encode for a batch and resolve each caller's future."""
+        # Identical texts in the same window are embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            embeddings = await loop.run_in_executor(self._executor, self.service.embed_batch, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+        self.batches += 1
+        self.items += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batching counters."""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Stop the batching task and the model thread."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+
+# Singleton instance for reuse
+_embedding_worker: Optional[EmbeddingWorker] = None
+
+
+def get_embedding_worker() -> EmbeddingWorker:
+    """Get or create the global embedding worker."""
+    global _embedding_worker
+    if _embedding_worker is None:
+        _embedding_worker = EmbeddingWorker()
+    return _embedding_worker
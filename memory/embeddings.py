@@ -3,25 +3,124 @@ Embedding generation using sentence-transformers.
 """
 
 import hashlib
+import os
 import pickle
-from typing import List, Optional
+import struct
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+from .cache import DiskEmbeddingCache, LRUCache
+
+
+# Binary embedding format: 8-byte header followed by the payload.
+#   bytes 0-2  magic b"SBE"
+#   byte  3    format version
+#   byte  4    storage code (see _STORAGE_CODES)
+#   bytes 5-7  reserved (zero), keeps the payload 8-byte aligned
+# Float payloads are raw little-endian values. Quantized payloads start with
+# an 8-byte block (float32 scale, uint16 dimension, 2 pad bytes), then codes.
+EMBEDDING_MAGIC = b"SBE"
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_HEADER_SIZE = 8
+
+_STORAGE_CODES = {
+    'float32': 1,
+    'float16': 2,
+    'int8': 3,
+    'binary': 4,
+}
+_FLOAT_DTYPES = {
+    1: np.dtype('<f4'),
+    2: np.dtype('<f2'),
+}
+_QUANTIZED_BLOCK = struct.Struct('<fH2x')
+
+
+def quantize_int8(vectors: np.ndarray):
+    """
+    Symmetric per-vector int8 quantization.
+
+    Returns:
+        (codes, scales): int8 codes (N x d) and float32 scales (N,), where
+        vector ~= codes * scale
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    safe = np.where(scales == 0, 1.0, scales)
+    codes = np.clip(np.rint(vectors / safe[:, np.newaxis]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Reconstruct float32 vectors from int8 codes and per-vector scales."""
+    return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32)[:, np.newaxis]
+
+
+def quantize_binary(vectors: np.ndarray):
+    """
+    Sign-bit quantization, packed 8 dimensions per byte.
+
+    Returns:
+        (codes, scales): uint8 packed bits (N x ceil(d/8)) and float32 scales
+        (mean absolute value per vector), where vector ~= sign * scale
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    codes = np.packbits(vectors > 0, axis=1)
+    scales = np.abs(vectors).mean(axis=1).astype(np.float32)
+    return codes, scales
+
+
+def dequantize_binary(codes: np.ndarray, scales: np.ndarray, dimension: int) -> np.ndarray:
+    """Reconstruct float32 vectors from packed sign bits and per-vector scales."""
+    signs = np.unpackbits(codes, axis=1, count=dimension).astype(np.float32) * 2.0 - 1.0
+    return signs * np.asarray(scales, dtype=np.float32)[:, np.newaxis]
+
 
 class EmbeddingService:
     """Service for generating and managing text embeddings."""
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        storage_dtype: Optional[str] = None,
+        cache_entries: Optional[int] = None,
+        cache_bytes: Optional[int] = None,
+        disk_cache_path: Optional[str] = None,
+    ):
         """
         Initialize the embedding service.
 
         Args:
             model_name: Name of the sentence-transformers model to use
+            storage_dtype: 'float32', 'float16', 'int8' or 'binary' for serialized
+                embeddings (defaults to MEMORY_EMBEDDING_DTYPE or float32)
+            cache_entries: Maximum embeddings kept in memory
+                (defaults to MEMORY_EMBEDDING_CACHE_SIZE or 10000)
+            cache_bytes: Optional memory budget for cached embeddings
+                (defaults to MEMORY_EMBEDDING_CACHE_BYTES)
+            disk_cache_path: SQLite file persisting embeddings across restarts
+                (defaults to MEMORY_EMBEDDING_CACHE_DB; disabled if unset)
         """
+        storage_dtype = storage_dtype or os.getenv("MEMORY_EMBEDDING_DTYPE", "float32")
+        if storage_dtype not in _STORAGE_CODES:
+            raise ValueError(
+                f"Unsupported storage dtype '{storage_dtype}'. "
+                f"Choose from: {', '.join(_STORAGE_CODES)}"
+            )
+
         self.model_name = model_name
+        self.storage_dtype = storage_dtype
         self._model = None
-        self._cache = {}  # Simple in-memory cache
+
+        if cache_entries is None:
+            cache_entries = int(os.getenv("MEMORY_EMBEDDING_CACHE_SIZE", "10000"))
+        if cache_bytes is None and os.getenv("MEMORY_EMBEDDING_CACHE_BYTES"):
+            cache_bytes = int(os.getenv("MEMORY_EMBEDDING_CACHE_BYTES"))
+        self._cache = LRUCache(max_entries=cache_entries, max_bytes=cache_bytes)
+
+        disk_cache_path = disk_cache_path or os.getenv("MEMORY_EMBEDDING_CACHE_DB")
+        self._disk_cache = DiskEmbeddingCache(disk_cache_path) if disk_cache_path else None
 
     def _load_model(self):
         """Lazy load the sentence-transformers model."""
@@ -54,16 +153,16 @@ class EmbeddingService:
         # Check cache
         if use_cache:
             cache_key = self._get_cache_key(text)
-            if cache_key in self._cache:
-                return self._cache[cache_key]
+            cached = self._cache_lookup([cache_key])
+            if cache_key in cached:
+                return cached[cache_key]
 
         self._load_model()
         embedding = self._model.encode(text, convert_to_numpy=True)
 
         # Cache the result
         if use_cache:
-            cache_key = self._get_cache_key(text)
-            self._cache[cache_key] = embedding
+            self._cache_store({cache_key: embedding})
 
         return embedding
 
@@ -83,24 +182,22 @@ class EmbeddingService:
 
         # Check which texts need embedding
         embeddings = [None] * len(texts)
-        texts_to_embed = []
-        indices_to_embed = []
+        cache_keys = {}
 
         for i, text in enumerate(texts):
             if not text or not text.strip():
                 # Zero vector for empty text
                 self._load_model()
                 embeddings[i] = np.zeros(self._model.get_sentence_embedding_dimension())
-                continue
+            elif use_cache:
+                cache_keys[i] = self._get_cache_key(text)
 
-            if use_cache:
-                cache_key = self._get_cache_key(text)
-                if cache_key in self._cache:
-                    embeddings[i] = self._cache[cache_key]
-                    continue
+        cached = self._cache_lookup(set(cache_keys.values())) if cache_keys else {}
+        for i, cache_key in cache_keys.items():
+            embeddings[i] = cached.get(cache_key)
 
-            texts_to_embed.append(text)
-            indices_to_embed.append(i)
+        indices_to_embed = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        texts_to_embed = [texts[i] for i in indices_to_embed]
 
         # Embed uncached texts in batch
         if texts_to_embed:
@@ -115,13 +212,40 @@ class EmbeddingService:
             for idx, embedding in zip(indices_to_embed, batch_embeddings):
                 embeddings[idx] = embedding
 
-                # Cache it
-                if use_cache:
-                    cache_key = self._get_cache_key(texts[idx])
-                    self._cache[cache_key] = embedding
+            # Cache them
+            if use_cache:
+                self._cache_store({
+                    cache_keys[idx]: embedding
+                    for idx, embedding in zip(indices_to_embed, batch_embeddings)
+                })
 
         return embeddings
 
+    def _cache_lookup(self, cache_keys) -> Dict[str, np.ndarray]:
+        """Look keys up in memory, then on disk (promoting disk hits to memory)."""
+        found = {}
+        missing = []
+        for cache_key in cache_keys:
+            embedding = self._cache.get(cache_key)
+            if embedding is None:
+                missing.append(cache_key)
+            else:
+                found[cache_key] = embedding
+
+        if missing and self._disk_cache is not None:
+            for cache_key, embedding in self._disk_cache.get_many(missing, self.model_name).items():
+                self._cache.put(cache_key, embedding)
+                found[cache_key] = embedding
+
+        return found
+
+    def _cache_store(self, embeddings: Dict[str, np.ndarray]):
+        """Add freshly computed embeddings to both cache tiers."""
+        for cache_key, embedding in embeddings.items():
+            self._cache.put(cache_key, embedding)
+        if self._disk_cache is not None:
+            self._disk_cache.put_many(embeddings, self.model_name)
+
     def cosine_similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
         """
         Calculate cosine similarity between two embeddings.
@@ -150,21 +274,59 @@ class EmbeddingService:
             embedding: NumPy array to serialize
 
         Returns:
-            Bytes representation
+            Versioned header followed by raw little-endian values (or a
+            scale block and codes for int8/binary storage)
         """
-        return pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL)
+        code = _STORAGE_CODES[self.storage_dtype]
+        header = EMBEDDING_MAGIC + bytes([EMBEDDING_FORMAT_VERSION, code, 0, 0, 0])
+        vector = np.ravel(embedding)
+
+        if code in _FLOAT_DTYPES:
+            return header + vector.astype(_FLOAT_DTYPES[code], copy=False).tobytes()
+
+        quantize = quantize_int8 if self.storage_dtype == 'int8' else quantize_binary
+        codes, scales = quantize(vector)
+        return header + _QUANTIZED_BLOCK.pack(float(scales[0]), len(vector)) + codes.tobytes()
 
     def deserialize_embedding(self, blob: bytes) -> np.ndarray:
         """
         Deserialize embedding from bytes.
 
+        Float blobs are read with np.frombuffer (a read-only view, no copy);
+        quantized blobs are dequantized to float32. Legacy pickled blobs are
+        still accepted.
+
         Args:
             blob: Bytes representation
 
         Returns:
             NumPy array
         """
-        return pickle.loads(blob)
+        if self.is_legacy_blob(blob):
+            return pickle.loads(blob)
+
+        version, code = blob[3], blob[4]
+        if version != EMBEDDING_FORMAT_VERSION or code not in _STORAGE_CODES.values():
+            raise ValueError(f"Unsupported embedding format (version {version}, dtype {code})")
+
+        if code in _FLOAT_DTYPES:
+            return np.frombuffer(blob, dtype=_FLOAT_DTYPES[code], offset=EMBEDDING_HEADER_SIZE)
+
+        scale, dimension = _QUANTIZED_BLOCK.unpack_from(blob, EMBEDDING_HEADER_SIZE)
+        offset = EMBEDDING_HEADER_SIZE + _QUANTIZED_BLOCK.size
+        scales = np.array([scale], dtype=np.float32)
+
+        if code == _STORAGE_CODES['int8']:
+            codes = np.frombuffer(blob, dtype=np.int8, offset=offset)
+            return dequantize_int8(codes[np.newaxis], scales)[0]
+
+        codes = np.frombuffer(blob, dtype=np.uint8, offset=offset)
+        return dequantize_binary(codes[np.newaxis], scales, dimension)[0]
+
+    @staticmethod
+    def is_legacy_blob(blob: bytes) -> bool:
+        """Check whether a stored blob predates the binary format (pickled)."""
+        return bytes(blob[:len(EMBEDDING_MAGIC)]) != EMBEDDING_MAGIC
 
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by this model."""
@@ -177,9 +339,16 @@ class EmbeddingService:
         return hashlib.md5(text.encode('utf-8')).hexdigest()
 
     def clear_cache(self):
-        """Clear the embedding cache."""
+        """Clear the in-memory embedding cache (the disk tier is kept)."""
         self._cache.clear()
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get statistics for the in-memory and disk embedding caches."""
+        return {
+            'memory': self._cache.stats(),
+            'disk': self._disk_cache.stats() if self._disk_cache is not None else None,
+        }
+
 
 # Singleton instance for reuse
 _embedding_service: Optional[EmbeddingService] = None
@@ -0,0 +1,238 @@
+"""
+Offline evaluation of hybrid search quality and latency on synthetic memories.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .retrieval import MemoryRetrieval
+from .storage import MemoryDatabase
+
+
+# Vocabulary for synthetic memories; each memory mixes words from one topic
+TOPICS = {
+    'food': ["thai", "curry", "noodles", "spicy", "restaurant", "recipe", "basil",
+             "dinner", "lunch", "soup", "garlic", "coconut"],
+    'travel': ["flight", "airport", "hotel", "passport", "beach", "itinerary",
+               "luggage", "train", "booking", "museum", "visa", "island"],
+    'work': ["meeting", "deadline", "project", "manager", "report", "quarterly",
+             "budget", "client", "presentation", "roadmap", "sprint", "review"],
+    'health': ["doctor", "appointment", "vitamins", "running", "sleep", "dentist",
+               "yoga", "prescription", "allergy", "workout", "checkup", "stretching"],
+    'finance': ["taxes", "savings", "invoice", "mortgage", "rent", "insurance",
+                "stocks", "pension", "receipt", "loan", "dividend", "expenses"],
+    'music': ["guitar", "concert", "playlist", "album", "piano", "lyrics",
+              "festival", "vinyl", "drums", "chorus", "melody", "rehearsal"],
+    'home': ["garden", "plumber", "furniture", "kitchen", "paint", "laundry",
+             "groceries", "vacuum", "lightbulb", "heating", "curtains", "balcony"],
+    'tech': ["laptop", "python", "database", "server", "password", "backup",
+             "keyboard", "update", "router", "monitor", "script", "deploy"],
+}
+
+_SYLLABLES = ["ka", "lo", "mi", "ren", "tas", "vo", "zel", "qui", "dar", "nex", "por", "ish"]
+
+
+def build_synthetic_corpus(
+    n_memories: int = 500,
+    n_queries: int = 200,
+    seed: int = 0,
+) -> Tuple[List[Dict[str, Any]], List[Tuple[str, int]]]:
+    """
+    Generate memories and labeled queries.
+
+    Every memory has a made-up proper name plus words from one topic. Half
+    the queries mention the name (keyword retrieval should win), the other
+    half only paraphrase the topic words in another order (semantic
+    retrieval should win).
+
+    Returns:
+        (records for add_memories_bulk, [(query, index of the relevant record)])
+    """
+    rng = random.Random(seed)
+    topic_names = sorted(TOPICS)
+
+    records = []
+    names = set()
+    for i in range(n_memories):
+        topic = topic_names[i % len(topic_names)]
+        while True:
+            name = "".join(rng.choice(_SYLLABLES) for _ in range(3))
+            if name not in names:
+                names.add(name)
+                break
+        words = rng.sample(TOPICS[topic], 6)
+        noise = rng.choice(TOPICS[rng.choice(topic_names)])
+        records.append({
+            'title': f"{name.capitalize()} {words[0]}",
+            'content': f"{' '.join(words[1:])} with {name.capitalize()}, also {noise}",
+            'memory_type': 'note',
+            'source_type': 'synthetic',
+            '_name': name,
+            '_words': words,
+        })
+
+    queries = []
+    for q in range(n_queries):
+        target = rng.randrange(n_memories)
+        record = records[target]
+        if q % 2 == 0:
+            query = f"{record['_name']} {rng.choice(record['_words'])}"
+        else:
+            query = " ".join(rng.sample(record['_words'], 4))
+        queries.append((query, target))
+
+    for record in records:
+        del record['_name'], record['_words']
+    return records, queries
+
+
+def evaluate(
+    retrieval: MemoryRetrieval,
+    queries: Iterable[Tuple[str, int]],
+    fusion: str,
+    candidates: int,
+    k: int = 10,
+) -> Dict[str, Any]:
+    """
+    Run labeled queries through hybrid_search.
+
+    Args:
+        retrieval: Retrieval system over the evaluation corpus
+        queries: (query text, relevant memory ID) pairs
+        fusion: Fusion mode to evaluate
+        candidates: Candidate pool size per retriever
+        k: Results considered for recall@k and MRR
+
+    Returns:
+        Dict with recall@k, MRR and latency percentiles (ms)
+    """
+    hits = 0
+    reciprocal_ranks = []
+    latencies = []
+    queries = list(queries)
+
+    for query, relevant_id in queries:
+        start = time.perf_counter()
+        results = retrieval.hybrid_search(query, top_k=k, fusion=fusion, candidates=candidates)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ids = [memory.id for memory in results]
+        if relevant_id in ids:
+            hits += 1
+            reciprocal_ranks.append(1 / (ids.index(relevant_id) + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+
+    return {
+        'fusion': fusion,
+        'candidates': candidates,
+        f'recall@{k}': round(hits / len(queries), 4) if queries else 0.0,
+        'mrr': round(float(np.mean(reciprocal_ranks)), 4) if queries else 0.0,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2) if latencies else 0.0,
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2) if latencies else 0.0,
+    }
+
+
+def run_evaluation(
+    n_memories: int = 500,
+    n_queries: int = 200,
+    fusions: Optional[List[str]] = None,
+    candidate_pools: Optional[List[int]] = None,
+    k: int = 10,
+    seed: int = 0,
+    db_path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build a synthetic corpus and compare fusion modes and candidate pool sizes.
+
+    Args:
+        n_memories: Synthetic memories to index
+        n_queries: Labeled queries to run per configuration
+        fusions: Fusion modes to compare (defaults to all)
+        candidate_pools: Candidate pool sizes to compare (defaults to 5, 10, 20, 40)
+        k: Results considered for recall@k and MRR
+        seed: Random seed for the corpus
+        db_path: Database file to build (defaults to a temporary file)
+
+    Returns:
+        One result dict per (fusion, candidate pool) pair
+    """
+    fusions = fusions or list(MemoryRetrieval.FUSION_MODES)
+    candidate_pools = candidate_pools or [5, 10, 20, 40]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = MemoryDatabase(db_path or str(Path(tmp_dir) / "evaluation.db"))
+        retrieval = MemoryRetrieval(db)
+        # Keep every synthetic memory and measure uncached searches
+        retrieval.dedup_threshold = 0
+        retrieval.query_cache = LRUCache(max_entries=0)
+
+        records, queries = build_synthetic_corpus(n_memories, n_queries, seed)
+        report = retrieval.add_memories_bulk(records, verbose=False)
+        labeled = [(query, report['memory_ids'][target]) for query, target in queries]
+
+        # Warm up the index and embedding model before timing
+        retrieval.hybrid_search(labeled[0][0], top_k=k)
+
+        results = []
+        for fusion in fusions:
+            for candidates in candidate_pools:
+                results.append(evaluate(retrieval, labeled, fusion, candidates, k))
+
+        db.close()
+    return results
+
+
+def main():
+    """CLI interface for search evaluation."""
+    parser = argparse.ArgumentParser(
+        description="Compare hybrid search fusion modes on synthetic memories"
+    )
+    parser.add_argument("--memories", type=int, default=500, help="Synthetic memories to index")
+    parser.add_argument("--queries", type=int, default=200, help="Labeled queries per configuration")
+    parser.add_argument(
+        "--fusion",
+        nargs="+",
+        choices=MemoryRetrieval.FUSION_MODES,
+        help="Fusion modes to compare (default: all)"
+    )
+    parser.add_argument(
+        "--candidates",
+        nargs="+",
+        type=int,
+        help="Candidate pool sizes to compare (default: 5 10 20 40)"
+    )
+    parser.add_argument("-k", type=int, default=10, help="Cutoff for recall@k and MRR")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus")
+
+    args = parser.parse_args()
+
+    results = run_evaluation(
+        n_memories=args.memories,
+        n_queries=args.queries,
+        fusions=args.fusion,
+        candidate_pools=args.candidates,
+        k=args.k,
+        seed=args.seed,
+    )
+
+    recall_key = f'recall@{args.k}'
+    print(f"{'fusion':<8} {'cands':>5} {recall_key:>10} {'mrr':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for result in results:
+        print(
+            f"{result['fusion']:<8} {result['candidates']:>5} {result[recall_key]:>10.3f} "
+            f"{result['mrr']:>7.3f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,736 @@
+"""
+Resident vector index for semantic search.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .embeddings import dequantize_binary, dequantize_int8, quantize_binary, quantize_int8
+
+# Fetches float vectors for memory IDs (used for exact rescoring)
+VectorLoader = Callable[[List[int]], Dict[int, np.ndarray]]
+
+# Number of set bits for every byte value, for Hamming distances
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1).astype(np.uint16)
+
+
+class VectorIndex:
+    """
+    In-memory matrix of normalized embeddings.
+
+    Rows are L2-normalized float32 vectors, so cosine similarity against a
+    query is a single matrix-vector product. Row order is not stable:
+    removals swap the last row into the freed slot.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimension: Embedding dimension (inferred from the first vector if None)
+            initial_capacity: Number of rows to preallocate once the dimension is known
+        """
+        self.dimension = dimension
+        self._initial_capacity = max(1, initial_capacity)
+        self._size = 0
+        self._positions: Dict[int, int] = {}
+        self._allocate(0)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, memory_id: int) -> bool:
+        return memory_id in self._positions
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Memory IDs, aligned with the rows of `matrix`."""
+        return self._ids[:self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Stored rows: normalized float32 vectors, or codes for quantized indexes."""
+        return self._matrix[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index arrays, including spare capacity."""
+        return self._ids.nbytes + self._matrix.nbytes
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows as float32. Zero rows stay zero."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def build(self, ids: Iterable[int], vectors: Iterable[np.ndarray], normalized: bool = False):
+        """
+        Replace the index contents with the given ids and vectors.
+
+        Args:
+            ids: Memory IDs
+            vectors: Embeddings aligned with `ids` (a list or an N x d array)
+            normalized: Vectors are already unit-length float32 rows. A float
+                index then adopts the array as-is (e.g. a copy-on-write memmap)
+                instead of copying it.
+        """
+        ids = np.array(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64)
+        if isinstance(vectors, np.ndarray) and vectors.ndim == 2:
+            matrix = vectors
+        else:
+            vectors = list(vectors)
+            matrix = np.vstack(vectors) if vectors else None
+
+        if matrix is None or len(matrix) == 0:
+            self.clear()
+            return
+
+        if not normalized:
+            matrix = self.normalize(matrix)
+
+        self.dimension = matrix.shape[1]
+        self._size = 0
+        self._allocate(len(ids))
+        self._size = len(ids)
+        self._ids[:] = ids
+
+        if normalized and matrix.dtype == self._code_dtype() and self._code_width() == self.dimension:
+            self._matrix = matrix
+        else:
+            self._write_rows(slice(0, self._size), matrix)
+
+        self._positions = dict(zip(ids.tolist(), range(self._size)))
+
+    def add(self, memory_id: int, embedding: np.ndarray):
+        """Insert or replace the vector for a memory."""
+        vector = self.normalize(np.ravel(embedding))
+
+        if self.dimension is None or (self._size == 0 and self.dimension != vector.shape[0]):
+            self.dimension = vector.shape[0]
+            self._allocate(self._initial_capacity)
+
+        if vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {vector.shape[0]} does not match index dimension {self.dimension}"
+            )
+
+        row = self._positions.get(memory_id)
+        if row is None:
+            if self._size == len(self._ids):
+                self._allocate(max(self._size * 2, self._initial_capacity))
+            row = self._size
+            self._size += 1
+            self._ids[row] = memory_id
+            self._positions[memory_id] = row
+
+        self._write_rows(slice(row, row + 1), vector[np.newaxis])
+
+    def remove(self, memory_id: int) -> bool:
+        """Remove a memory from the index. Returns True if it was present."""
+        row = self._positions.pop(memory_id, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            # Move the last row into the freed slot
+            moved_id = int(self._ids[last])
+            self._move_row(last, row)
+            self._positions[moved_id] = row
+
+        self._size = last
+        return True
+
+    def get_vector(self, memory_id: int) -> Optional[np.ndarray]:
+        """Get the normalized vector for a memory, or None if not indexed."""
+        row = self._positions.get(memory_id)
+        if row is None:
+            return None
+        return self._read_rows(np.array([row]))[0]
+
+    def search(self, query_embedding: np.ndarray, limit: int = 20) -> Dict[int, float]:
+        """
+        Find the most similar vectors to a query.
+
+        Args:
+            query_embedding: Query vector (need not be normalized)
+            limit: Maximum number of results
+
+        Returns:
+            Dict mapping memory_id -> cosine similarity, highest first
+        """
+        return self.exact_search(query_embedding, limit)
+
+    def exact_search(self, query_embedding: np.ndarray, limit: int = 20) -> Dict[int, float]:
+        """Brute-force search over every row (the reference for recall measurements)."""
+        if self._size == 0 or limit <= 0:
+            return {}
+
+        query = self.normalize(np.ravel(query_embedding))
+        return self._top_k(np.arange(self._size), self.matrix @ query, limit)
+
+    def search_subset(
+        self,
+        query_embedding: np.ndarray,
+        memory_ids: Iterable[int],
+        limit: int = 20,
+    ) -> Dict[int, float]:
+        """
+        Exact search restricted to the given memories (e.g. a filtered pre-selection).
+
+        Cost is proportional to the number of IDs, not the index size.
+
+        Returns:
+            Dict mapping memory_id -> cosine similarity, highest first
+        """
+        rows = self._rows_for(memory_ids)
+        if len(rows) == 0 or limit <= 0:
+            return {}
+
+        query = self.normalize(np.ravel(query_embedding))
+        return self._top_k(rows, self._read_rows(rows) @ query, limit)
+
+    def _rows_for(self, memory_ids: Iterable[int]) -> np.ndarray:
+        """Rows of the indexed memories among `memory_ids`."""
+        positions = self._positions
+        return np.fromiter(
+            (positions[memory_id] for memory_id in memory_ids if memory_id in positions),
+            dtype=np.int64,
+        )
+
+    def save(self):
+        """Persist any index state. The flat index is rebuilt from the database."""
+
+    def reset_training(self):
+        """Discard any learned structure. The flat index has none."""
+
+    def clear(self):
+        """Remove all vectors from the index."""
+        self._size = 0
+        self._positions = {}
+        self._allocate(0)
+
+    def _top_k(self, rows: np.ndarray, scores: np.ndarray, limit: int) -> Dict[int, float]:
+        """Select the `limit` highest scores; `rows` maps score positions to matrix rows."""
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        ids = self._ids[rows[top]]
+        return {int(memory_id): float(score) for memory_id, score in zip(ids, scores[top])}
+
+    # Row storage hooks. Subclasses that store extra per-row data or a
+    # different encoding override these rather than the public methods.
+
+    def _allocate(self, capacity: int):
+        """Resize row storage to `capacity`, keeping the first `_size` rows."""
+        ids = np.empty(capacity, dtype=np.int64)
+        matrix = np.empty((capacity, self._code_width()), dtype=self._code_dtype())
+        if self._size:
+            ids[:self._size] = self._ids[:self._size]
+            matrix[:self._size] = self._matrix[:self._size]
+        self._ids = ids
+        self._matrix = matrix
+
+    def _write_rows(self, rows: slice, vectors: np.ndarray):
+        """Store normalized float32 vectors into the given rows."""
+        self._matrix[rows] = vectors
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Return normalized float32 vectors for the given rows."""
+        return self._matrix[rows]
+
+    def _move_row(self, src: int, dst: int):
+        """Copy row `src` over row `dst`."""
+        self._ids[dst] = self._ids[src]
+        self._matrix[dst] = self._matrix[src]
+
+    def _code_width(self) -> int:
+        """Stored values per row."""
+        return self.dimension or 0
+
+    def _code_dtype(self):
+        """Dtype of stored rows."""
+        return np.float32
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index for approximate nearest neighbour search.
+
+    Vectors are clustered around spherical k-means centroids. A query scores
+    the centroids first, then only the rows in the `n_probe` closest lists.
+    Raising `n_probe` trades latency for recall; probing every list is exact.
+    Below `min_train_size` vectors the index falls back to brute force.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        min_train_size: int = 2048,
+        path: Optional[str] = None,
+        initial_capacity: int = 1024,
+    ):
+        """
+        Initialize an empty IVF index.
+
+        Args:
+            dimension: Embedding dimension (inferred from the first vector if None)
+            n_lists: Number of clusters (defaults to ~sqrt(N) at training time)
+            n_probe: Number of clusters scanned per query (recall/latency knob)
+            min_train_size: Minimum vectors before clustering is used
+            path: Optional .npz file for persisting centroids and assignments
+            initial_capacity: Number of rows to preallocate
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.path = path
+        self.centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        super().__init__(dimension, initial_capacity)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def build(self, ids: Iterable[int], vectors: Iterable[np.ndarray], normalized: bool = False):
+        """Replace the index contents, reusing persisted centroids when possible."""
+        super().build(ids, vectors, normalized)
+
+        if self._load_state():
+            if self._size >= 2 * self._trained_size:
+                self.train()
+        elif self._size >= self.min_train_size:
+            self.train()
+
+    def add(self, memory_id: int, embedding: np.ndarray):
+        """Insert or replace a vector, assigning it to its nearest cluster."""
+        super().add(memory_id, embedding)
+        row = self._positions[memory_id]
+
+        if not self.is_trained:
+            if self._size >= self.min_train_size:
+                self.train()
+            return
+
+        self._assignments[row] = int(np.argmax(self.centroids @ self._matrix[row]))
+
+        # Clusters drift as the collection grows; retrain once it has doubled
+        if self._size >= 2 * self._trained_size:
+            self.train()
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        limit: int = 20,
+        n_probe: Optional[int] = None,
+    ) -> Dict[int, float]:
+        """
+        Approximate search over the closest clusters.
+
+        Args:
+            query_embedding: Query vector (need not be normalized)
+            limit: Maximum number of results
+            n_probe: Override the number of clusters to scan
+
+        Returns:
+            Dict mapping memory_id -> cosine similarity, highest first
+        """
+        n_probe = n_probe or self.n_probe
+        if not self.is_trained or n_probe >= len(self.centroids):
+            return self.exact_search(query_embedding, limit)
+
+        if self._size == 0 or limit <= 0:
+            return {}
+
+        query = self.normalize(np.ravel(query_embedding))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        probed = np.zeros(len(self.centroids), dtype=bool)
+        probed[probe] = True
+        rows = np.flatnonzero(probed[self._assignments[:self._size]])
+        if len(rows) == 0:
+            return {}
+
+        return self._top_k(rows, self._matrix[rows] @ query, limit)
+
+    def train(self, n_iter: int = 10, seed: int = 0):
+        """Cluster the current vectors with spherical k-means and persist the result."""
+        if self._size == 0:
+            return
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(self._size)))
+        n_lists = min(n_lists, self._size)
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample; assignment of all rows happens afterwards
+        matrix = self.matrix
+        sample_size = min(self._size, n_lists * 256)
+        sample = matrix[rng.choice(self._size, sample_size, replace=False)]
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            labels = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+
+            # Re-seed empty clusters from random sample rows
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+
+            centroids = self.normalize(sums)
+
+        self.centroids = centroids
+        self._assignments[:self._size] = self._nearest_centroid(matrix, centroids)
+        self._trained_size = self._size
+        self.save()
+
+    def save(self):
+        """Persist centroids and per-memory assignments next to the database."""
+        if not self.path or not self.is_trained:
+            return
+
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            ids=self.ids,
+            assignments=self._assignments[:self._size],
+            trained_size=np.int64(self._trained_size),
+        )
+        Path(tmp_path).replace(self.path)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index arrays, including centroids."""
+        centroid_bytes = self.centroids.nbytes if self.is_trained else 0
+        return super().nbytes + self._assignments.nbytes + centroid_bytes
+
+    def clear(self):
+        """Remove all vectors and forget the clustering."""
+        super().clear()
+        self.centroids = None
+        self._trained_size = 0
+
+    def reset_training(self):
+        """Discard centroids (e.g. after re-embedding with a different model)."""
+        self.centroids = None
+        self._trained_size = 0
+        if self.path:
+            Path(self.path).unlink(missing_ok=True)
+
+    def _load_state(self) -> bool:
+        """Restore persisted centroids. Returns True if they match this index."""
+        if not self.path or not Path(self.path).exists():
+            return False
+
+        try:
+            with np.load(self.path) as state:
+                centroids = state['centroids']
+                saved = dict(zip(state['ids'].tolist(), state['assignments'].tolist()))
+                trained_size = int(state['trained_size'])
+        except (OSError, KeyError, ValueError):
+            return False
+
+        if centroids.ndim != 2 or centroids.shape[1] != self.dimension:
+            return False
+
+        self.centroids = centroids.astype(np.float32)
+        self._trained_size = trained_size
+
+        # Reuse saved assignments; only rows added since the last save are assigned here
+        assignments = np.fromiter(
+            (saved.get(int(memory_id), -1) for memory_id in self.ids),
+            dtype=np.int32,
+            count=self._size,
+        )
+        missing = np.flatnonzero(assignments < 0)
+        if len(missing):
+            assignments[missing] = self._nearest_centroid(self._matrix[missing], self.centroids)
+        self._assignments[:self._size] = assignments
+        return True
+
+    def _allocate(self, capacity: int):
+        """Resize row storage and the aligned cluster assignments together."""
+        assignments = np.zeros(capacity, dtype=np.int32)
+        if self._size:
+            assignments[:self._size] = self._assignments[:self._size]
+        super()._allocate(capacity)
+        self._assignments = assignments
+
+    def _move_row(self, src: int, dst: int):
+        """Copy row `src` over row `dst`, including its cluster assignment."""
+        super()._move_row(src, dst)
+        self._assignments[dst] = self._assignments[src]
+
+    @staticmethod
+    def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Index of the most similar centroid for each row, computed in chunks."""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            labels[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return labels
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Index holding int8 or sign-bit codes instead of float vectors.
+
+    int8 codes take a quarter of the float32 memory, binary codes a
+    thirty-second. Both keep a float32 scale per vector. A query first
+    scores every row on its codes (scaled dot product for int8, Hamming
+    distance for binary), then rescores the best `rescore_multiplier * limit`
+    candidates with exact float vectors from `vector_loader`.
+    """
+
+    MODES = ('int8', 'binary')
+
+    # Sign bits discard magnitude, so binary needs a deeper candidate pool
+    DEFAULT_RESCORE_MULTIPLIERS = {'int8': 4, 'binary': 10}
+
+    def __init__(
+        self,
+        mode: str = "int8",
+        dimension: Optional[int] = None,
+        rescore_multiplier: Optional[int] = None,
+        vector_loader: Optional[VectorLoader] = None,
+        initial_capacity: int = 1024,
+        chunk_size: int = 16384,
+    ):
+        """
+        Initialize an empty quantized index.
+
+        Args:
+            mode: 'int8' (scalar quantization) or 'binary' (sign bits)
+            dimension: Embedding dimension (inferred from the first vector if None)
+            rescore_multiplier: Candidates rescored per requested result
+                (defaults to 4 for int8, 10 for binary)
+            vector_loader: Returns float vectors by memory ID for rescoring
+                (rescoring uses dequantized codes if not set)
+            initial_capacity: Number of rows to preallocate
+            chunk_size: Rows scored at once when computing int8 scores
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown quantization mode '{mode}'. Choose from: {', '.join(self.MODES)}")
+
+        self.mode = mode
+        self.rescore_multiplier = max(1, rescore_multiplier or self.DEFAULT_RESCORE_MULTIPLIERS[mode])
+        self.vector_loader = vector_loader
+        self.chunk_size = chunk_size
+        super().__init__(dimension, initial_capacity)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by ids, codes and scales."""
+        return super().nbytes + self._scales.nbytes
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        limit: int = 20,
+        rescore_multiplier: Optional[int] = None,
+    ) -> Dict[int, float]:
+        """
+        Search on quantized codes, then rescore the top candidates exactly.
+
+        Args:
+            query_embedding: Query vector (need not be normalized)
+            limit: Maximum number of results
+            rescore_multiplier: Override the candidates rescored per result
+
+        Returns:
+            Dict mapping memory_id -> cosine similarity, highest first
+        """
+        if self._size == 0 or limit <= 0:
+            return {}
+
+        query = self.normalize(np.ravel(query_embedding))
+        approx = self._approximate_scores(query)
+
+        n_candidates = min(self._size, limit * (rescore_multiplier or self.rescore_multiplier))
+        if n_candidates < self._size:
+            candidates = np.argpartition(-approx, n_candidates - 1)[:n_candidates]
+        else:
+            candidates = np.arange(self._size)
+
+        return self._rescore(candidates, query, limit)
+
+    def exact_search(self, query_embedding: np.ndarray, limit: int = 20) -> Dict[int, float]:
+        """Rescore every row with float vectors (the float-search reference)."""
+        if self._size == 0 or limit <= 0:
+            return {}
+
+        query = self.normalize(np.ravel(query_embedding))
+        return self._rescore(np.arange(self._size), query, limit)
+
+    def search_subset(
+        self,
+        query_embedding: np.ndarray,
+        memory_ids: Iterable[int],
+        limit: int = 20,
+    ) -> Dict[int, float]:
+        """Search restricted to the given memories: codes first, then float rescoring."""
+        rows = self._rows_for(memory_ids)
+        if len(rows) == 0 or limit <= 0:
+            return {}
+
+        query = self.normalize(np.ravel(query_embedding))
+        n_candidates = limit * self.rescore_multiplier
+        if n_candidates < len(rows):
+            approx = self._approximate_scores(query, rows)
+            rows = rows[np.argpartition(-approx, n_candidates - 1)[:n_candidates]]
+        return self._rescore(rows, query, limit)
+
+    def _approximate_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score the given rows (all rows by default) on their codes; higher is more similar."""
+        if self.mode == 'binary':
+            codes = self.matrix if rows is None else self._matrix[rows]
+            query_bits = np.packbits(query > 0)
+            if codes.shape[1] % 8 == 0:
+                # XOR eight bytes at a time
+                codes, query_bits = codes.view(np.uint64), query_bits.view(np.uint64)
+            differing = np.bitwise_xor(codes, query_bits)
+
+            if hasattr(np, 'bitwise_count'):
+                distances = np.bitwise_count(differing).sum(axis=1, dtype=np.uint32)
+            else:
+                distances = _POPCOUNT[differing.view(np.uint8)].sum(axis=1, dtype=np.uint32)
+            return -distances.astype(np.float32)
+
+        # Asymmetric int8: float query against int8 codes, in bounded chunks
+        count = self._size if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, self.chunk_size):
+            end = min(start + self.chunk_size, count)
+            block = slice(start, end) if rows is None else rows[start:end]
+            scores[start:end] = (self._matrix[block].astype(np.float32) @ query) * self._scales[block]
+        return scores
+
+    def _rescore(self, rows: np.ndarray, query: np.ndarray, limit: int) -> Dict[int, float]:
+        """Exact cosine scores for the given rows, using float vectors where available."""
+        vectors = self._read_rows(rows)
+
+        if self.vector_loader is not None:
+            ids = [int(memory_id) for memory_id in self._ids[rows]]
+            exact = self.vector_loader(ids)
+            for i, memory_id in enumerate(ids):
+                vector = exact.get(memory_id)
+                if vector is not None:
+                    vectors[i] = self.normalize(np.ravel(vector))
+
+        return self._top_k(rows, vectors @ query, limit)
+
+    def _allocate(self, capacity: int):
+        """Resize code storage and the aligned per-vector scales."""
+        scales = np.empty(capacity, dtype=np.float32)
+        if self._size:
+            scales[:self._size] = self._scales[:self._size]
+        super()._allocate(capacity)
+        self._scales = scales
+
+    def _write_rows(self, rows: slice, vectors: np.ndarray):
+        """Quantize normalized vectors into the given rows."""
+        quantize = quantize_int8 if self.mode == 'int8' else quantize_binary
+        codes, scales = quantize(vectors)
+        self._matrix[rows] = codes
+        self._scales[rows] = scales
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Dequantize the given rows back to normalized float32 vectors."""
+        if self.mode == 'int8':
+            vectors = dequantize_int8(self._matrix[rows], self._scales[rows])
+        else:
+            vectors = dequantize_binary(self._matrix[rows], self._scales[rows], self.dimension)
+        return self.normalize(vectors)
+
+    def _move_row(self, src: int, dst: int):
+        """Copy row `src` over row `dst`, including its scale."""
+        super()._move_row(src, dst)
+        self._scales[dst] = self._scales[src]
+
+    def _code_width(self) -> int:
+        """Code bytes per row for the current mode."""
+        dimension = self.dimension or 0
+        return dimension if self.mode == 'int8' else (dimension + 7) // 8
+
+    def _code_dtype(self):
+        """Dtype of stored codes."""
+        return np.int8 if self.mode == 'int8' else np.uint8
+
+
+INDEX_BACKENDS = {
+    'brute': VectorIndex,
+    'ivf': IVFIndex,
+    'int8': QuantizedIndex,
+    'binary': QuantizedIndex,
+}
+
+
+def create_index(backend: str = "brute", path: Optional[str] = None, **options) -> VectorIndex:
+    """
+    Create a vector index by backend name.
+
+    Args:
+        backend: 'brute' (exact), 'ivf' (approximate), or 'int8' / 'binary'
+            (quantized with float rescoring)
+        path: Persistence file for backends that keep trained state
+        **options: Backend-specific options (e.g. n_probe, vector_loader)
+
+    Returns:
+        VectorIndex instance
+    """
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Unknown index backend '{backend}'. Choose from: {', '.join(INDEX_BACKENDS)}")
+
+    if backend == 'ivf':
+        return IVFIndex(path=path, **options)
+    if backend in QuantizedIndex.MODES:
+        return QuantizedIndex(mode=backend, **options)
+    return VectorIndex(**options)
+
+
+def recall_at_k(
+    index: VectorIndex,
+    queries: List[np.ndarray],
+    k: int = 10,
+    reference: Optional[VectorIndex] = None,
+    **search_kwargs,
+) -> float:
+    """
+    Measure recall@k of `index.search` against exact search.
+
+    Args:
+        index: Index under test
+        queries: Query vectors
+        k: Number of results compared per query
+        reference: Index providing the exact results (defaults to
+            `index.exact_search`, i.e. brute force / float rescoring)
+        **search_kwargs: Passed to `index.search` (e.g. n_probe)
+
+    Returns:
+        Mean fraction of the exact top-k found by the index (1.0 is perfect)
+    """
+    reference = reference or index
+    recalls = []
+    for query in queries:
+        exact = set(reference.exact_search(query, k))
+        if not exact:
+            continue
+        approx = set(index.search(query, k, **search_kwargs))
+        recalls.append(len(exact & approx) / len(exact))
+
+    return float(np.mean(recalls)) if recalls else 1.0
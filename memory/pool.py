@@ -0,0 +1,133 @@
+"""
+SQLite connection pool shared by every MemoryDatabase on the same file.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class ConnectionPool:
+    """
+    Tuned SQLite connections for one database file.
+
+    The database runs in WAL mode, so readers never wait for the writer.
+    Read connections are checked out from a bounded pool; writes from all
+    MemoryDatabase instances in the process are serialized on `write_lock`,
+    so they queue in-process instead of spinning on SQLITE_BUSY.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_readers: Optional[int] = None,
+        journal_mode: Optional[str] = None,
+        synchronous: Optional[str] = None,
+        mmap_size: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        busy_timeout: Optional[int] = None,
+    ):
+        """
+        Initialize the pool. Unset options fall back to environment variables.
+
+        Args:
+            db_path: SQLite database file
+            max_readers: Read connections kept open (MEMORY_DB_READERS, default 4)
+            journal_mode: Journal mode (MEMORY_DB_JOURNAL_MODE, default WAL)
+            synchronous: Sync level (MEMORY_DB_SYNCHRONOUS, default NORMAL; safe with WAL)
+            mmap_size: Bytes of the file read via mmap (MEMORY_DB_MMAP_SIZE, default 256 MB)
+            cache_size: Page cache per connection in KiB (MEMORY_DB_CACHE_SIZE, default 64 MB)
+            busy_timeout: Milliseconds to wait on another process's lock
+                (MEMORY_DB_BUSY_TIMEOUT_MS, default 5000)
+        """
+        self.db_path = db_path
+        self.max_readers = max_readers if max_readers is not None else int(os.getenv("MEMORY_DB_READERS", "4"))
+        self.journal_mode = journal_mode or os.getenv("MEMORY_DB_JOURNAL_MODE", "WAL")
+        self.synchronous = synchronous or os.getenv("MEMORY_DB_SYNCHRONOUS", "NORMAL")
+        self.mmap_size = mmap_size if mmap_size is not None else int(os.getenv("MEMORY_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("MEMORY_DB_CACHE_SIZE", "65536"))
+        self.busy_timeout = busy_timeout if busy_timeout is not None else int(os.getenv("MEMORY_DB_BUSY_TIMEOUT_MS", "5000"))
+
+        self.write_lock = threading.RLock()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened_readers = 0
+        self._lock = threading.Lock()
+        self._journal_mode_set = False
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection with the pool's pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+
+        # journal_mode is persistent in the file; switching needs no other connections mid-write
+        with self._lock:
+            if not self._journal_mode_set:
+                conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+                self._journal_mode_set = True
+
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size={-abs(self.cache_size)}")
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout}")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read connection (blocks while all readers are busy)."""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened_readers < self.max_readers
+                if can_open:
+                    self._opened_readers += 1
+            if not can_open:
+                conn = self._readers.get()
+            else:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    with self._lock:
+                        self._opened_readers -= 1
+                    raise
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def close(self):
+        """Close idle read connections."""
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened_readers -= 1
+
+
+# Pools shared by all MemoryDatabase instances, one per database file
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str) -> ConnectionPool:
+    """Get or create the shared pool for a database file."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
@@ -2,35 +2,94 @@
 Hybrid search combining keyword (FTS5) and semantic (vector) search.
 """
 
+import itertools
+import multiprocessing
+import os
 import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
-from .storage import MemoryDatabase
-from .embeddings import get_embedding_service
-from .types import Memory, SearchResult
+from .cache import LRUCache
+from .storage import MemoryDatabase, content_hash, get_memory_database, dedup_hash, embedding_text, filter_clause
+from .embeddings import EMBEDDING_MAGIC, EmbeddingService, get_embedding_service
+from .index import QuantizedIndex, VectorIndex, create_index, recall_at_k
+from .types import Memory, SearchFilters, SearchResult
+from .vector_store import MappedVectorStore
 
 
 class MemoryRetrieval:
     """Hybrid search and retrieval for memories."""
 
-    def __init__(self, database: MemoryDatabase):
+    # Score fusion strategies for hybrid_search:
+    #   linear - min-max normalized BM25 plus raw cosine similarity
+    #   rrf    - reciprocal rank fusion, 1 / (rrf_k + rank) per retriever
+    #   zscore - each retriever's scores standardized over its own hits, squashed to 0-1
+    FUSION_MODES = ('linear', 'rrf', 'zscore')
+
+    # Embedding writes between prunes of an unconsumed embedding_log
+    LOG_PRUNE_INTERVAL = 256
+
+    # How long a search waits for another process's write lock before skipping the vector store
+    STORE_LOCK_TIMEOUT_MS = 100
+
+    def __init__(self, database: MemoryDatabase, index: Optional[VectorIndex] = None):
         """
         Initialize retrieval system.
 
         Args:
             database: MemoryDatabase instance
+            index: Vector index to use (defaults to MEMORY_INDEX_BACKEND, 'brute' or 'ivf')
         """
         self.db = database
         self.embedder = get_embedding_service()
 
+        # Resident embedding index, loaded on first vector search
+        self.index = index if index is not None else self._create_default_index()
+        self._index_loaded = False
+        self._index_seq: Optional[int] = None
+        self._log_pruned_seq = 0
+        # Serializes index (re)loads with index updates from our own writes
+        self._index_mutex = threading.RLock()
+
+        # Memory-mapped copy of the embeddings, shared by every process using the database
+        self.vector_store = self._create_vector_store()
+
+        # MMR trade-off between relevance and variety in hybrid_search results
+        self.diversity_lambda = float(os.getenv("MEMORY_MMR_LAMBDA", "0.7"))
+
+        # Cosine similarity at which a new memory counts as a near-duplicate. Off
+        # by default: short distinct notes ("buy milk", "buy oat milk") score above 0.95
+        self.dedup_threshold = float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0"))
+
+        # How keyword and semantic scores are combined (see FUSION_MODES) and
+        # how many candidates each retriever contributes
+        self.fusion = os.getenv("MEMORY_FUSION", "linear")
+        self.candidate_pool = int(os.getenv("MEMORY_SEARCH_CANDIDATES", "20"))
+        self.rrf_k = int(os.getenv("MEMORY_RRF_K", "60"))
+
+        # Recent hybrid_search results, invalidated by any write to the database
+        self.query_cache = LRUCache(
+            max_entries=int(os.getenv("MEMORY_QUERY_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("MEMORY_QUERY_CACHE_TTL", "300")),
+        )
+
     def hybrid_search(
         self,
         query: str,
         top_k: int = 10,
-        weights: Optional[Dict[str, float]] = None
+        weights: Optional[Dict[str, float]] = None,
+        diversity_lambda: Optional[float] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        fusion: Optional[str] = None,
+        candidates: Optional[int] = None,
+        filters: Optional[SearchFilters] = None
     ) -> List[Memory]:
         """
         Perform hybrid search combining keyword and semantic search.
@@ -39,6 +98,12 @@ class MemoryRetrieval:
             query: Search query
             top_k: Number of results to return
             weights: Score weights (keyword_score, semantic_score, recency, importance)
+            diversity_lambda: MMR relevance/diversity trade-off (defaults to MEMORY_MMR_LAMBDA)
+            query_embedding: Precomputed query embedding (e.g. from EmbeddingWorker)
+            fusion: Score fusion strategy, one of FUSION_MODES (defaults to MEMORY_FUSION)
+            candidates: Results taken from each retriever (defaults to MEMORY_SEARCH_CANDIDATES)
+            filters: Restrict results by type, source, tags, time range or importance;
+                applied inside the FTS query and before vector scoring
 
         Returns:
             List of Memory objects sorted by relevance
@@ -50,45 +115,114 @@ class MemoryRetrieval:
                 'recency': 0.1,
                 'importance': 0.1,
             }
+        fusion = fusion or self.fusion
+        candidates = candidates or self.candidate_pool
+        if filters is not None and filters.is_empty():
+            filters = None
+
+        cache_key = self._query_cache_key(query, top_k, weights, diversity_lambda, fusion, candidates, filters)
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        # Memories passing the filters, selected through the SQL indexes
+        allowed_ids = self.db.filter_memory_ids(filters) if filters is not None else None
+        if allowed_ids is not None and not allowed_ids:
+            self.query_cache.put(cache_key, [])
+            return []
 
         # Get candidates from both search methods
-        keyword_results = self._fts_search(query, limit=20)
-        semantic_results = self._vector_search(query, limit=20)
+        keyword_results = self._fts_search(query, limit=candidates, filters=filters)
+        semantic_results = self._vector_search(
+            query, limit=candidates, query_embedding=query_embedding, allowed_ids=allowed_ids
+        )
 
         # Merge results
-        candidates = self._merge_results(keyword_results, semantic_results)
+        merged = self._merge_results(keyword_results, semantic_results)
 
         # Rerank with multiple factors
-        ranked = self._rerank(candidates, weights)
+        ranked = self._rerank(merged, weights, fusion)
 
         # Diversity filtering (avoid too similar results)
-        diverse = self._diversify_results(ranked, top_k)
+        diverse = self._diversify_results(ranked, top_k, diversity_lambda)
 
         # Return only Memory objects
-        return [result.memory for result in diverse[:top_k]]
+        memories = [result.memory for result in diverse[:top_k]]
+        self.query_cache.put(cache_key, memories)
+        return list(memories)
 
-    def _fts_search(self, query: str, limit: int = 20) -> Dict[int, float]:
+    def _query_cache_key(
+        self,
+        query: str,
+        top_k: int,
+        weights: Dict[str, float],
+        diversity_lambda: Optional[float],
+        fusion: str = 'linear',
+        candidates: int = 20,
+        filters: Optional[SearchFilters] = None
+    ) -> Tuple:
+        """
+        Build the query cache key.
+
+        The write generation covers writes through this database instance and
+        data_version covers commits from other connections, so any write makes
+        older entries unreachable.
+        """
+        normalized = " ".join(query.lower().split())
+        return (
+            normalized,
+            top_k,
+            tuple(sorted(weights.items())),
+            self.diversity_lambda if diversity_lambda is None else diversity_lambda,
+            fusion,
+            candidates,
+            filters.cache_key() if filters is not None else None,
+            self.db.write_generation,
+            self.db.get_data_version(),
+        )
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Get hit/miss counters of the query result cache."""
+        return self.query_cache.stats()
+
+    def _fts_search(
+        self,
+        query: str,
+        limit: int = 20,
+        filters: Optional[SearchFilters] = None
+    ) -> Dict[int, float]:
         """
         Perform FTS5 keyword search.
 
         Returns:
             Dict mapping memory_id -> BM25 score
         """
-        cursor = self.db.conn.cursor()
-
         # Escape FTS5 special characters and prepare query
         # FTS5 uses BM25 ranking by default
         try:
-            cursor.execute("""
-                SELECT rowid, rank
-                FROM memories_fts
-                WHERE memories_fts MATCH ?
-                ORDER BY rank
-                LIMIT ?
-            """, (query, limit))
+            with self.db.reader() as conn:
+                if filters is None:
+                    rows = conn.execute("""
+                        SELECT rowid, rank
+                        FROM memories_fts
+                        WHERE memories_fts MATCH ?
+                        ORDER BY rank
+                        LIMIT ?
+                    """, (query, limit)).fetchall()
+                else:
+                    # Filter before LIMIT so filtered-out matches don't use up the candidates
+                    condition, params = filter_clause(filters)
+                    rows = conn.execute(f"""
+                        SELECT rowid, rank
+                        FROM memories_fts
+                        WHERE memories_fts MATCH ?
+                          AND rowid IN (SELECT m.id FROM memories m WHERE {condition})
+                        ORDER BY rank
+                        LIMIT ?
+                    """, (query, *params, limit)).fetchall()
 
             results = {}
-            for row in cursor.fetchall():
+            for row in rows:
                 memory_id = row[0]
                 rank = row[1]  # BM25 rank (negative, closer to 0 is better)
                 # Convert rank to positive score (negate and normalize)
@@ -101,42 +235,302 @@ class MemoryRetrieval:
             # Query might have FTS5 syntax issues, fall back to simple search
             return {}
 
-    def _vector_search(self, query: str, limit: int = 20) -> Dict[int, float]:
+    def _vector_search(
+        self,
+        query: str,
+        limit: int = 20,
+        query_embedding: Optional[np.ndarray] = None,
+        allowed_ids: Optional[List[int]] = None
+    ) -> Dict[int, float]:
         """
         Perform vector similarity search.
 
+        Args:
+            allowed_ids: Only score these memories (filtered search)
+
         Returns:
             Dict mapping memory_id -> cosine similarity score
         """
         # Generate query embedding
-        query_embedding = self.embedder.embed_text(query)
+        if query_embedding is None:
+            query_embedding = self.embedder.embed_text(query)
 
-        # Get all memories with embeddings
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
-            SELECT e.memory_id, e.embedding
-            FROM embeddings e
-            INNER JOIN memories m ON e.memory_id = m.id
-        """)
+        self._ensure_index()
+        return self._search_index(query_embedding, limit, allowed_ids)
 
-        # Calculate similarities
-        similarities = []
-        for row in cursor.fetchall():
-            memory_id = row[0]
-            embedding_blob = row[1]
+    def _search_index(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        allowed_ids: Optional[List[int]] = None
+    ) -> Dict[int, float]:
+        """Search the resident index; holds the index mutex so writes can't change it mid-search."""
+        with self._index_mutex:
+            if allowed_ids is not None:
+                return self.index.search_subset(query_embedding, allowed_ids, limit=limit)
+            return self.index.search(query_embedding, limit=limit)
+
+    def _create_default_index(self) -> VectorIndex:
+        """Create the vector index selected by environment variables."""
+        backend = os.getenv("MEMORY_INDEX_BACKEND", "brute")
+        if backend in QuantizedIndex.MODES:
+            # Quantized codes stay resident; float vectors are read back for rescoring
+            rescore_multiplier = os.getenv("MEMORY_RESCORE_MULTIPLIER")
+            return create_index(
+                backend,
+                vector_loader=self._fetch_embeddings,
+                rescore_multiplier=int(rescore_multiplier) if rescore_multiplier else None,
+            )
+        if backend != "ivf":
+            return create_index(backend)
+
+        # IVF centroids are persisted next to the database file
+        path = None if self.db.db_path == ":memory:" else f"{self.db.db_path}.ivf.npz"
+        return create_index(
+            "ivf",
+            path=path,
+            n_probe=int(os.getenv("MEMORY_IVF_NPROBE", "8")),
+        )
 
-            # Deserialize embedding
-            memory_embedding = self.embedder.deserialize_embedding(embedding_blob)
+    def _create_vector_store(self) -> Optional[MappedVectorStore]:
+        """Create the on-disk vector store unless disabled or the database is in-memory."""
+        if self.db.db_path == ":memory:" or os.getenv("MEMORY_VECTOR_STORE", "on") == "off":
+            return None
+        return MappedVectorStore(f"{self.db.db_path}.vectors")
+
+    def _ensure_index(self):
+        """Load the vector index, reloading if embeddings changed since it was built."""
+        # The sequence advances on every embedding write from any connection;
+        # our own writes keep the index and sequence in step (see add_memory_with_embedding).
+        with self._index_mutex:
+            if self._index_loaded and self.db.get_embedding_sequence() == self._index_seq:
+                if self._index_seq - self._log_pruned_seq >= self.LOG_PRUNE_INTERVAL:
+                    self._prune_embedding_log()
+                return
+
+            self._load_index()
+            self._prune_embedding_log()
+
+    def _prune_embedding_log(self):
+        """
+        Drop change log entries the index has applied when no vector store reads them.
 
-            # Calculate cosine similarity
-            similarity = self.embedder.cosine_similarity(query_embedding, memory_embedding)
-            similarities.append((memory_id, similarity))
+        The log only feeds the on-disk vector store's catch-up. Without a store
+        file (disabled, or an in-memory database) nothing else consumes it, so
+        it would otherwise grow by one row per embedding write forever. A store
+        created later starts with a full rewrite, not from the log.
+        """
+        if self.vector_store is not None or not self._index_loaded:
+            return
+        if self.db.db_path != ":memory:" and os.path.exists(f"{self.db.db_path}.vectors"):
+            # Another process keeps a vector store for this database
+            return
+        self.db.prune_embedding_log(self._index_seq)
+        self._log_pruned_seq = self._index_seq
+
+    def _load_index(self):
+        """Load all stored embeddings into the resident index."""
+        if self.vector_store is not None and self._load_from_store():
+            return
+
+        # Read everything in one transaction so the rows match the sequence
+        with self.db.reader() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            try:
+                sequence = self.db.get_embedding_sequence(conn)
+                rows = conn.execute("""
+                    SELECT e.memory_id, e.embedding
+                    FROM embeddings e
+                    INNER JOIN memories m ON e.memory_id = m.id
+                """).fetchall()
+            finally:
+                conn.commit()
+
+        ids = []
+        vectors = []
+        legacy = []
+        for memory_id, embedding_blob in rows:
+            embedding = self.embedder.deserialize_embedding(embedding_blob)
+            ids.append(memory_id)
+            vectors.append(embedding)
+            if self.embedder.is_legacy_blob(embedding_blob):
+                legacy.append((memory_id, embedding))
+
+        self.index.build(ids, vectors)
+        self._index_loaded = True
+        self._index_seq = sequence
+
+        if self.vector_store is None:
+            # One-shot conversion of pickled rows, reusing the vectors just decoded
+            if legacy:
+                self._rewrite_embeddings(legacy)
+            return
+
+        if not ids:
+            # Nothing to persist yet (and no dimension to write a header with)
+            return
+
+        with self._store_lock() as locked:
+            # Skip if embeddings changed since the scan; the next load writes the store
+            if not locked or self.db.get_embedding_sequence(self.db.conn) != sequence:
+                return
+            if legacy:
+                self._rewrite_embeddings(legacy, commit=False)
+                sequence = self._index_seq = self.db.get_embedding_sequence(self.db.conn)
+            self._write_store(lambda: self.vector_store.rewrite(ids, vectors, sequence), sequence)
+
+    def _load_from_store(self) -> bool:
+        """
+        Build the index from the memory-mapped vector store, catching it up first.
 
-        # Sort by similarity and take top results
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        top_results = similarities[:limit]
+        Returns:
+            False if the store can't be used and the database must be scanned
+        """
+        sequence = self.db.get_embedding_sequence()
+        header = self.vector_store.read_header()
+
+        if header is None or header.sequence != sequence:
+            with self._store_lock() as locked:
+                if not locked:
+                    return False
+                sequence = self.db.get_embedding_sequence(self.db.conn)
+                header = self.vector_store.read_header()
+                if header is None or header.sequence > sequence:
+                    return False
+                if header.sequence < sequence:
+                    changed = self.db.get_embedding_changes(header.sequence, self.db.conn)
+                    upserts = self._fetch_embeddings(changed)
+                    deletes = [memory_id for memory_id in changed if memory_id not in upserts]
+                    if not self._write_store(
+                        lambda: self.vector_store.apply(upserts, deletes, sequence),
+                        sequence,
+                    ):
+                        return False
+
+        snapshot = self.vector_store.read()
+        if snapshot is None or snapshot.sequence != sequence:
+            return False
+
+        self.index.build(snapshot.ids, snapshot.vectors, normalized=True)
+        self._index_loaded = True
+        self._index_seq = sequence
+        return True
+
+    @contextmanager
+    def _store_lock(self):
+        """
+        Hold the database write lock while the vector store is updated.
 
-        return {memory_id: score for memory_id, score in top_results}
+        Yields False if another process still holds the lock after
+        STORE_LOCK_TIMEOUT_MS (this runs on the search path, so it doesn't wait
+        the full busy timeout); callers then fall back to reading SQLite
+        without touching the store. The transaction commits only if the block
+        succeeds.
+        """
+        conn = self.db.conn
+        with self.db.write_lock:
+            if conn.in_transaction:
+                conn.commit()
+            busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+            conn.execute(f"PRAGMA busy_timeout={self.STORE_LOCK_TIMEOUT_MS}")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                locked = True
+            except sqlite3.OperationalError:
+                locked = False
+            finally:
+                conn.execute(f"PRAGMA busy_timeout={busy_timeout}")
+            if not locked:
+                yield False
+                return
+            try:
+                yield True
+            except BaseException:
+                conn.rollback()
+                raise
+            if conn.in_transaction:
+                conn.commit()
+
+    def _write_store(self, write, sequence: int) -> bool:
+        """Run a vector store write and drop the change log entries it covers."""
+        try:
+            if write() is False:
+                return False
+        except OSError as e:
+            print(f"Warning: Could not write vector store: {e}")
+            return False
+        self.db.conn.execute("DELETE FROM embedding_log WHERE seq <= ?", (sequence,))
+        return True
+
+    def _fetch_embeddings(self, memory_ids: List[int]) -> Dict[int, np.ndarray]:
+        """Read stored embeddings for the given memory IDs."""
+        return {
+            memory_id: self.embedder.deserialize_embedding(blob)
+            for memory_id, blob in self.db.get_embeddings(memory_ids).items()
+        }
+
+    def measure_recall(self, queries: List[str], k: int = 10) -> Dict[str, float]:
+        """
+        Compare the configured index against exact float search.
+
+        Args:
+            queries: Sample query texts
+            k: Number of results compared per query
+
+        Returns:
+            Dict with recall@k and the memory footprint of both indexes
+        """
+        self._ensure_index()
+
+        stored = self._fetch_embeddings(self.index.ids.tolist())
+        reference = VectorIndex()
+        reference.build(stored.keys(), stored.values())
+        query_embeddings = self.embedder.embed_batch(queries)
+
+        return {
+            f'recall@{k}': recall_at_k(self.index, query_embeddings, k, reference=reference),
+            'index_bytes': self.index.nbytes,
+            'float_index_bytes': reference.nbytes,
+        }
+
+    def migrate_embedding_format(self, batch_size: int = 500) -> int:
+        """
+        Convert legacy pickled embeddings to the binary format.
+
+        Returns:
+            Number of rows converted
+        """
+        converted = 0
+        while True:
+            # Converted rows stop matching, so each pass picks up the next batch
+            with self.db.reader() as conn:
+                rows = conn.execute(
+                    "SELECT memory_id, embedding FROM embeddings WHERE substr(embedding, 1, 3) != ? LIMIT ?",
+                    (EMBEDDING_MAGIC, batch_size)
+                ).fetchall()
+            if not rows:
+                break
+            self._rewrite_embeddings([
+                (memory_id, self.embedder.deserialize_embedding(blob))
+                for memory_id, blob in rows
+            ])
+            converted += len(rows)
+
+        return converted
+
+    def _rewrite_embeddings(self, embeddings: List[Tuple[int, np.ndarray]], commit: bool = True):
+        """Re-serialize existing embedding rows in the current format."""
+        with self.db.write_lock:
+            self.db.conn.executemany(
+                "UPDATE embeddings SET embedding = ? WHERE memory_id = ?",
+                [
+                    (self.embedder.serialize_embedding(embedding), memory_id)
+                    for memory_id, embedding in embeddings
+                ]
+            )
+            if commit:
+                self.db.conn.commit()
 
     def _merge_results(
         self,
@@ -152,9 +546,22 @@ class MemoryRetrieval:
         # Get all unique memory IDs
         all_ids = set(keyword_results.keys()) | set(semantic_results.keys())
 
+        return self._build_candidates(keyword_results, semantic_results, self.db.get_memories(all_ids))
+
+    @staticmethod
+    def _build_candidates(
+        keyword_results: Dict[int, float],
+        semantic_results: Dict[int, float],
+        memories: Dict[int, Memory]
+    ) -> List[SearchResult]:
+        """Pair fetched memories with their keyword and semantic scores and ranks."""
+        all_ids = set(keyword_results.keys()) | set(semantic_results.keys())
+        keyword_ranks = MemoryRetrieval._ranks(keyword_results)
+        semantic_ranks = MemoryRetrieval._ranks(semantic_results)
+
         candidates = []
         for memory_id in all_ids:
-            memory = self.db.get_memory(memory_id)
+            memory = memories.get(memory_id)
             if not memory:
                 continue
 
@@ -166,15 +573,24 @@ class MemoryRetrieval:
                 memory=memory,
                 keyword_score=keyword_score,
                 semantic_score=semantic_score,
+                keyword_rank=keyword_ranks.get(memory_id),
+                semantic_rank=semantic_ranks.get(memory_id),
             )
             candidates.append(result)
 
         return candidates
 
+    @staticmethod
+    def _ranks(results: Dict[int, float]) -> Dict[int, int]:
+        """1-based rank of each ID by descending score."""
+        ordered = sorted(results.items(), key=lambda item: -item[1])
+        return {memory_id: rank for rank, (memory_id, _) in enumerate(ordered, 1)}
+
     def _rerank(
         self,
         candidates: List[SearchResult],
-        weights: Dict[str, float]
+        weights: Dict[str, float],
+        fusion: Optional[str] = None
     ) -> List[SearchResult]:
         """
         Rerank candidates using multiple factors.
@@ -182,6 +598,7 @@ class MemoryRetrieval:
         Args:
             candidates: List of SearchResult objects
             weights: Score weights for different factors
+            fusion: How keyword and semantic scores are made comparable (see FUSION_MODES)
 
         Returns:
             Sorted list of SearchResult objects
@@ -189,63 +606,95 @@ class MemoryRetrieval:
         if not candidates:
             return []
 
-        # Normalize keyword scores (0-1 range)
-        keyword_scores = [c.keyword_score for c in candidates]
-        keyword_min = min(keyword_scores) if keyword_scores else 0
-        keyword_max = max(keyword_scores) if keyword_scores else 1
-        keyword_range = keyword_max - keyword_min if keyword_max != keyword_min else 1
+        keyword, semantic = self._fuse_scores(candidates, fusion or self.fusion)
 
-        # Normalize semantic scores (already 0-1 from cosine similarity)
-        semantic_scores = [c.semantic_score for c in candidates]
-
-        # Calculate recency scores (more recent = higher score)
+        # Recency score: exponential decay over 30 days (0 without a timestamp)
         now = datetime.now()
-        for candidate in candidates:
-            # Normalize keyword score
-            if keyword_range > 0:
-                candidate.keyword_score = (candidate.keyword_score - keyword_min) / keyword_range
-            else:
-                candidate.keyword_score = 0.0
-
-            # Semantic score already normalized (0-1)
-
-            # Recency score (exponential decay)
-            if candidate.memory.timestamp:
-                age_days = (now - candidate.memory.timestamp).total_seconds() / (24 * 3600)
-                # Decay over 30 days
-                candidate.recency_score = np.exp(-age_days / 30)
-            else:
-                candidate.recency_score = 0.0
-
-            # Importance score (already 0-1)
-            candidate.importance_score = candidate.memory.importance_score
-
-            # Calculate final weighted score
-            candidate.final_score = (
-                weights.get('keyword_score', 0.3) * candidate.keyword_score +
-                weights.get('semantic_score', 0.5) * candidate.semantic_score +
-                weights.get('recency', 0.1) * candidate.recency_score +
-                weights.get('importance', 0.1) * candidate.importance_score
-            )
+        age_days = np.array([
+            (now - c.memory.timestamp).total_seconds() / (24 * 3600) if c.memory.timestamp else np.inf
+            for c in candidates
+        ])
+        recency = np.exp(-age_days / 30)
+
+        # Importance score (already 0-1)
+        importance = np.array([c.memory.importance_score for c in candidates], dtype=np.float64)
+
+        final = (
+            weights.get('keyword_score', 0.3) * keyword +
+            weights.get('semantic_score', 0.5) * semantic +
+            weights.get('recency', 0.1) * recency +
+            weights.get('importance', 0.1) * importance
+        )
 
-        # Sort by final score
-        candidates.sort(key=lambda x: x.final_score, reverse=True)
+        for i, candidate in enumerate(candidates):
+            candidate.keyword_score = float(keyword[i])
+            candidate.semantic_score = float(semantic[i])
+            candidate.recency_score = float(recency[i])
+            candidate.importance_score = float(importance[i])
+            candidate.final_score = float(final[i])
 
-        return candidates
+        # Sort by final score (stable, so ties keep merge order)
+        order = np.argsort(-final, kind='stable')
+        return [candidates[i] for i in order]
+
+    def _fuse_scores(self, candidates: List[SearchResult], fusion: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map raw keyword and semantic scores to comparable 0-1 components.
+
+        Returns:
+            (keyword, semantic) arrays aligned with candidates
+        """
+        keyword = np.array([c.keyword_score for c in candidates], dtype=np.float64)
+        semantic = np.array([c.semantic_score for c in candidates], dtype=np.float64)
+
+        if fusion == 'linear':
+            # Normalize keyword scores (0-1 range)
+            keyword_range = keyword.max() - keyword.min()
+            keyword = (keyword - keyword.min()) / keyword_range if keyword_range > 0 else np.zeros_like(keyword)
+
+            # Semantic scores are already 0-1 from cosine similarity
+            return keyword, semantic
+
+        keyword_ranks = np.array([c.keyword_rank or 0 for c in candidates], dtype=np.float64)
+        semantic_ranks = np.array([c.semantic_rank or 0 for c in candidates], dtype=np.float64)
+
+        if fusion == 'rrf':
+            # Scaled so a retriever's top hit scores 1; absent candidates score 0
+            def rrf(ranks):
+                return np.where(ranks > 0, (self.rrf_k + 1) / (self.rrf_k + ranks), 0.0)
+            return rrf(keyword_ranks), rrf(semantic_ranks)
+
+        if fusion == 'zscore':
+            # Standardize over each retriever's own hits; absent candidates score 0
+            def calibrated(scores, present):
+                out = np.zeros_like(scores)
+                if present.any():
+                    hits = scores[present]
+                    std = hits.std()
+                    z = (hits - hits.mean()) / std if std > 0 else np.zeros_like(hits)
+                    out[present] = 1 / (1 + np.exp(-z))
+                return out
+            return calibrated(keyword, keyword_ranks > 0), calibrated(semantic, semantic_ranks > 0)
+
+        raise ValueError(f"Unknown fusion mode '{fusion}' (expected one of {', '.join(self.FUSION_MODES)})")
 
     def _diversify_results(
         self,
         results: List[SearchResult],
         top_k: int,
-        similarity_threshold: float = 0.95
+        diversity_lambda: Optional[float] = None
     ) -> List[SearchResult]:
         """
-        Apply diversity filtering to avoid redundant results.
+        Select results with Maximal Marginal Relevance (MMR).
+
+        Each pick maximizes `lambda * relevance - (1 - lambda) * similarity`
+        to the closest result already picked.
 
         Args:
             results: Sorted search results
             top_k: Number of results to return
-            similarity_threshold: Minimum similarity to consider results redundant
+            diversity_lambda: Relevance/diversity trade-off; 1.0 ranks purely by
+                relevance, lower values favour variety (defaults to self.diversity_lambda)
 
         Returns:
             Diversified list of results
@@ -253,47 +702,56 @@ class MemoryRetrieval:
         if not results:
             return []
 
-        # Get embeddings for all results
-        cursor = self.db.conn.cursor()
-        embeddings_map = {}
+        embeddings_map = self._fetch_embeddings([result.memory.id for result in results])
+        return self._select_diverse(results, embeddings_map, top_k, diversity_lambda)
 
-        for result in results:
-            cursor.execute(
-                "SELECT embedding FROM embeddings WHERE memory_id = ?",
-                (result.memory.id,)
-            )
-            row = cursor.fetchone()
-            if row:
-                embeddings_map[result.memory.id] = self.embedder.deserialize_embedding(row[0])
-
-        # Select diverse results
-        diverse = []
-        for result in results:
-            if len(diverse) >= top_k:
-                break
-
-            # Check if too similar to already selected results
-            is_redundant = False
-            result_emb = embeddings_map.get(result.memory.id)
-
-            if result_emb is not None:
-                for selected in diverse:
-                    selected_emb = embeddings_map.get(selected.memory.id)
-                    if selected_emb is not None:
-                        similarity = self.embedder.cosine_similarity(result_emb, selected_emb)
-                        if similarity > similarity_threshold:
-                            is_redundant = True
-                            break
-
-            if not is_redundant:
-                diverse.append(result)
+    def _select_diverse(
+        self,
+        results: List[SearchResult],
+        embeddings_map: Dict[int, np.ndarray],
+        top_k: int,
+        diversity_lambda: Optional[float] = None
+    ) -> List[SearchResult]:
+        """Greedy MMR selection over already-fetched embeddings (see _diversify_results)."""
+        if not results:
+            return []
 
-        return diverse
+        if diversity_lambda is None:
+            diversity_lambda = self.diversity_lambda
+
+        # Results without an embedding never count as similar
+        dimension = next((len(e) for e in embeddings_map.values()), 0)
+        vectors = np.zeros((len(results), dimension), dtype=np.float32)
+        for i, result in enumerate(results):
+            embedding = embeddings_map.get(result.memory.id)
+            if embedding is not None:
+                vectors[i] = embedding
+        vectors = VectorIndex.normalize(vectors)
+        similarity = vectors @ vectors.T
+
+        relevance = np.array([result.final_score for result in results], dtype=np.float64)
+        closest = np.zeros(len(results))  # Max similarity to anything selected so far
+        available = np.ones(len(results), dtype=bool)
+
+        selected = []
+        for _ in range(min(top_k, len(results))):
+            mmr = diversity_lambda * relevance - (1 - diversity_lambda) * closest
+            mmr[~available] = -np.inf
+            pick = int(np.argmax(mmr))
+            selected.append(results[pick])
+            available[pick] = False
+            np.maximum(closest, similarity[:, pick], out=closest)
+
+        return selected
 
     def update_access_stats(self, memory_ids: List[int]):
-        """Update access statistics for retrieved memories."""
+        """Update access statistics for retrieved memories (one transaction)."""
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        updates = {}
         for memory_id in memory_ids:
-            self.db.update_access_stats(memory_id)
+            count, _ = updates.get(memory_id, (0, now))
+            updates[memory_id] = (count + 1, now)
+        self.db.apply_access_stats(updates)
 
     def add_memory_with_embedding(
         self,
@@ -307,76 +765,393 @@ class MemoryRetrieval:
         """
         Add a memory and generate its embedding.
 
+        Duplicates are not stored again (see add_memory_if_new).
+
+        Returns:
+            Memory ID (of the existing memory for duplicates)
+        """
+        memory_id, _ = self.add_memory_if_new(
+            content, memory_type, title, metadata, source_type, source_id
+        )
+        return memory_id
+
+    def add_memory_if_new(
+        self,
+        content: str,
+        memory_type: str = "note",
+        title: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        source_type: str = "manual",
+        source_id: Optional[str] = None,
+    ) -> Tuple[int, bool]:
+        """
+        Add a memory and generate its embedding, unless it is a duplicate.
+
+        Exact duplicates (same normalized title and content) are never stored
+        again. Near-duplicates (embedding similarity >= dedup_threshold) are
+        skipped only when MEMORY_DEDUP_THRESHOLD is set.
+
         Returns:
-            Memory ID
-        """
-        # Add to database
-        memory_id = self.db.add_memory(
-            content=content,
-            memory_type=memory_type,
-            title=title,
-            metadata=metadata,
-            source_type=source_type,
-            source_id=source_id,
+            Memory ID (of the existing memory for duplicates), and whether it was stored
+        """
+        existing = self.db.find_duplicate(title, content)
+        if existing is not None:
+            return existing, False
+
+        # Generate embedding
+        text = embedding_text(title, content)
+        embedding = self.embedder.embed_text(text)
+
+        existing = self.find_near_duplicate(embedding)
+        if existing is not None:
+            return existing, False
+
+        # Add the memory and its embedding in one transaction
+        ids, inserted, sequence = self.db.add_memories(
+            [{
+                'content': content,
+                'memory_type': memory_type,
+                'title': title,
+                'metadata': metadata,
+                'source_type': source_type,
+                'source_id': source_id,
+            }],
+            [self.embedder.serialize_embedding(embedding)],
+            self.embedder.model_name,
         )
+        memory_id = ids[0]
+        if not inserted[0]:
+            # A concurrent insert of the same text won
+            return memory_id, False
 
-        # Generate and store embedding
-        embedding_text = f"{title or ''} {content}".strip()
-        embedding = self.embedder.embed_text(embedding_text)
-        serialized = self.embedder.serialize_embedding(embedding)
+        self._apply_own_writes([(memory_id, embedding)], [], sequence, 1)
+        return memory_id, True
 
-        # Store in database
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
-            INSERT INTO embeddings (memory_id, embedding, model_version)
-            VALUES (?, ?, ?)
-        """, (memory_id, serialized, self.embedder.model_name))
-        self.db.conn.commit()
+    def _apply_own_writes(
+        self,
+        added: List[Tuple[int, np.ndarray]],
+        removed: List[int],
+        sequence: Optional[int],
+        writes: int,
+    ):
+        """
+        Apply this instance's embedding writes to the resident index.
 
-        return memory_id
+        Args:
+            added: (memory_id, embedding) pairs that were inserted
+            removed: Memory IDs that were deleted
+            sequence: Embedding log sequence after the writes
+            writes: Log entries the writes produced
+        """
+        with self._index_mutex:
+            for memory_id in removed:
+                self.index.remove(memory_id)
+            if not self._index_loaded:
+                return
+            for memory_id, embedding in added:
+                self.index.add(memory_id, embedding)
+            # Only our own writes happened since the index was loaded; stay in sync
+            if sequence is not None and sequence == self._index_seq + writes:
+                self._index_seq = sequence
+
+    def find_near_duplicate(self, embedding: np.ndarray) -> Optional[int]:
+        """
+        Find a stored memory whose embedding is at least dedup_threshold similar.
 
-    def rebuild_embeddings(self, batch_size: int = 10):
+        Returns:
+            Memory ID, or None if there is none (or the check is disabled)
         """
-        Rebuild all embeddings from scratch.
+        if self.dedup_threshold <= 0:
+            return None
+
+        self._ensure_index()
+        for memory_id, score in self._search_index(embedding, limit=1).items():
+            if score >= self.dedup_threshold:
+                return memory_id
+        return None
 
-        Useful after changing embedding model or fixing corrupted embeddings.
+    def add_memories_bulk(
+        self,
+        records: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        verbose: bool = True,
+    ) -> Dict[str, Any]:
         """
-        # Get all memories
-        memories = self.db.get_all_memories()
+        Add many memories with embeddings, streaming the input.
+
+        Records are consumed `chunk_size` at a time; each chunk is embedded in
+        `batch_size` model calls and written in one transaction, so a large
+        import costs one commit per chunk instead of two per memory. Exact
+        duplicates are skipped before embedding, so re-running an import adds
+        nothing. With dedup_threshold set, near-duplicates are skipped before
+        writing too, both of stored memories and of earlier records in the
+        same chunk (near-duplicates in different chunks are caught once the
+        earlier chunk is stored).
 
-        print(f"Rebuilding embeddings for {len(memories)} memories...")
+        Args:
+            records: Dicts accepted by MemoryDatabase.add_memories (`content` required)
+            batch_size: Texts per embed_batch call (defaults to MEMORY_BULK_BATCH_SIZE or 64)
+            chunk_size: Records per transaction (defaults to MEMORY_BULK_CHUNK_SIZE or 500)
+            verbose: Print progress and a throughput summary
 
-        # Process in batches
-        for i in range(0, len(memories), batch_size):
-            batch = memories[i:i + batch_size]
+        Returns:
+            Report with `inserted`, `duplicates`, `memory_ids` (existing IDs for
+            duplicates), `seconds`, `embed_seconds`, `write_seconds` and `per_second`
+        """
+        if batch_size is None:
+            batch_size = int(os.getenv("MEMORY_BULK_BATCH_SIZE", "64"))
+        if chunk_size is None:
+            chunk_size = int(os.getenv("MEMORY_BULK_CHUNK_SIZE", "500"))
+
+        memory_ids: List[int] = []
+        inserted = 0
+        embed_seconds = 0.0
+        write_seconds = 0.0
+        start = time.perf_counter()
+
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
 
-            # Prepare texts
-            texts = []
-            memory_ids = []
-            for memory in batch:
-                text = f"{memory.title or ''} {memory.content}".strip()
-                texts.append(text)
-                memory_ids.append(memory.id)
+            # Skip exact duplicates before paying for their embeddings
+            digests = [dedup_hash(record.get('title'), record['content']) for record in chunk]
+            known = self.db.find_by_hash(digests)
+            chunk_ids = [known.get(digest) for digest in digests]
+            pending = [i for i, memory_id in enumerate(chunk_ids) if memory_id is None]
 
             # Generate embeddings
-            embeddings = self.embedder.embed_batch(texts)
+            embed_start = time.perf_counter()
+            texts = [embedding_text(chunk[i].get('title'), chunk[i]['content']) for i in pending]
+            embeddings = []
+            for i in range(0, len(texts), batch_size):
+                embeddings.extend(self.embedder.embed_batch(texts[i:i + batch_size]))
+            embed_seconds += time.perf_counter() - embed_start
+
+            # Near-duplicates of stored memories, or of records earlier in the chunk, are skipped too
+            fresh = []
+            accepted: List[np.ndarray] = []
+            duplicate_of: Dict[int, int] = {}
+            for i, embedding in zip(pending, embeddings):
+                chunk_ids[i] = self.find_near_duplicate(embedding)
+                if chunk_ids[i] is not None:
+                    continue
+                if self.dedup_threshold > 0:
+                    vector = VectorIndex.normalize(np.ravel(embedding))
+                    if accepted:
+                        scores = np.stack(accepted) @ vector
+                        best = int(np.argmax(scores))
+                        if scores[best] >= self.dedup_threshold:
+                            duplicate_of[i] = best
+                            continue
+                    accepted.append(vector)
+                fresh.append((i, embedding))
+
+            # Store the chunk in one transaction
+            write_start = time.perf_counter()
+            fresh_ids, created, sequence = self.db.add_memories(
+                [chunk[i] for i, _ in fresh],
+                [self.embedder.serialize_embedding(embedding) for _, embedding in fresh],
+                self.embedder.model_name,
+            )
+            write_seconds += time.perf_counter() - write_start
+            for (i, _), memory_id in zip(fresh, fresh_ids):
+                chunk_ids[i] = memory_id
+            for i, position in duplicate_of.items():
+                chunk_ids[i] = fresh_ids[position]
+            memory_ids.extend(chunk_ids)
+            inserted += sum(created)
+
+            self._apply_own_writes(
+                [
+                    (memory_id, embedding)
+                    for (_, embedding), memory_id, is_new in zip(fresh, fresh_ids, created)
+                    if is_new
+                ],
+                [],
+                sequence,
+                sum(created),
+            )
+
+            if verbose:
+                print(f"  Ingested {inserted} memories ({len(memory_ids) - inserted} duplicates skipped)")
+
+        seconds = time.perf_counter() - start
+        report = {
+            'inserted': inserted,
+            'duplicates': len(memory_ids) - inserted,
+            'memory_ids': memory_ids,
+            'seconds': round(seconds, 3),
+            'embed_seconds': round(embed_seconds, 3),
+            'write_seconds': round(write_seconds, 3),
+            'per_second': round(len(memory_ids) / seconds, 1) if seconds > 0 else 0.0,
+        }
+        if verbose and memory_ids:
+            print(
+                f"Bulk ingest: {report['inserted']} memories ({report['duplicates']} duplicates) "
+                f"in {report['seconds']}s ({report['per_second']}/s; embedding "
+                f"{report['embed_seconds']}s, writing {report['write_seconds']}s)"
+            )
+        return report
+
+    def delete_memory(self, memory_id: int) -> bool:
+        """
+        Delete a memory, its embedding and its index entry.
+
+        Returns:
+            True if the memory existed
+        """
+        deleted, sequence = self.db.delete_memory_with_embedding(memory_id)
+        self._apply_own_writes([], [memory_id], sequence, 1)
+        return deleted
+
+    def rebuild_embeddings(
+        self,
+        batch_size: Optional[int] = None,
+        full: bool = False,
+        workers: Optional[int] = None,
+        resume: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Embed memories whose embedding is missing or stale.
+
+        An embedding is stale when it was produced by another model or from
+        text that has since changed (content hash mismatch). Memories are
+        scanned in ID order with keyset pagination, and each batch is written
+        in one transaction together with a checkpoint, so an interrupted
+        rebuild resumes where it stopped.
+
+        Args:
+            batch_size: Memories embedded per batch (defaults to MEMORY_REBUILD_BATCH_SIZE or 256)
+            full: Re-embed every memory, e.g. after fixing corrupted embeddings
+            workers: Encoder processes (defaults to MEMORY_REBUILD_WORKERS or 0,
+                which encodes in this process)
+            resume: Continue from the last checkpoint of an interrupted run
+
+        Returns:
+            Report with `scanned`, `embedded`, `resumed_from`, `seconds` and `per_second`
+        """
+        if batch_size is None:
+            batch_size = int(os.getenv("MEMORY_REBUILD_BATCH_SIZE", "256"))
+        if workers is None:
+            workers = int(os.getenv("MEMORY_REBUILD_WORKERS", "0"))
+
+        model_version = self.embedder.model_name
+        checkpoint_name = 'rebuild_embeddings'
+        mode = {'model_version': model_version, 'full': full}
+
+        after_id = 0
+        checkpoint = self.db.get_checkpoint(checkpoint_name) if resume else None
+        if checkpoint and all(checkpoint.get(key) == value for key, value in mode.items()):
+            after_id = checkpoint['last_id']
+            print(f"Resuming embedding rebuild after memory {after_id}...")
+        resumed_from = after_id
+
+        print(f"Rebuilding {'all' if full else 'missing or stale'} embeddings...")
+
+        stats = {'scanned': 0, 'embedded': 0, 'model_changed': False}
+        start = time.perf_counter()
+
+        def stale_batches():
+            """Yield (rows, last scanned ID) for up to batch_size stale memories."""
+            last_id = after_id
+            pending = []
+            while True:
+                page = self.db.get_embedding_status(last_id, batch_size)
+                if not page:
+                    break
+                for memory_id, title, content, stored_model, stored_hash in page:
+                    text = embedding_text(title, content)
+                    text_hash = content_hash(text)
+                    if full or stored_model != model_version or stored_hash != text_hash:
+                        stats['model_changed'] |= stored_model is not None and stored_model != model_version
+                        pending.append((memory_id, text, text_hash))
+                last_id = page[-1][0]
+                stats['scanned'] += len(page)
+                if len(pending) >= batch_size:
+                    yield pending, last_id
+                    pending = []
+            if pending:
+                yield pending, last_id
+
+        def write(rows, last_id, embeddings):
+            self.db.put_embeddings(
+                [
+                    (memory_id, self.embedder.serialize_embedding(embedding), model_version, text_hash)
+                    for (memory_id, _, text_hash), embedding in zip(rows, embeddings)
+                ],
+                checkpoint=(checkpoint_name, dict(mode, last_id=last_id)),
+            )
+            stats['embedded'] += len(rows)
+            print(f"  Embedded {stats['embedded']} (scanned {stats['scanned']})")
+
+        if workers > 0:
+            # Encode ahead in worker processes; write in order so checkpoints only move forward
+            # Spawned workers load their own model instead of inheriting torch state via fork
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                in_flight = deque()
+                for rows, last_id in stale_batches():
+                    texts = [text for _, text, _ in rows]
+                    in_flight.append((rows, last_id, executor.submit(_encode_texts, model_version, texts)))
+                    if len(in_flight) > workers:
+                        rows, last_id, future = in_flight.popleft()
+                        write(rows, last_id, future.result())
+                while in_flight:
+                    rows, last_id, future = in_flight.popleft()
+                    write(rows, last_id, future.result())
+        else:
+            for rows, last_id in stale_batches():
+                write(rows, last_id, self.embedder.embed_batch([text for _, text, _ in rows]))
+
+        self.db.clear_checkpoint(checkpoint_name)
+
+        if stats['embedded']:
+            with self._index_mutex:
+                if full or stats['model_changed']:
+                    # Vectors moved wholesale; retrain the index structure
+                    self.index.reset_training()
+                self._index_loaded = False
+
+        seconds = time.perf_counter() - start
+        report = {
+            'scanned': stats['scanned'],
+            'embedded': stats['embedded'],
+            'resumed_from': resumed_from,
+            'seconds': round(seconds, 3),
+            'per_second': round(stats['embedded'] / seconds, 1) if seconds > 0 else 0.0,
+        }
+        print(
+            f"Embedding rebuild complete! {report['embedded']} of {report['scanned']} "
+            f"memories embedded in {report['seconds']}s ({report['per_second']}/s)"
+        )
+        return report
+
+
+# Shared instances, one per database file
+_retrievals: Dict[str, MemoryRetrieval] = {}
+_retrievals_lock = threading.Lock()
 
-            # Store in database
-            cursor = self.db.conn.cursor()
-            for memory_id, embedding in zip(memory_ids, embeddings):
-                serialized = self.embedder.serialize_embedding(embedding)
 
-                # Delete old embedding
-                cursor.execute("DELETE FROM embeddings WHERE memory_id = ?", (memory_id,))
+def get_memory_retrieval(db_path: str = "memory.db") -> MemoryRetrieval:
+    """Get or create the process-wide MemoryRetrieval (and its vector index) for a file."""
+    with _retrievals_lock:
+        retrieval = _retrievals.get(db_path)
+        if retrieval is None:
+            retrieval = MemoryRetrieval(get_memory_database(db_path))
+            _retrievals[db_path] = retrieval
+        return retrieval
 
-                # Insert new embedding
-                cursor.execute("""
-                    INSERT INTO embeddings (memory_id, embedding, model_version)
-                    VALUES (?, ?, ?)
-                """, (memory_id, serialized, self.embedder.model_name))
 
-            self.db.conn.commit()
+def _encode_texts(model_name: str, texts: List[str]) -> List[np.ndarray]:
+    """Embed texts in a rebuild worker process (one model per process)."""
+    global _worker_embedder
+    if _worker_embedder is None or _worker_embedder.model_name != model_name:
+        _worker_embedder = EmbeddingService(model_name)
+    return _worker_embedder.embed_batch(texts, use_cache=False)
 
-            print(f"  Processed {min(i + batch_size, len(memories))}/{len(memories)}")
 
-        print("Embedding rebuild complete!")
+# Embedding model loaded by a rebuild worker process
+_worker_embedder: Optional[EmbeddingService] = None
@@ -2,28 +2,162 @@
 Core storage layer for the memory system using SQLite.
 """
 
+import hashlib
 import json
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 
-from .types import Memory
+from .pool import ConnectionPool, get_connection_pool
+from .types import Memory, SearchFilters
+
+
+def embedding_text(title: Optional[str], content: str) -> str:
+    """Text a memory's embedding is computed from."""
+    return f"{title or ''} {content}".strip()
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of embedded text, used to detect stale embeddings."""
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def dedup_hash(title: Optional[str], content: str) -> str:
+    """Hash of a memory's title and content, ignoring case and whitespace."""
+    return content_hash(" ".join(embedding_text(title, content).lower().split()))
+
+
+def filter_clause(filters: Optional[SearchFilters], alias: str = "m") -> Tuple[str, List[Any]]:
+    """
+    Build a SQL condition on the memories table for search filters.
+
+    Args:
+        filters: Filters to apply (None or empty matches everything)
+        alias: Alias of the memories table in the surrounding query
+
+    Returns:
+        (condition, params); the condition is "1" when there is nothing to filter
+    """
+    if filters is None:
+        return "1", []
+
+    def as_list(value):
+        return [value] if isinstance(value, str) else list(value)
+
+    def as_timestamp(value):
+        # SQLite's 'YYYY-MM-DD HH:MM:SS' format
+        return value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else value.replace('T', ' ')
+
+    conditions = []
+    params: List[Any] = []
+    if filters.memory_types:
+        values = as_list(filters.memory_types)
+        conditions.append(f"{alias}.memory_type IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if filters.source_types:
+        values = as_list(filters.source_types)
+        conditions.append(f"{alias}.source_type IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if filters.tags:
+        values = [tag.lower() for tag in as_list(filters.tags)]
+        conditions.append(
+            f"{alias}.id IN (SELECT memory_id FROM memory_tags WHERE tag IN ({', '.join('?' * len(values))}))"
+        )
+        params.extend(values)
+    # Older imports stored ISO 'T'-separated timestamps, which sort after the
+    # same time with a space. Each range gets a bound that holds for both
+    # formats (so the timestamp index applies), then the exact comparison.
+    if filters.since is not None:
+        since = as_timestamp(filters.since)
+        conditions.append(f"{alias}.timestamp >= ? AND replace({alias}.timestamp, 'T', ' ') >= ?")
+        params.extend([since, since])
+    if filters.until is not None:
+        until = as_timestamp(filters.until)
+        conditions.append(f"{alias}.timestamp < ? AND replace({alias}.timestamp, 'T', ' ') < ?")
+        params.extend([until[:10] + 'T' + until[11:] if len(until) > 10 else until, until])
+    if filters.min_importance is not None:
+        conditions.append(f"{alias}.importance_score >= ?")
+        params.append(filters.min_importance)
+
+    return (" AND ".join(conditions) or "1"), params
 
 
 class MemoryDatabase:
     """SQLite-based storage for memories with FTS5 full-text search."""
 
-    def __init__(self, db_path: str = "memory.db"):
-        """Initialize database connection and create schema if needed."""
+    def __init__(self, db_path: str = "memory.db", pool: Optional[ConnectionPool] = None):
+        """
+        Initialize database connection and create schema if needed.
+
+        Args:
+            db_path: SQLite database file (or ":memory:")
+            pool: Connection pool to use (defaults to the shared pool for db_path)
+        """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        if db_path == ":memory:":
+            # A private in-memory database can't be shared with pooled readers
+            self.pool = None
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.write_lock = threading.RLock()
+        else:
+            # This instance's write connection; reads go through the pool
+            self.pool = pool or get_connection_pool(db_path)
+            self.conn = self.pool.connect()
+            self.write_lock = self.pool.write_lock
+        # Bumped on every content write made through this instance (see bump_write_generation)
+        self.write_generation = 0
         self._create_schema()
 
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read connection; reads run concurrently with the writer."""
+        if self.pool is None:
+            yield self.conn
+            return
+        with self.pool.read() as conn:
+            yield conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a write transaction on this instance's connection.
+
+        Writers sharing the pool are serialized; the transaction commits on
+        success and rolls back on error.
+        """
+        with self.write_lock:
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
     def _create_schema(self):
         """Create database schema with FTS5 and triggers."""
-        cursor = self.conn.cursor()
+        with self.writer() as conn:
+            self._create_tables(conn.cursor())
+
+    @staticmethod
+    def _backfill_dedup_hashes(cursor: sqlite3.Cursor):
+        """Hash existing memories; later copies of a duplicate keep NULL so the unique index builds."""
+        seen = set()
+        updates = []
+        for memory_id, title, content in cursor.execute(
+            "SELECT id, title, content FROM memories ORDER BY id"
+        ).fetchall():
+            digest = dedup_hash(title, content)
+            if digest not in seen:
+                seen.add(digest)
+                updates.append((digest, memory_id))
+        cursor.executemany("UPDATE memories SET content_hash = ? WHERE id = ?", updates)
+
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """Create tables, indexes and triggers (inside the schema transaction)."""
 
         # Main memory entries table
         cursor.execute("""
@@ -38,10 +172,73 @@ class MemoryDatabase:
                 access_count INTEGER DEFAULT 0,
                 last_accessed DATETIME,
                 source_type TEXT,
-                source_id TEXT
+                source_id TEXT,
+                content_hash TEXT
             )
         """)
 
+        # Normalized content hash, so duplicate memories are found with one index lookup
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(memories)")}
+        if 'content_hash' not in columns:
+            cursor.execute("ALTER TABLE memories ADD COLUMN content_hash TEXT")
+            self._backfill_dedup_hashes(cursor)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_memories_content_hash
+            ON memories(content_hash)
+        """)
+
+        # Indexes for filtered search (see filter_clause)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories(timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memories_type_time ON memories(memory_type, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memories_source_time ON memories(source_type, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memories_importance ON memories(importance_score)")
+
+        # Tags from the metadata JSON, one row per (tag, memory), kept in sync by triggers
+        cursor.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type='table' AND name='memory_tags'
+        """)
+        backfill_tags = not cursor.fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS memory_tags (
+                tag TEXT NOT NULL,
+                memory_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, memory_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memory_tags_memory ON memory_tags(memory_id)")
+
+        insert_tags = """
+            INSERT OR IGNORE INTO memory_tags(tag, memory_id)
+            SELECT lower(value), {row}.id
+            FROM json_each(CASE WHEN json_valid({row}.metadata) THEN {row}.metadata ELSE '{{}}' END, '$.tags')
+            WHERE type = 'text'
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS memories_tags_ai AFTER INSERT ON memories BEGIN
+                {insert_tags.format(row='new')};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS memories_tags_au AFTER UPDATE OF metadata ON memories BEGIN
+                DELETE FROM memory_tags WHERE memory_id = old.id;
+                {insert_tags.format(row='new')};
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS memories_tags_ad AFTER DELETE ON memories BEGIN
+                DELETE FROM memory_tags WHERE memory_id = old.id;
+            END
+        """)
+        if backfill_tags:
+            cursor.execute("""
+                INSERT OR IGNORE INTO memory_tags(tag, memory_id)
+                SELECT lower(t.value), m.id
+                FROM memories m,
+                     json_each(CASE WHEN json_valid(m.metadata) THEN m.metadata ELSE '{}' END, '$.tags') t
+                WHERE t.type = 'text'
+            """)
+
         # Embedding storage table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS embeddings (
@@ -53,6 +250,36 @@ class MemoryDatabase:
             )
         """)
 
+        # Hash of the text each embedding was computed from (added after release)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(embeddings)")}
+        if 'content_hash' not in columns:
+            cursor.execute("ALTER TABLE embeddings ADD COLUMN content_hash TEXT")
+
+        # Progress of resumable maintenance jobs (e.g. rebuild_embeddings)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                name TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Change log of embedding writes, used to catch up the on-disk vector store
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                memory_id INTEGER NOT NULL
+            )
+        """)
+
+        for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS embeddings_log_{event.lower()}
+                AFTER {event} ON embeddings BEGIN
+                    INSERT INTO embedding_log(memory_id) VALUES ({row}.memory_id);
+                END
+            """)
+
         # Full-text search index
         cursor.execute("""
             CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
@@ -101,8 +328,6 @@ class MemoryDatabase:
                 END
             """)
 
-        self.conn.commit()
-
     def add_memory(
         self,
         content: str,
@@ -116,37 +341,112 @@ class MemoryDatabase:
         """
         Add a new memory to the database.
 
-        Returns the memory ID.
+        Returns the memory ID. If a memory with the same normalized title and
+        content exists, nothing is inserted and its ID is returned instead.
         """
-        cursor = self.conn.cursor()
-
         # Serialize metadata to JSON
         metadata_json = json.dumps(metadata) if metadata else "{}"
+        digest = dedup_hash(title, content)
 
-        cursor.execute("""
-            INSERT INTO memories (
-                memory_type, title, content, metadata,
-                importance_score, source_type, source_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            memory_type, title, content, metadata_json,
-            importance_score, source_type, source_id
-        ))
-
-        self.conn.commit()
+        with self.writer() as conn:
+            cursor = conn.execute("""
+                INSERT INTO memories (
+                    memory_type, title, content, metadata,
+                    importance_score, source_type, source_id, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO NOTHING
+            """, (
+                memory_type, title, content, metadata_json,
+                importance_score, source_type, source_id, digest
+            ))
+            if cursor.rowcount == 0:
+                return conn.execute(
+                    "SELECT id FROM memories WHERE content_hash = ?", (digest,)
+                ).fetchone()[0]
+
+        self.bump_write_generation()
         return cursor.lastrowid
 
+    def find_duplicate(self, title: Optional[str], content: str) -> Optional[int]:
+        """Get the ID of a memory with the same normalized title and content, if any."""
+        digest = dedup_hash(title, content)
+        return self.find_by_hash([digest]).get(digest)
+
+    def find_by_hash(self, digests: Iterable[str], chunk_size: int = 500) -> Dict[str, int]:
+        """
+        Look up memories by dedup hash (see dedup_hash).
+
+        Returns:
+            Dict mapping hash -> memory_id for hashes that exist
+        """
+        digests = list(dict.fromkeys(digests))
+        found = {}
+        with self.reader() as conn:
+            for start in range(0, len(digests), chunk_size):
+                chunk = digests[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT content_hash, id FROM memories WHERE content_hash IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                found.update({digest: memory_id for digest, memory_id in rows})
+        return found
+
     def get_memory(self, memory_id: int) -> Optional[Memory]:
         """Retrieve a memory by ID."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM memories WHERE id = ?", (memory_id,))
-        row = cursor.fetchone()
+        with self.reader() as conn:
+            row = conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
 
         if not row:
             return None
 
         return self._row_to_memory(row)
 
+    def get_memories(self, memory_ids: Iterable[int], chunk_size: int = 500) -> Dict[int, Memory]:
+        """
+        Retrieve several memories by ID in as few queries as possible.
+
+        Args:
+            memory_ids: IDs to fetch
+            chunk_size: Maximum IDs per query (SQLite bounds bound parameters)
+
+        Returns:
+            Dict mapping memory_id -> Memory (missing IDs are omitted)
+        """
+        memory_ids = list(dict.fromkeys(memory_ids))
+        memories = {}
+        for start in range(0, len(memory_ids), chunk_size):
+            chunk = memory_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            with self.reader() as conn:
+                rows = conn.execute(
+                    f"SELECT * FROM memories WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+            for row in rows:
+                memories[row['id']] = self._row_to_memory(row)
+        return memories
+
+    def get_embeddings(self, memory_ids: Iterable[int], chunk_size: int = 500) -> Dict[int, bytes]:
+        """
+        Retrieve serialized embeddings for several memories.
+
+        Returns:
+            Dict mapping memory_id -> embedding blob (missing IDs are omitted)
+        """
+        memory_ids = list(dict.fromkeys(memory_ids))
+        embeddings = {}
+        for start in range(0, len(memory_ids), chunk_size):
+            chunk = memory_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            with self.reader() as conn:
+                rows = conn.execute(
+                    f"SELECT memory_id, embedding FROM embeddings WHERE memory_id IN ({placeholders})",
+                    chunk
+                ).fetchall()
+            for memory_id, blob in rows:
+                embeddings[memory_id] = blob
+        return embeddings
+
     def update_memory(
         self,
         memory_id: int,
@@ -161,8 +461,6 @@ class MemoryDatabase:
         if not memory:
             return False
 
-        cursor = self.conn.cursor()
-
         # Build update query dynamically
         updates = []
         params = []
@@ -186,72 +484,242 @@ class MemoryDatabase:
         if not updates:
             return True  # Nothing to update
 
+        if title is not None or content is not None:
+            # Keep the dedup hash current; an edit that duplicates another memory loses it
+            digest = dedup_hash(
+                title if title is not None else memory.title,
+                content if content is not None else memory.content,
+            )
+            updates.append("""content_hash = CASE
+                WHEN EXISTS (SELECT 1 FROM memories WHERE content_hash = ? AND id != ?) THEN NULL
+                ELSE ? END""")
+            params.extend([digest, memory_id, digest])
+
         params.append(memory_id)
         query = f"UPDATE memories SET {', '.join(updates)} WHERE id = ?"
 
-        cursor.execute(query, params)
-        self.conn.commit()
+        with self.writer() as conn:
+            conn.execute(query, params)
+        self.bump_write_generation()
 
         return True
 
     def delete_memory(self, memory_id: int) -> bool:
         """Delete a memory and its embedding. Returns True if successful."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
-        self.conn.commit()
+        deleted, _ = self.delete_memory_with_embedding(memory_id)
+        return deleted
+
+    def delete_memory_with_embedding(self, memory_id: int) -> Tuple[bool, Optional[int]]:
+        """
+        Delete a memory and its embedding.
 
-        return cursor.rowcount > 0
+        Returns:
+            Whether the memory existed, and the embedding log sequence of the
+            embedding delete (None if the memory had no embedding)
+        """
+        with self.writer() as conn:
+            deleted = conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,)).rowcount > 0
+
+            # Foreign keys are not enforced, so remove the embedding explicitly
+            removed = conn.execute("DELETE FROM embeddings WHERE memory_id = ?", (memory_id,)).rowcount > 0
+            sequence = self.get_embedding_sequence(conn) if removed else None
+        self.bump_write_generation()
+
+        return deleted, sequence
+
+    def filter_memory_ids(self, filters: SearchFilters) -> List[int]:
+        """Get IDs of all memories matching search filters (served by indexes)."""
+        condition, params = filter_clause(filters)
+        with self.reader() as conn:
+            rows = conn.execute(f"SELECT m.id FROM memories m WHERE {condition}", params).fetchall()
+        return [row[0] for row in rows]
 
     def get_all_memories(self, limit: Optional[int] = None) -> List[Memory]:
         """Get all memories, optionally limited."""
-        cursor = self.conn.cursor()
+        with self.reader() as conn:
+            if limit:
+                rows = conn.execute(
+                    "SELECT * FROM memories ORDER BY timestamp DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM memories ORDER BY timestamp DESC").fetchall()
 
-        if limit:
-            cursor.execute(
-                "SELECT * FROM memories ORDER BY timestamp DESC LIMIT ?",
-                (limit,)
-            )
-        else:
-            cursor.execute("SELECT * FROM memories ORDER BY timestamp DESC")
-
-        return [self._row_to_memory(row) for row in cursor.fetchall()]
+        return [self._row_to_memory(row) for row in rows]
 
     def search_by_source_type(self, source_type: str) -> List[Memory]:
         """Get all memories from a specific source type."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT * FROM memories WHERE source_type = ? ORDER BY timestamp DESC",
-            (source_type,)
-        )
+        with self.reader() as conn:
+            rows = conn.execute(
+                "SELECT * FROM memories WHERE source_type = ? ORDER BY timestamp DESC",
+                (source_type,)
+            ).fetchall()
 
-        return [self._row_to_memory(row) for row in cursor.fetchall()]
+        return [self._row_to_memory(row) for row in rows]
 
     def update_access_stats(self, memory_id: int):
         """Update access count and last accessed timestamp for a memory."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE memories
-            SET access_count = access_count + 1,
-                last_accessed = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (memory_id,))
-        self.conn.commit()
+        with self.writer() as conn:
+            conn.execute("""
+                UPDATE memories
+                SET access_count = access_count + 1,
+                    last_accessed = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (memory_id,))
+
+    def apply_access_stats(self, updates: Dict[int, Tuple[int, str]]):
+        """
+        Apply coalesced access statistics in a single transaction.
 
-    def get_stats(self) -> Dict[str, Any]:
-        """Get database statistics."""
-        cursor = self.conn.cursor()
+        Args:
+            updates: memory_id -> (access count increment, last accessed timestamp)
+        """
+        if not updates:
+            return
+        with self.writer() as conn:
+            conn.executemany("""
+                UPDATE memories
+                SET access_count = access_count + ?,
+                    last_accessed = ?
+                WHERE id = ?
+            """, [(count, last_accessed, memory_id) for memory_id, (count, last_accessed) in updates.items()])
+
+    def bump_write_generation(self):
+        """Mark that memories or embeddings changed, invalidating cached search results."""
+        self.write_generation += 1
+
+    def get_data_version(self) -> Tuple[int, int]:
+        """
+        Get SQLite's data_version, which changes when another connection commits.
 
-        # Total memories
-        cursor.execute("SELECT COUNT(*) FROM memories")
-        total = cursor.fetchone()[0]
+        Read connections never write, so their data_version changes on every
+        commit. Each connection counts separately, so the version is returned
+        with the identity of the connection it was read on.
+        """
+        with self.reader() as conn:
+            return id(conn), conn.execute("PRAGMA data_version").fetchone()[0]
 
-        # Memories by type
-        cursor.execute("""
-            SELECT memory_type, COUNT(*) as count
-            FROM memories
-            GROUP BY memory_type
-        """)
-        by_type = {row[0]: row[1] for row in cursor.fetchall()}
+    def get_embedding_sequence(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Get the position of the latest embedding write (0 if none).
+
+        Args:
+            conn: Connection to read on; pass the writer's connection to see its
+                uncommitted writes (defaults to a read connection)
+        """
+        if conn is None:
+            with self.reader() as conn:
+                return self.get_embedding_sequence(conn)
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'embedding_log'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_embedding_changes(self, since: int, conn: Optional[sqlite3.Connection] = None) -> List[int]:
+        """
+        Get IDs of memories whose embedding was written after `since`.
+
+        Args:
+            since: Embedding log sequence already applied
+            conn: Connection to read on (defaults to a read connection)
+        """
+        if conn is None:
+            with self.reader() as conn:
+                return self.get_embedding_changes(since, conn)
+        rows = conn.execute(
+            "SELECT DISTINCT memory_id FROM embedding_log WHERE seq > ?",
+            (since,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune_embedding_log(self, up_to: int):
+        """Drop change log entries that have been applied to the vector store."""
+        with self.writer() as conn:
+            conn.execute("DELETE FROM embedding_log WHERE seq <= ?", (up_to,))
+
+    def get_embedding_status(self, after_id: int, limit: int) -> List[Tuple[int, Optional[str], str, Optional[str], Optional[str]]]:
+        """
+        Page through memories with their embedding metadata (keyset pagination).
+
+        Args:
+            after_id: Return memories with a larger ID
+            limit: Page size
+
+        Returns:
+            (memory_id, title, content, model_version, content_hash) tuples in ID
+            order; the last two are None for memories without an embedding
+        """
+        with self.reader() as conn:
+            rows = conn.execute("""
+                SELECT m.id, m.title, m.content, e.model_version, e.content_hash
+                FROM memories m
+                LEFT JOIN embeddings e ON e.memory_id = m.id
+                WHERE m.id > ?
+                ORDER BY m.id
+                LIMIT ?
+            """, (after_id, limit)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def put_embeddings(
+        self,
+        rows: List[Tuple[int, bytes, str, str]],
+        checkpoint: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Insert or replace embeddings in one transaction.
+
+        Args:
+            rows: (memory_id, embedding, model_version, content_hash) tuples
+            checkpoint: Optional (name, state) saved in the same transaction
+
+        Returns:
+            Embedding log sequence after the write
+        """
+        with self.writer() as conn:
+            conn.executemany("""
+                INSERT INTO embeddings (memory_id, embedding, model_version, content_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(memory_id) DO UPDATE SET
+                    embedding = excluded.embedding,
+                    model_version = excluded.model_version,
+                    content_hash = excluded.content_hash,
+                    created_at = CURRENT_TIMESTAMP
+            """, rows)
+            if checkpoint is not None:
+                name, state = checkpoint
+                conn.execute("""
+                    INSERT OR REPLACE INTO checkpoints (name, state, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                """, (name, json.dumps(state)))
+            sequence = self.get_embedding_sequence(conn)
+
+        self.bump_write_generation()
+        return sequence
+
+    def get_checkpoint(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the saved state of a maintenance job, if any."""
+        with self.reader() as conn:
+            row = conn.execute("SELECT state FROM checkpoints WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def clear_checkpoint(self, name: str):
+        """Forget a maintenance job's saved state."""
+        with self.writer() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get database statistics."""
+        with self.reader() as conn:
+            # Total memories
+            total = conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+            # Memories by type
+            rows = conn.execute("""
+                SELECT memory_type, COUNT(*) as count
+                FROM memories
+                GROUP BY memory_type
+            """).fetchall()
+        by_type = {row[0]: row[1] for row in rows}
 
         # Database size
         db_size = Path(self.db_path).stat().st_size if Path(self.db_path).exists() else 0
@@ -263,15 +731,133 @@ class MemoryDatabase:
             'db_size_mb': round(db_size / (1024 * 1024), 2),
         }
 
-    def migrate_from_notes_txt(self, file_path: str) -> int:
+    def add_memories(
+        self,
+        records: List[Dict[str, Any]],
+        embeddings: Optional[List[bytes]] = None,
+        model_version: Optional[str] = None,
+    ) -> Tuple[List[int], List[bool], int]:
         """
-        Import existing notes from notes.txt file.
+        Insert several memories (and optionally their embeddings) in one transaction.
+
+        Records whose normalized title and content already exist (in the
+        database or earlier in `records`) are skipped.
+
+        Args:
+            records: Dicts with `content` and optionally `memory_type`, `title`,
+                `metadata`, `source_type`, `source_id`, `importance_score`, `timestamp`
+            embeddings: Serialized embeddings, one per record
+            model_version: Model that produced the embeddings
+
+        Returns:
+            (memory IDs in record order, whether each record was inserted,
+            embedding log sequence after the write). Skipped records map to
+            the ID of the memory they duplicate.
+        """
+        if not records:
+            return [], [], self.get_embedding_sequence()
+
+        digests = [dedup_hash(record.get('title'), record['content']) for record in records]
+
+        with self.writer() as conn:
+            # Lock out other writers between the duplicate check and the insert
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            existing = {}
+            unique_digests = list(dict.fromkeys(digests))
+            for start in range(0, len(unique_digests), 500):
+                chunk = unique_digests[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                existing.update(conn.execute(
+                    f"SELECT content_hash, id FROM memories WHERE content_hash IN ({placeholders})",
+                    chunk
+                ).fetchall())
+
+            rows = []
+            new_indices = []
+            for i, (record, digest) in enumerate(zip(records, digests)):
+                if digest in existing:
+                    continue
+                existing[digest] = None  # Later copies in this batch are duplicates too
+                new_indices.append(i)
+
+                timestamp = record.get('timestamp')
+                if isinstance(timestamp, datetime):
+                    timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+                rows.append((
+                    record.get('memory_type', 'note'),
+                    record.get('title'),
+                    record['content'],
+                    json.dumps(record['metadata']) if record.get('metadata') else "{}",
+                    timestamp,
+                    record.get('importance_score', 0.5),
+                    record.get('source_type', 'manual'),
+                    record.get('source_id'),
+                    digest,
+                ))
+
+            if rows:
+                conn.executemany("""
+                    INSERT INTO memories (
+                        memory_type, title, content, metadata, timestamp,
+                        importance_score, source_type, source_id, content_hash
+                    ) VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?)
+                """, rows)
+
+                # We hold the write lock for the whole statement, so AUTOINCREMENT
+                # handed out consecutive IDs ending at the table's sequence
+                last_id = conn.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = 'memories'"
+                ).fetchone()[0]
+                for i, memory_id in zip(new_indices, range(last_id - len(rows) + 1, last_id + 1)):
+                    existing[digests[i]] = memory_id
+
+                if embeddings is not None:
+                    conn.executemany("""
+                        INSERT INTO embeddings (memory_id, embedding, model_version, content_hash)
+                        VALUES (?, ?, ?, ?)
+                    """, [
+                        (existing[digests[i]], embeddings[i], model_version,
+                         content_hash(embedding_text(records[i].get('title'), records[i]['content'])))
+                        for i in new_indices
+                    ])
+            sequence = self.get_embedding_sequence(conn)
+
+        if rows:
+            self.bump_write_generation()
+        inserted = set(new_indices)
+        return [existing[digest] for digest in digests], [i in inserted for i in range(len(records))], sequence
+
+    def migrate_from_notes_txt(self, file_path: str, retrieval=None) -> int:
+        """
+        Import existing notes from notes.txt file, with embeddings.
+
+        Args:
+            file_path: Path to notes.txt
+            retrieval: MemoryRetrieval to ingest through (created on this database if omitted)
 
         Returns the number of notes imported.
         """
-        if not Path(file_path).exists():
+        records = self.parse_notes_txt(file_path)
+        if not records:
             return 0
 
+        if retrieval is None:
+            from .retrieval import MemoryRetrieval
+            retrieval = MemoryRetrieval(self)
+        return retrieval.add_memories_bulk(records)['inserted']
+
+    @staticmethod
+    def parse_notes_txt(file_path: str) -> List[Dict[str, Any]]:
+        """
+        Parse a notes.txt file into memory records (see add_memories).
+
+        Returns an empty list if the file does not exist.
+        """
+        if not Path(file_path).exists():
+            return []
+
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
@@ -282,7 +868,7 @@ class MemoryDatabase:
         # [Content]
 
         notes = content.split('\n---')
-        imported = 0
+        records = []
 
         for note_text in notes:
             note_text = note_text.strip()
@@ -341,27 +927,21 @@ class MemoryDatabase:
                 except Exception:
                     pass
 
-            # Add to database
             metadata = {'tags': tags} if tags else {}
 
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO memories (
-                    memory_type, title, content, metadata,
-                    timestamp, source_type
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                'note', title, content, json.dumps(metadata),
-                timestamp.isoformat() if timestamp else datetime.now().isoformat(),
-                'migrated'
-            ))
-
-            imported += 1
+            records.append({
+                'memory_type': 'note',
+                'title': title,
+                'content': content,
+                'metadata': metadata,
+                'timestamp': timestamp or datetime.now(),
+                'source_type': 'migrated',
+            })
 
-        self.conn.commit()
-        return imported
+        return records
 
-    def _row_to_memory(self, row: sqlite3.Row) -> Memory:
+    @staticmethod
+    def _row_to_memory(row: sqlite3.Row) -> Memory:
         """Convert a database row to a Memory object."""
         metadata = json.loads(row['metadata']) if row['metadata'] else {}
 
@@ -405,3 +985,18 @@ class MemoryDatabase:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         self.close()
+
+
+# Shared instances, one per database file
+_databases: Dict[str, MemoryDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_memory_database(db_path: str = "memory.db") -> MemoryDatabase:
+    """Get or create the process-wide MemoryDatabase for a file."""
+    with _databases_lock:
+        database = _databases.get(db_path)
+        if database is None:
+            database = MemoryDatabase(db_path)
+            _databases[db_path] = database
+        return database
@@ -4,7 +4,7 @@ Data types for the memory system.
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Union
 
 
 @dataclass
@@ -59,6 +59,8 @@ class SearchResult:
     recency_score: float = 0.0
     importance_score: float = 0.0
     final_score: float = 0.0
+    keyword_rank: Optional[int] = None  # 1-based position in keyword results, None if absent
+    semantic_rank: Optional[int] = None  # 1-based position in semantic results, None if absent
 
     def __lt__(self, other):
         """Allow sorting by final score."""
@@ -67,3 +69,35 @@ class SearchResult:
     def __gt__(self, other):
         """Allow sorting by final score."""
         return self.final_score > other.final_score
+
+
+@dataclass
+class SearchFilters:
+    """Restrictions for hybrid search; all optional and combined with AND."""
+    memory_types: Optional[Union[str, List[str]]] = None  # e.g. 'note' or ['fact', 'insight']
+    source_types: Optional[Union[str, List[str]]] = None  # e.g. 'manual', 'consolidated'
+    tags: Optional[Union[str, List[str]]] = None  # Matches memories with any of these tags
+    since: Optional[datetime] = None  # Inclusive lower bound on timestamp
+    until: Optional[datetime] = None  # Exclusive upper bound on timestamp
+    min_importance: Optional[float] = None
+
+    def is_empty(self) -> bool:
+        """True if no filter is set."""
+        return not (self.memory_types or self.source_types or self.tags) and all(
+            value is None for value in (self.since, self.until, self.min_importance)
+        )
+
+    def cache_key(self) -> Tuple:
+        """Hashable representation for result caches."""
+        def normalized(value):
+            if value is None or isinstance(value, str):
+                return value
+            return tuple(sorted(value))
+        return (
+            normalized(self.memory_types),
+            normalized(self.source_types),
+            normalized(self.tags),
+            self.since,
+            self.until,
+            self.min_importance,
+        )
@@ -0,0 +1,237 @@
+"""
+Memory-mapped vector file kept alongside memory.db.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from .index import VectorIndex
+
+
+@dataclass
+class StoreHeader:
+    """Header fields of a vector store file."""
+    dimension: int
+    count: int  # Rows written, including tombstones
+    capacity: int  # Rows the file has room for
+    sequence: int  # embedding_log position reflected by the file
+
+
+@dataclass
+class StoreSnapshot:
+    """Live rows of a vector store, mapped read-only (copy-on-write)."""
+    ids: np.ndarray
+    vectors: np.ndarray
+    sequence: int
+    tombstones: int
+
+
+class MappedVectorStore:
+    """
+    Append-friendly file of normalized float32 embeddings.
+
+    Layout: a 64-byte header, then fixed-stride records of
+    (int64 memory_id, float32[dimension] vector). Replaced and deleted rows
+    are tombstoned (id -1) instead of moved, so existing vector pages are
+    never rewritten in place and every process that maps the file shares
+    them through the OS page cache. Compaction writes a new file and swaps
+    it in atomically.
+
+    The header's `sequence` is the embedding_log position the file
+    reflects; the file is only trusted when it matches the database.
+    """
+
+    MAGIC = b"SBVS"
+    VERSION = 1
+    HEADER = struct.Struct('<4sIIQQQ')  # magic, version, dimension, count, capacity, sequence
+    HEADER_SIZE = 64
+    TOMBSTONE = -1
+    UPDATING = 2 ** 64 - 1  # Sequence written while an update is in progress
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: Location of the vector file (created on first write)
+        """
+        self.path = Path(path)
+
+    def read_header(self) -> Optional[StoreHeader]:
+        """Read the file header. Returns None if the file is missing or invalid."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read(self.HEADER.size)
+        except OSError:
+            return None
+
+        if len(data) < self.HEADER.size:
+            return None
+
+        magic, version, dimension, count, capacity, sequence = self.HEADER.unpack(data)
+        if magic != self.MAGIC or version != self.VERSION or count > capacity:
+            return None
+
+        return StoreHeader(dimension, count, capacity, sequence)
+
+    def read(self) -> Optional[StoreSnapshot]:
+        """
+        Map the live rows of the file.
+
+        When there are no tombstones the vectors are a copy-on-write view of
+        the mapping (no copy); otherwise live rows are gathered into memory.
+        """
+        header = self.read_header()
+        if header is None or header.sequence == self.UPDATING:
+            return None
+
+        if header.count == 0:
+            return StoreSnapshot(
+                ids=np.empty(0, dtype=np.int64),
+                vectors=np.empty((0, header.dimension), dtype=np.float32),
+                sequence=header.sequence,
+                tombstones=0,
+            )
+
+        records = np.memmap(
+            self.path,
+            dtype=self._record_dtype(header.dimension),
+            mode='c',
+            offset=self.HEADER_SIZE,
+            shape=(header.count,),
+        )
+        ids = np.array(records['id'])
+        vectors = records['vector']
+
+        # A concurrent update may have changed rows while they were read
+        if self.read_header() != header:
+            return None
+
+        live = ids != self.TOMBSTONE
+        tombstones = int(header.count - live.sum())
+        if tombstones:
+            ids = ids[live]
+            vectors = vectors[live]
+
+        return StoreSnapshot(ids, vectors, header.sequence, tombstones)
+
+    def rewrite(self, ids: Iterable[int], vectors: np.ndarray, sequence: int):
+        """Replace the whole file with the given rows (also compacts tombstones)."""
+        ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64)
+        vectors = VectorIndex.normalize(vectors)
+        if vectors.ndim != 2:
+            vectors = vectors.reshape(len(ids), -1)
+        dimension = vectors.shape[1]
+
+        records = np.empty(len(ids), dtype=self._record_dtype(dimension))
+        records['id'] = ids
+        records['vector'] = vectors
+
+        # Write next to the target and swap in, so readers never see a partial file
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(self._pack_header(StoreHeader(dimension, len(ids), len(ids), sequence)))
+            f.write(records.tobytes())
+        os.replace(tmp_path, self.path)
+
+    def apply(
+        self,
+        upserts: Dict[int, np.ndarray],
+        deletes: Iterable[int],
+        sequence: int,
+        max_tombstone_ratio: float = 0.5,
+    ) -> bool:
+        """
+        Apply incremental changes in place.
+
+        Replaced and deleted rows are tombstoned; new vectors are appended.
+        Callers must serialize concurrent writers (see MemoryRetrieval).
+
+        Returns:
+            False if the changes could not be applied (missing file, dimension
+            change, or too many tombstones) and the file should be rewritten
+        """
+        header = self.read_header()
+        if header is None:
+            return False
+
+        if upserts:
+            new_ids = np.fromiter(upserts.keys(), dtype=np.int64, count=len(upserts))
+            new_vectors = VectorIndex.normalize(np.vstack([np.ravel(v) for v in upserts.values()]))
+            if new_vectors.shape[1] != header.dimension:
+                return False
+        else:
+            new_ids = np.empty(0, dtype=np.int64)
+            new_vectors = np.empty((0, header.dimension), dtype=np.float32)
+
+        record_dtype = self._record_dtype(header.dimension)
+        changed = np.concatenate([new_ids, np.fromiter(deletes, dtype=np.int64)])
+
+        with open(self.path, 'r+b') as f:
+            records = None
+            stale = np.zeros(0, dtype=bool)
+            tombstones = 0
+            if header.count:
+                records = np.memmap(f, dtype=record_dtype, mode='r+', offset=self.HEADER_SIZE, shape=(header.count,))
+                dead = records['id'] == self.TOMBSTONE
+                stale = np.isin(records['id'], changed) & ~dead
+                tombstones = int(dead.sum() + stale.sum())
+
+            live = header.count - tombstones + len(new_ids)
+            if tombstones > max_tombstone_ratio * max(live, 1):
+                return False
+
+            # Mark the file as mid-update; readers treat it as stale until the final header
+            f.seek(0)
+            f.write(self._pack_header(StoreHeader(
+                header.dimension, header.count, header.capacity, self.UPDATING
+            )))
+            f.flush()
+
+            if records is not None:
+                records['id'][stale] = self.TOMBSTONE
+                records.flush()
+                del records
+
+            if len(new_ids):
+                appended = np.empty(len(new_ids), dtype=record_dtype)
+                appended['id'] = new_ids
+                appended['vector'] = new_vectors
+
+                count = header.count + len(new_ids)
+                if count > header.capacity:
+                    header.capacity = max(count, header.capacity * 2, 1024)
+                    f.truncate(self.HEADER_SIZE + header.capacity * record_dtype.itemsize)
+
+                f.seek(self.HEADER_SIZE + header.count * record_dtype.itemsize)
+                f.write(appended.tobytes())
+                header.count = count
+
+            f.flush()
+            header.sequence = sequence
+            f.seek(0)
+            f.write(self._pack_header(header))
+
+        return True
+
+    def delete(self):
+        """Remove the vector file."""
+        self.path.unlink(missing_ok=True)
+
+    def _pack_header(self, header: StoreHeader) -> bytes:
+        """Serialize a header, padded to HEADER_SIZE."""
+        packed = self.HEADER.pack(
+            self.MAGIC, self.VERSION, header.dimension,
+            header.count, header.capacity, header.sequence,
+        )
+        return packed.ljust(self.HEADER_SIZE, b'\0')
+
+    @staticmethod
+    def _record_dtype(dimension: int) -> np.dtype:
+        """Record layout: memory ID followed by the vector."""
+        return np.dtype([('id', '<i8'), ('vector', '<f4', (dimension,))])
@@ -0,0 +1,153 @@
+"""
+Ordered-completion executor for utterance processing.
+
+Runs several independent utterances concurrently (bounded per session and
+process-wide) but delivers their results in submission order, so a burst
+of quick notes costs roughly one LLM round trip instead of one per note
+while responses still arrive in the order they were spoken. Utterances
+that refer back to an earlier one ("move it to 4pm", "actually, cancel
+that") wait for everything submitted before them to finish first, since
+the utterance they refer to need not be the one right before.
+"""
+
+import asyncio
+import os
+import re
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+
+# Utterances that continue or correct the previous one
+_FOLLOW_UP_PATTERN = re.compile(
+    r"^(?:actually|also|wait|instead|no|never ?mind|undo|scratch that)\b",
+    re.IGNORECASE,
+)
+
+# References to something an earlier utterance created
+_REFERENCE_PATTERN = re.compile(
+    r"\b(?:it|that|this one|that one|the (?:same|last|previous) (?:one|event|note|meeting))\b",
+    re.IGNORECASE,
+)
+
+# References only matter when the utterance edits what they point to
+_EDIT_PATTERN = re.compile(
+    r"\b(?:move|change|update|cancel|delete|remove|rename|reschedule|push|add|edit|fix)\b",
+    re.IGNORECASE,
+)
+
+
+def depends_on_previous(text: str) -> bool:
+    """
+    Guess whether an utterance needs the previous one's effects (an event
+    it created, a note it saved) to be in place before it runs.
+    """
+    text = text.strip()
+    if _FOLLOW_UP_PATTERN.match(text):
+        return True
+    return bool(_REFERENCE_PATTERN.search(text) and _EDIT_PATTERN.search(text))
+
+
+# Process-wide cap on utterances being processed at once, across all sessions
+_global_limit: Optional[asyncio.Semaphore] = None
+_global_limit_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_global_limit() -> asyncio.Semaphore:
+    """Get the process-wide concurrency limit for the running event loop."""
+    global _global_limit, _global_limit_loop
+    loop = asyncio.get_running_loop()
+    if _global_limit is None or _global_limit_loop is not loop:
+        _global_limit = asyncio.Semaphore(int(os.getenv("AGENT_MAX_CONCURRENCY", "4")))
+        _global_limit_loop = loop
+    return _global_limit
+
+
+class OrderedExecutor:
+    """Bounded-concurrency runner that delivers results in submission order."""
+
+    def __init__(self, max_concurrency: Optional[int] = None, global_limit: Optional[asyncio.Semaphore] = None):
+        """
+        Args:
+            max_concurrency: Utterances of this session processed at once
+                (defaults to SESSION_MAX_CONCURRENCY, 1 means strictly serial)
+            global_limit: Semaphore shared with other sessions (defaults to AGENT_MAX_CONCURRENCY)
+        """
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv("SESSION_MAX_CONCURRENCY", "3")))
+        self._limit = asyncio.Semaphore(self.max_concurrency)
+        self._global_limit = global_limit
+
+        # Submitted work in order, with the callback that delivers its outcome
+        self._pending: Deque[Tuple[asyncio.Task, Callable]] = deque()
+        self._deliverer: Optional[asyncio.Task] = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def submit(
+        self,
+        work: Callable[[], Awaitable],
+        deliver: Callable[[object, Optional[BaseException]], Awaitable[None]],
+        after_previous: bool = False,
+    ) -> asyncio.Task:
+        """
+        Start processing an utterance.
+
+        Args:
+            work: Coroutine function doing the processing
+            deliver: Called as deliver(result, error) in submission order
+            after_previous: Wait for all earlier submitted work to finish before starting
+
+        Returns:
+            Task running the work
+        """
+        # Undelivered work is everything that can still be running
+        previous = [pending for pending, _ in self._pending] if after_previous else []
+        task = asyncio.create_task(self._run(work, previous))
+        self._pending.append((task, deliver))
+        self._idle.clear()
+
+        if self._deliverer is None or self._deliverer.done():
+            self._deliverer = asyncio.create_task(self._deliver_in_order())
+        return task
+
+    async def _run(self, work: Callable[[], Awaitable], previous: List[asyncio.Task]):
+        if previous:
+            # Only ordering matters; the earlier utterances' outcomes are delivered on their own
+            await asyncio.wait(previous)
+        async with self._limit, self._global_limit or get_global_limit():
+            return await work()
+
+    async def _deliver_in_order(self):
+        while self._pending:
+            task, deliver = self._pending[0]
+            await asyncio.wait([task])
+            self._pending.popleft()
+
+            if task.cancelled():
+                continue
+            error = task.exception()
+            try:
+                await deliver(None if error else task.result(), error)
+            except Exception as e:
+                # Keep delivering the rest
+                print(f"Warning: Failed to deliver result: {e}")
+        self._idle.set()
+
+    @property
+    def pending(self) -> int:
+        """Submitted utterances not delivered yet."""
+        return len(self._pending)
+
+    async def join(self):
+        """Wait until everything submitted so far has been delivered."""
+        await self._idle.wait()
+
+    async def close(self):
+        """Cancel outstanding work (e.g. the client disconnected)."""
+        tasks = [task for task, _ in self._pending]
+        if self._deliverer is not None:
+            tasks.append(self._deliverer)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+        self._idle.set()
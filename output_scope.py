@@ -0,0 +1,65 @@
+"""
+Task-local suppression of stdout/stderr.
+
+google.genai prints warnings while an agent runs. Swapping sys.stdout and
+sys.stderr for a StringIO hides them, but the swap is global: with
+utterances processed concurrently, one task's restore un-hides another's
+output, and unrelated logs from other tasks are swallowed. Instead, the
+real streams are wrapped once in a proxy that drops writes made from a
+task (or a thread it started with asyncio.to_thread) inside
+suppress_output(), and passes every other write straight through.
+"""
+
+import contextvars
+import sys
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+
+# Whether output of the current task is being discarded
+_suppressed: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "output_suppressed", default=False
+)
+
+
+class _TaskLocalStream:
+    """Stream proxy that discards writes from suppressed tasks."""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        if _suppressed.get():
+            return len(text)
+        return self._stream.write(text)
+
+    def writelines(self, lines):
+        if not _suppressed.get():
+            self._stream.writelines(lines)
+
+    def flush(self):
+        if not _suppressed.get():
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        # encoding, isatty, fileno, ... come from the real stream
+        return getattr(self._stream, name)
+
+
+def _install():
+    """Wrap sys.stdout/sys.stderr (again, if something replaced them since)."""
+    if not isinstance(sys.stdout, _TaskLocalStream):
+        sys.stdout = _TaskLocalStream(sys.stdout)
+    if not isinstance(sys.stderr, _TaskLocalStream):
+        sys.stderr = _TaskLocalStream(sys.stderr)
+
+
+@contextmanager
+def suppress_output() -> Iterator[None]:
+    """Discard stdout/stderr written by the current task for the duration of the block."""
+    _install()
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
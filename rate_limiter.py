@@ -0,0 +1,262 @@
+"""
+Process-wide rate limiting for LLM calls.
+
+Every model call acquires from a per-model limiter holding two token
+buckets: requests per minute and tokens per minute. When the buckets are
+empty, callers wait in a queue that is served round-robin across clients
+(WebSocket sessions, the terminal app), so one busy session can't starve
+the others. A 429 from the API pauses the whole limiter instead of every
+caller backing off on its own.
+"""
+
+import asyncio
+import contextvars
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+
+# Client the current task is working for, used for fair queueing
+_current_client: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "rate_limit_client", default=None
+)
+
+# Pause used when a 429 doesn't say how long to wait
+DEFAULT_RETRY_DELAY = 10.0
+
+
+class TokenBucket:
+    """Continuously refilling bucket; consumption may overdraw it (paid back by waiting)."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            per_minute: Refill rate
+            capacity: Burst size (defaults to one minute's worth)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be consumed."""
+        self._refill(now)
+        # Requests larger than the burst size wait for a full bucket
+        amount = min(amount, self.capacity)
+        wait = 0.0 if self.level >= amount else (amount - self.level) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) capacity after the fact."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits for one model, with a fair wait queue."""
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: Optional[float] = None):
+        """
+        Args:
+            name: Model name (for stats)
+            requests_per_minute: Request quota
+            tokens_per_minute: Token quota (None for no token limit)
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        # Client -> waiting (tokens, future); clients are served round-robin
+        self._queues: "OrderedDict[str, Deque[Tuple[int, asyncio.Future]]]" = OrderedDict()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Stats
+        self.granted = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limited = 0
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = self.requests.wait_time(1, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def _consume(self, tokens: int, now: float):
+        self.requests.consume(1, now)
+        if self.tokens is not None:
+            self.tokens.consume(tokens, now)
+        self.granted += 1
+
+    async def acquire(self, tokens: int = 0, client: Optional[str] = None) -> float:
+        """
+        Wait for quota to make one model call.
+
+        Args:
+            tokens: Estimated tokens the call will use (reconcile with record_usage)
+            client: Fairness key (defaults to the current client_scope)
+
+        Returns:
+            Seconds spent waiting
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Waiters from a previous event loop (asyncio.run) can never be served
+            self._queues.clear()
+            self._dispatcher = None
+            self._loop = loop
+
+        now = time.monotonic()
+        if not self._queues and self._wait_time(tokens, now) <= 0:
+            self._consume(tokens, now)
+            return 0.0
+
+        client = client or _current_client.get() or "default"
+        future = loop.create_future()
+        self._queues.setdefault(client, deque()).append((tokens, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        start = time.monotonic()
+        await future
+        waited = time.monotonic() - start
+        self.waited += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    async def _dispatch(self):
+        """Grant queued calls as quota refills, one client turn at a time."""
+        while self._queues:
+            client, queue = next(iter(self._queues.items()))
+            tokens, future = queue[0]
+
+            if not future.done():
+                wait = self._wait_time(tokens, time.monotonic())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                self._consume(tokens, time.monotonic())
+                future.set_result(None)
+
+            # Served (or cancelled while waiting): next client's turn
+            queue.popleft()
+            if queue:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+
+    def record_usage(self, estimated: int, actual: int):
+        """Correct the token bucket once a call reports its real token count."""
+        if self.tokens is not None and actual:
+            self.tokens.adjust(estimated - actual)
+
+    def refund(self, estimated: int):
+        """Return the tokens reserved for a call that failed without using them."""
+        if self.tokens is not None and estimated:
+            self.tokens.adjust(estimated)
+
+    def pause(self, seconds: float):
+        """Hold all calls for `seconds` (after the API reported a rate limit)."""
+        self.rate_limited += 1
+        self.requests.blocked_until = max(self.requests.blocked_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict:
+        return {
+            'requests_per_minute': round(self.requests.rate * 60, 2),
+            'tokens_per_minute': round(self.tokens.rate * 60) if self.tokens is not None else None,
+            'granted': self.granted,
+            'queued': sum(len(queue) for queue in self._queues.values()),
+            'waited': self.waited,
+            'avg_wait_s': round(self.total_wait / self.waited, 3) if self.waited else 0.0,
+            'max_wait_s': round(self.max_wait, 3),
+            'rate_limited': self.rate_limited,
+        }
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, Optional[float]]]:
+    """Parse LLM_RATE_LIMITS: 'model=rpm[/tpm],model=rpm[/tpm]'."""
+    limits = {}
+    for entry in filter(None, (item.strip() for item in spec.split(","))):
+        try:
+            model, values = entry.split("=", 1)
+            rpm, _, tpm = values.partition("/")
+            limits[model.strip()] = (float(rpm), float(tpm) if tpm else None)
+        except ValueError:
+            print(f"Warning: Ignoring invalid LLM_RATE_LIMITS entry '{entry}'")
+    return limits
+
+
+# Limiters per model
+_limiters: Dict[str, RateLimiter] = {}
+_model_limits: Optional[Dict[str, Tuple[float, Optional[float]]]] = None
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """Get or create the shared limiter for a model."""
+    global _model_limits
+    limiter = _limiters.get(model)
+    if limiter is None:
+        if _model_limits is None:
+            _model_limits = _parse_limits(os.getenv("LLM_RATE_LIMITS", ""))
+        default_tpm = float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+        rpm, tpm = _model_limits.get(model, (
+            float(os.getenv("LLM_REQUESTS_PER_MINUTE", "15")),
+            default_tpm or None,
+        ))
+        limiter = _limiters[model] = RateLimiter(model, rpm, tpm)
+    return limiter
+
+
+@contextmanager
+def client_scope(client: str) -> Iterator[None]:
+    """Attribute LLM calls made in this block to a client for fair queueing."""
+    token = _current_client.set(client)
+    try:
+        yield
+    finally:
+        _current_client.reset(token)
+
+
+def estimate_tokens(text: str, max_output_tokens: int = 512) -> int:
+    """Rough token estimate for a call: ~4 characters per prompt token plus the reply."""
+    return len(text) // 4 + max_output_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for quota errors (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    if getattr(error, "code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+def retry_delay(error: Exception) -> float:
+    """Seconds the API asked us to wait (retryDelay / 'retry in Xs'), or a default."""
+    match = re.search(r"retry(?:Delay)?['\"]?\s*(?::|in)\s*['\"]?(\d+(?:\.\d+)?)s", str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else DEFAULT_RETRY_DELAY
+
+
+def pause_all(seconds: float):
+    """Hold every model's calls (we can't always tell which model hit the quota)."""
+    for limiter in _limiters.values():
+        limiter.pause(seconds)
+
+
+def stats() -> Dict[str, Dict]:
+    """Limiter stats per model."""
+    return {model: limiter.stats() for model, limiter in sorted(_limiters.items())}
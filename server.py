@@ -6,16 +6,23 @@ Proxies audio to Speechmatics RT and streams transcripts back to the client.
 import asyncio
 import json
 import os
+import sys
+import time
 import warnings
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
+import rate_limiter
+import tracing
+from loop_lag import EventLoopLagMonitor
+from ordered_executor import OrderedExecutor, depends_on_previous
+
 from speechmatics.rt import (
     AsyncClient,
     ServerMessageType,
@@ -230,22 +237,72 @@ app.add_middleware(
 # Store active sessions for cleanup
 active_sessions: dict[str, "ClientSession"] = {}
 
+# Event loop lag (how long blocking work stalls every client), reported by /health
+loop_lag_monitor = EventLoopLagMonitor()
+
+# Include per-stage timings in agent_response messages
+AGENT_RESPONSE_TIMINGS = os.getenv("AGENT_RESPONSE_TIMINGS", "false").lower() in ("1", "true", "yes", "on")
 
-def build_chat_prompt(user_input: str) -> str:
-    """Build a context-aware prompt using notes and calendar data."""
-    notes_content = ""
+
+def _read_notes_file() -> str:
+    """Read the legacy notes.txt file (empty if missing)."""
     try:
         with open("notes.txt", "r", encoding="utf-8") as f:
-            notes_content = f.read()
+            return f.read()
     except FileNotFoundError:
-        notes_content = ""
+        return ""
+
 
-    calendar_content = ""
+def _list_calendar_events() -> str:
+    """Fetch upcoming calendar events (empty if unavailable)."""
     try:
         from tools.calendar_tools import list_calendar_events
-        calendar_content = list_calendar_events(max_results=20)
+        return list_calendar_events(max_results=20)
     except Exception:
-        calendar_content = ""
+        return ""
+
+
+async def _recall_relevant_notes(user_input: str) -> Optional[str]:
+    """Search the memory system for notes relevant to the question.
+
+    Returns None if the memory system is unavailable.
+    """
+    try:
+        from memory.async_retrieval import get_async_retrieval
+        retrieval = await get_async_retrieval("memory.db")
+        relevant_memories = await retrieval.hybrid_search(user_input, top_k=10)
+    except Exception:
+        return None
+
+    if not relevant_memories:
+        return ""
+
+    memory_lines = []
+    for mem in relevant_memories:
+        memory_lines.append(f"\n- {mem.title or 'Untitled'}")
+        content_preview = mem.content[:300] if mem.content else ""
+        if len(mem.content) > 300:
+            content_preview += "..."
+        memory_lines.append(f"  {content_preview}")
+
+    from memory.access_stats import get_access_stats_buffer
+    get_access_stats_buffer("memory.db").record(m.id for m in relevant_memories)
+    return "\n".join(memory_lines)
+
+
+async def build_chat_prompt(user_input: str) -> str:
+    """Build a context-aware prompt using notes and calendar data.
+
+    Memory search and the calendar request run off the event loop, so other
+    clients' audio keeps flowing while the prompt is built.
+    """
+    notes_task = asyncio.create_task(_recall_relevant_notes(user_input))
+    calendar_content = await asyncio.to_thread(_list_calendar_events)
+
+    notes_content = await notes_task
+    if notes_content is None:
+        # Memory system unavailable: fall back to the whole notes file
+        notes_content = await asyncio.to_thread(_read_notes_file)
 
     context_parts = []
     if notes_content:
@@ -279,8 +336,8 @@ class ClientSession:
         self.ws_connected = True  # Track WebSocket connection status
         
         self._agent_module = None
-        self._pending_utterances: list[tuple[str, str, str]] = []
-        self._processing_task: Optional[asyncio.Task] = None
+        # Processes independent utterances concurrently, responds in order
+        self._executor = OrderedExecutor()
         self._stop_event: Optional[asyncio.Event] = None
     
     def _get_agent(self):
@@ -407,8 +464,9 @@ class ClientSession:
             await self.send_json({"type": "error", "message": "Chat text is required"})
             return False
         
-        prompt = build_chat_prompt(text)
-        self._enqueue_prompt(text, prompt, "chat")
+        start = time.perf_counter()
+        prompt = await build_chat_prompt(text)
+        self._enqueue_prompt(text, prompt, "chat", {"chat_prompt": (time.perf_counter() - start) * 1000})
         return True
     
     async def _handle_end_of_utterance(self, text: str):
@@ -417,51 +475,88 @@ class ClientSession:
         
         self._enqueue_prompt(text, text, "voice")
 
-    def _enqueue_prompt(self, raw_text: str, prompt_text: str, mode: str):
-        """Queue a prompt for agent processing."""
-        self._pending_utterances.append((raw_text, prompt_text, mode))
+    def _enqueue_prompt(
+        self,
+        raw_text: str,
+        prompt_text: str,
+        mode: str,
+        stages: Optional[Dict[str, float]] = None,
+    ):
+        """Queue a prompt for agent processing.
+        
+        Prompts run concurrently (up to SESSION_MAX_CONCURRENCY per session
+        and AGENT_MAX_CONCURRENCY overall) regardless of recording state;
+        follow-ups that refer to an earlier prompt wait for it. Responses
+        are sent in the order prompts were queued.
+        """
+        if not self.ws_connected:
+            return
 
-        if self._processing_task is None or self._processing_task.done():
-            self._processing_task = asyncio.create_task(self._process_utterances())
+        enqueued_at = time.perf_counter()
+        self._executor.submit(
+            lambda: self._process_prompt(prompt_text, mode, enqueued_at, stages or {}),
+            lambda result, error: self._send_result(raw_text, result, error),
+            after_previous=depends_on_previous(raw_text),
+        )
     
-    async def _process_utterances(self):
-        """Process pending utterances through the agent.
+    async def _process_prompt(
+        self,
+        prompt_text: str,
+        mode: str,
+        enqueued_at: float,
+        stages: Dict[str, float],
+    ):
+        """Run one prompt through the agent.
         
-        This drains the queue regardless of recording state.
-        Only stops if WebSocket is disconnected.
+        Returns:
+            (ProcessingResult, stage timings, finish time), or None if the
+            client disconnected before the prompt started
         """
-        while self._pending_utterances:
-            # Check if WebSocket is still connected
-            if not self.ws_connected:
-                break
-            
-            raw_text, prompt_text, mode = self._pending_utterances.pop(0)
-            
-            try:
-                if mode == "chat":
-                    from delegation_agent import process_recall_query
-                    result = await process_recall_query(prompt_text)
-                else:
-                    process_fn = self._get_agent()
-                    result = await process_fn(prompt_text)
-                
-                await self.send_json({
-                    "type": "agent_response",
-                    "text": result.response,
-                    "tools_used": result.tools_used,
-                    "agents_used": result.agents_used,
-                    "prompt": raw_text,
-                })
-            except Exception as e:
-                await self.send_json({
-                    "type": "agent_error",
-                    "message": str(e),
-                    "prompt": raw_text,
-                })
-            
-            # Small delay between processing to avoid rate limits
-            if self._pending_utterances:
-                await asyncio.sleep(2.0)
+        if not self.ws_connected:
+            return None
+
+        # Model calls queue fairly with other clients on the shared rate limiter
+        with tracing.trace("utterance", mode=mode) as trace, rate_limiter.client_scope(self.session_id):
+            for stage, duration_ms in stages.items():
+                tracing.record_stage(stage, duration_ms)
+            tracing.record_stage("queue_wait", (time.perf_counter() - enqueued_at) * 1000)
+
+            if mode == "chat":
+                from delegation_agent import process_recall_query
+                result = await process_recall_query(prompt_text)
+            else:
+                process_fn = self._get_agent()
+                result = await process_fn(prompt_text)
+            return result, trace.snapshot(), time.perf_counter()
+    
+    async def _send_result(self, raw_text: str, outcome, error: Optional[BaseException]):
+        """Send a processed prompt's response (called in submission order)."""
+        if not self.ws_connected:
+            return
+
+        if error is not None:
+            await self.send_json({
+                "type": "agent_error",
+                "message": str(error),
+                "prompt": raw_text,
+            })
+            return
+
+        result, timings, finished_at = outcome
+        # Time a finished response waited for earlier prompts to be delivered
+        tracing.record_stage("ordering_wait", (time.perf_counter() - finished_at) * 1000)
+
+        response = {
+            "type": "agent_response",
+            "text": result.response,
+            "tools_used": result.tools_used,
+            "agents_used": result.agents_used,
+            "prompt": raw_text,
+        }
+        if AGENT_RESPONSE_TIMINGS:
+            response["timings"] = timings
+        with tracing.span("send_response"):
+            await self.send_json(response)
     
     async def handle_audio(self, audio_bytes: bytes):
         """Handle binary audio data from the client."""
@@ -479,12 +574,7 @@ class ClientSession:
             self.speechmatics = None
         
         # Cancel any pending processing (WebSocket is gone, can't send responses)
-        if self._processing_task and not self._processing_task.done():
-            self._processing_task.cancel()
-            try:
-                await self._processing_task
-            except asyncio.CancelledError:
-                pass
+        await self._executor.close()
 
 
 @app.websocket("/ws/transcribe")
@@ -503,6 +593,7 @@ async def websocket_transcribe(websocket: WebSocket):
     - Server sends JSON: {"type": "final", "text": "..."}
     - Server sends JSON: {"type": "end_of_utterance", "text": "..."}
     - Server sends JSON: {"type": "agent_response", "text": "...", "tools_used": [...]}
+      (plus "timings": {stage: ms} when AGENT_RESPONSE_TIMINGS is set)
     """
     await websocket.accept()
     
@@ -560,22 +651,50 @@ async def websocket_transcribe(websocket: WebSocket):
         active_sessions.pop(session_id, None)
 
 
+def _intent_router_stats() -> Optional[dict]:
+    """Intent pre-router stats, once the agent has been loaded."""
+    if "agents.router" not in sys.modules:
+        return None
+    from agents.router import get_intent_router
+    return get_intent_router().stats(coordinator_ms=tracing.stage_percentile("coordinator", 50))
+
+
+async def _adk_session_stats() -> Optional[dict]:
+    """Live ADK sessions and their memory, once the agent has been loaded."""
+    if "delegation_agent" not in sys.modules:
+        return None
+    from delegation_agent import session_stats
+    return await session_stats()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
         "active_sessions": len(active_sessions),
+        "event_loop_lag": loop_lag_monitor.summary(),
+        "stage_latency": tracing.stage_summary(),
+        "intent_router": _intent_router_stats(),
+        "llm_rate_limits": rate_limiter.stats(),
+        "adk_sessions": await _adk_session_stats(),
         "timestamp": datetime.now().isoformat(),
     }
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start background monitoring."""
+    loop_lag_monitor.start()
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up all active sessions on shutdown."""
     for session_id, session in list(active_sessions.items()):
         await session.close()
     active_sessions.clear()
+    await loop_lag_monitor.stop()
 
 
 # =============================================================================
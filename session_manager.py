@@ -0,0 +1,145 @@
+"""
+Lifecycle management for ADK sessions.
+
+The agent runs every utterance in a fresh session so the coordinator
+routes it without earlier history. SessionManager deletes each session as
+soon as the utterance is done, so a long-running server's in-memory
+session store stays flat. Sessions in use are never deleted; released
+sessions whose delete failed (or was cancelled) are retried on the next
+create.
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict
+
+
+class SessionManager:
+    """Creates and releases sessions of one app in a session service."""
+
+    def __init__(
+        self,
+        session_service,
+        app_name: str,
+        user_id: str,
+        prefix: str = "session",
+    ):
+        """
+        Args:
+            session_service: ADK session service (e.g. InMemorySessionService)
+            app_name: App the sessions belong to
+            user_id: User the sessions belong to
+            prefix: Session ID prefix
+        """
+        self.session_service = session_service
+        self.app_name = app_name
+        self.user_id = user_id
+        self.prefix = prefix
+
+        # Sessions in use: ID -> creation time (monotonic), oldest first
+        self._in_use: "OrderedDict[str, float]" = OrderedDict()
+        # Released sessions still to be deleted
+        self._released: "OrderedDict[str, None]" = OrderedDict()
+        self._counter = 0
+
+        # Stats
+        self.created = 0
+        self.released = 0
+        self.delete_retries = 0
+        self.released_events = 0
+        self.released_bytes = 0
+        self.max_session_bytes = 0
+
+    async def create(self) -> str:
+        """Create a fresh session, first retrying deletes that failed earlier."""
+        await self._sweep()
+
+        self._counter += 1
+        session_id = f"{self.prefix}_{self._counter}_{int(datetime.now().timestamp())}"
+        await self.session_service.create_session(
+            app_name=self.app_name,
+            user_id=self.user_id,
+            session_id=session_id,
+        )
+        self._in_use[session_id] = time.monotonic()
+        self.created += 1
+        return session_id
+
+    async def release(self, session_id: str):
+        """Delete a session once its utterance is done."""
+        if self._in_use.pop(session_id, None) is None:
+            return
+        # Marked released first, so a cancelled delete is retried by the next sweep
+        self._released[session_id] = None
+        self.released += 1
+
+        await self._measure(session_id)
+        if await self._delete(session_id):
+            self._released.pop(session_id, None)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[str]:
+        """Fresh session for the duration of the block."""
+        session_id = await self.create()
+        try:
+            yield session_id
+        finally:
+            await self.release(session_id)
+
+    async def _sweep(self):
+        """Retry deleting released sessions (never ones still in use)."""
+        for session_id in list(self._released):
+            self.delete_retries += 1
+            if await self._delete(session_id):
+                self._released.pop(session_id, None)
+
+    async def _measure(self, session_id: str):
+        """Record the size a session reached, once, as it is released."""
+        try:
+            session = await self.session_service.get_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=session_id,
+            )
+        except Exception:
+            return
+        if session is None:
+            return
+        size_bytes = len(session.model_dump_json())
+        self.released_events += len(session.events)
+        self.released_bytes += size_bytes
+        self.max_session_bytes = max(self.max_session_bytes, size_bytes)
+
+    async def _delete(self, session_id: str) -> bool:
+        try:
+            await self.session_service.delete_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=session_id,
+            )
+            return True
+        except Exception as e:
+            print(f"Warning: Failed to delete session {session_id}: {e}")
+            return False
+
+    def oldest_in_use_seconds(self) -> float:
+        """Age of the longest-running session, 0 if none is in use."""
+        if not self._in_use:
+            return 0.0
+        return time.monotonic() - next(iter(self._in_use.values()))
+
+    async def stats(self) -> Dict[str, Any]:
+        """Session counts and the memory sessions held when released (no session reads)."""
+        return {
+            'in_use': len(self._in_use),
+            'pending_delete': len(self._released),
+            'created': self.created,
+            'released': self.released,
+            'delete_retries': self.delete_retries,
+            'oldest_in_use_s': round(self.oldest_in_use_seconds(), 1),
+            'avg_events': round(self.released_events / self.released, 1) if self.released else 0.0,
+            'avg_bytes': round(self.released_bytes / self.released) if self.released else 0,
+            'max_bytes': self.max_session_bytes,
+        }
@@ -0,0 +1,219 @@
+"""
+Test script for the concurrent utterance pipeline: rate limiting, ordered
+delivery, session cleanup and intent routing.
+"""
+
+import asyncio
+import sys
+import time
+
+
+def test_rate_limiter():
+    """Test 1: Rate Limiter Fairness and Pause"""
+    print("Test 1: Rate Limiter Fairness and Pause")
+    print("-" * 50)
+
+    from rate_limiter import RateLimiter
+
+    async def run():
+        # 100 requests/second once the burst is used up
+        limiter = RateLimiter("test-model", requests_per_minute=6000)
+        limiter.requests.level = 0
+
+        granted = []
+
+        async def call(client):
+            await limiter.acquire(client=client)
+            granted.append(client)
+
+        # A busy client queues first, then a quiet one
+        tasks = [asyncio.create_task(call("busy")) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(call("quiet")) for _ in range(2)]
+        await asyncio.gather(*tasks)
+
+        print(f"  Grant order: {granted}")
+        assert granted[:4] == ["busy", "quiet", "busy", "quiet"], "Clients should be served round-robin"
+        assert limiter.stats()['queued'] == 0, "Queue should be drained"
+
+        # A reported 429 holds every call for the pause
+        limiter.requests.level = limiter.requests.capacity
+        limiter.pause(0.2)
+        start = time.monotonic()
+        await limiter.acquire(client="busy")
+        waited = time.monotonic() - start
+        print(f"  Waited {waited:.2f}s after a 0.2s pause")
+        assert waited >= 0.18, "Calls should wait out the pause"
+        assert limiter.stats()['rate_limited'] == 1
+
+    asyncio.run(run())
+
+    print("✓ Rate limiter working correctly")
+    print()
+
+
+def test_ordered_executor():
+    """Test 2: Ordered Delivery"""
+    print("Test 2: Ordered Delivery")
+    print("-" * 50)
+
+    from ordered_executor import OrderedExecutor
+
+    async def run():
+        executor = OrderedExecutor(max_concurrency=3, global_limit=asyncio.Semaphore(3))
+        events = []
+        delivered = []
+
+        def job(name, seconds, fail=False):
+            async def work():
+                events.append(("start", name))
+                await asyncio.sleep(seconds)
+                events.append(("end", name))
+                if fail:
+                    raise ValueError(name)
+                return name
+            return work
+
+        async def deliver(result, error):
+            delivered.append(result if error is None else f"error:{error}")
+
+        # Later prompts finish first, and one fails
+        executor.submit(job("slow", 0.3), deliver)
+        executor.submit(job("fails", 0.1, fail=True), deliver)
+        executor.submit(job("fast", 0.05), deliver)
+        # A follow-up waits for everything before it, not just the prompt right before
+        executor.submit(job("follow-up", 0.01), deliver, after_previous=True)
+        await executor.join()
+
+        print(f"  Delivered: {delivered}")
+        assert delivered == ["slow", "error:fails", "fast", "follow-up"], "Results should arrive in submission order"
+        assert events.index(("start", "follow-up")) > events.index(("end", "slow")), \
+            "Follow-up should start after all earlier prompts finished"
+        assert executor.pending == 0
+
+    asyncio.run(run())
+
+    print("✓ Ordered executor working correctly")
+    print()
+
+
+def test_session_manager():
+    """Test 3: ADK Session Cleanup"""
+    print("Test 3: ADK Session Cleanup")
+    print("-" * 50)
+
+    from session_manager import SessionManager
+
+    class FakeSession:
+        events = []
+
+        def model_dump_json(self):
+            return "{}" * 50
+
+    class FakeSessionService:
+        def __init__(self):
+            self.sessions = {}
+            self.fail_deletes = False
+
+        async def create_session(self, app_name, user_id, session_id):
+            self.sessions[session_id] = FakeSession()
+
+        async def get_session(self, app_name, user_id, session_id):
+            return self.sessions.get(session_id)
+
+        async def delete_session(self, app_name, user_id, session_id):
+            if self.fail_deletes:
+                raise RuntimeError("delete failed")
+            self.sessions.pop(session_id, None)
+
+    async def run():
+        service = FakeSessionService()
+        manager = SessionManager(service, "test_app", "test_user")
+
+        # Sessions in use are never reclaimed, however many there are
+        in_use = [await manager.create() for _ in range(150)]
+        assert len(service.sessions) == 150, "Sessions in use should not be deleted"
+
+        async with manager.session() as session_id:
+            assert session_id in service.sessions
+        assert session_id not in service.sessions, "Released session should be deleted"
+
+        for session_id in in_use[:100]:
+            await manager.release(session_id)
+        assert len(service.sessions) == 50
+
+        # A failed delete is retried on the next create
+        service.fail_deletes = True
+        await manager.release(in_use[100])
+        service.fail_deletes = False
+        assert (await manager.stats())['pending_delete'] == 1
+        await manager.create()
+        assert in_use[100] not in service.sessions, "Failed delete should be retried"
+
+        stats = await manager.stats()
+        print(f"  Stats: {stats}")
+        assert stats['in_use'] == 50 and stats['pending_delete'] == 0
+        assert stats['released'] == 102 and stats['avg_bytes'] == 100
+
+    asyncio.run(run())
+
+    print("✓ Session manager working correctly")
+    print()
+
+
+def test_intent_router():
+    """Test 4: Intent Router Heuristics"""
+    print("Test 4: Intent Router Heuristics")
+    print("-" * 50)
+
+    from agents.router import EVAL_SET, IntentRouter
+
+    wrong = []
+    undecided = 0
+    for text, expected in EVAL_SET:
+        predicted = IntentRouter.heuristic_intent(text)
+        if predicted is None:
+            undecided += 1
+        elif predicted != expected:
+            wrong.append((text, expected, predicted))
+
+    print(f"  {len(EVAL_SET) - undecided - len(wrong)}/{len(EVAL_SET)} routed correctly, {undecided} left to the coordinator")
+    for text, expected, predicted in wrong:
+        print(f"  ✗ '{text}': expected {expected}, got {predicted}")
+    assert not wrong, "Heuristics should never pick the wrong agent on the eval set"
+
+    # Questions about saved notes need notes_search_tool
+    assert IntentRouter.heuristic_intent("What did I note about the garden?") == "notes_agent"
+    assert IntentRouter.heuristic_intent("What's the capital of Australia?") == "general_agent"
+
+    print("✓ Intent router heuristics working correctly")
+    print()
+
+
+def main():
+    """Run all tests"""
+    print("=" * 50)
+    print("Concurrency Test Suite")
+    print("=" * 50)
+    print()
+
+    try:
+        test_rate_limiter()
+        test_ordered_executor()
+        test_session_manager()
+        test_intent_router()
+
+        print("=" * 50)
+        print("All tests passed! ✓")
+        print("=" * 50)
+        return 0
+
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -139,7 +139,6 @@ def test_migration():
         return
 
     from memory.storage import MemoryDatabase
-    from memory.retrieval import MemoryRetrieval
 
     # Create a fresh database for migration test
     db_migration = MemoryDatabase("test_migration.db")
@@ -151,10 +150,10 @@ def test_migration():
     print(f"  Migrated {count} notes")
 
     if count > 0:
-        # Generate embeddings
-        print("  Generating embeddings for migrated notes...")
-        retrieval = MemoryRetrieval(db_migration)
-        retrieval.rebuild_embeddings()
+        # Migration embeds notes as it imports them
+        with db_migration.reader() as conn:
+            embedded = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        assert embedded == count, "Migrated notes should have embeddings"
 
         print("✓ Migration working correctly")
     else:
@@ -164,13 +163,93 @@ def test_migration():
 
     # Clean up
     db_migration.close()
-    Path("test_migration.db").unlink(missing_ok=True)
+    remove_database("test_migration.db")
+
+
+def test_index_sync(db):
+    """Test 6: Vector Index Sync"""
+    print("Test 6: Vector Index Sync")
+    print("-" * 50)
+
+    from memory.retrieval import MemoryRetrieval
+
+    def stored_ids():
+        with db.reader() as conn:
+            return {row[0] for row in conn.execute("SELECT memory_id FROM embeddings")}
+
+    retrieval = MemoryRetrieval(db)
+    retrieval.hybrid_search("load the index")
+    assert set(retrieval.index.ids.tolist()) == stored_ids(), "Index should hold every stored embedding"
+
+    # Our own writes update the resident index in place
+    memory_id = retrieval.add_memory_with_embedding("Learned to tie a bowline knot", title="Sailing")
+    assert memory_id in retrieval.index, "Added memory should be indexed"
+    retrieval.delete_memory(memory_id)
+    assert memory_id not in retrieval.index, "Deleted memory should leave the index"
+    assert retrieval._index_seq == db.get_embedding_sequence(), "Own writes should not force a reload"
+
+    # Writes through another instance are picked up by the next search
+    other = MemoryRetrieval(db)
+    other_id = other.add_memory_with_embedding("Kayak rental opens in May", title="Kayaks")
+    retrieval.hybrid_search("kayaks")
+    assert other_id in retrieval.index, "Index should reload after another instance's add"
+    other.delete_memory(other_id)
+    retrieval.hybrid_search("kayaks")
+    assert other_id not in retrieval.index, "Index should reload after another instance's delete"
+    assert set(retrieval.index.ids.tolist()) == stored_ids(), "Index should match the database"
+
+    print(f"✓ Index in sync with the database ({len(retrieval.index)} embeddings)")
+    print()
+
+
+def test_quantized_recall():
+    """Test 7: Quantized Index Recall"""
+    print("Test 7: Quantized Index Recall")
+    print("-" * 50)
+
+    import numpy as np
+    from memory.index import QuantizedIndex, VectorIndex, recall_at_k
+
+    # Clustered vectors, like real embeddings, rather than uniform noise
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 384))
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.5 * rng.standard_normal((2000, 384))
+    queries = [centers[i % 20] + 0.5 * rng.standard_normal(384) for i in range(40)]
+    ids = list(range(1, 2001))
+
+    exact = VectorIndex()
+    exact.build(ids, vectors)
+
+    # Rescoring reads float vectors, as MemoryRetrieval's loader does
+    def load_vectors(memory_ids):
+        return {memory_id: vectors[memory_id - 1] for memory_id in memory_ids}
+
+    for mode, minimum in (("int8", 0.95), ("binary", 0.9)):
+        index = QuantizedIndex(mode, vector_loader=load_vectors)
+        index.build(ids, vectors)
+
+        recall = recall_at_k(index, queries, k=10, reference=exact)
+        print(f"  {mode}: recall@10 = {recall:.3f}")
+        assert recall >= minimum, f"{mode} recall should be at least {minimum}"
+
+        subset = ids[::5]
+        hits = index.search_subset(queries[0], subset, limit=10)
+        assert len(hits) == 10 and set(hits) <= set(subset), "Filtered search should stay in the subset"
+
+    print("✓ Quantized search matches brute force")
+    print()
+
+
+def remove_database(path):
+    """Delete a test database and its WAL and vector store side files"""
+    for suffix in ("", "-wal", "-shm", ".vectors"):
+        Path(path + suffix).unlink(missing_ok=True)
 
 
 def cleanup():
     """Clean up test databases"""
     print("Cleaning up test files...")
-    Path("test_memory.db").unlink(missing_ok=True)
+    remove_database("test_memory.db")
     print("✓ Cleanup complete")
     print()
 
@@ -189,6 +268,8 @@ def main():
         test_hybrid_search(db)
         test_stats(db)
         test_migration()
+        test_index_sync(db)
+        test_quantized_recall()
 
         # Close database
         db.close()
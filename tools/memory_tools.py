@@ -5,14 +5,15 @@ Administrative tools for memory system management.
 from pathlib import Path
 from google.adk.tools import FunctionTool
 
-from memory.storage import MemoryDatabase
+from memory.storage import get_memory_database
 from memory.retrieval import MemoryRetrieval
+from memory.embeddings import get_embedding_service
 
 
 def get_memory_stats() -> str:
     """Get statistics about the memory system."""
     try:
-        db = MemoryDatabase("memory.db")
+        db = get_memory_database("memory.db")
         stats = db.get_stats()
 
         output = ["Memory System Statistics:", ""]
@@ -23,20 +24,42 @@ def get_memory_stats() -> str:
         for mem_type, count in stats['by_type'].items():
             output.append(f"  - {mem_type}: {count}")
 
+        cache_stats = get_embedding_service().cache_stats()
+        memory_cache = cache_stats['memory']
+        output.append("")
+        output.append(
+            f"Embedding cache: {memory_cache['entries']} entries, "
+            f"{memory_cache['bytes'] / (1024 * 1024):.1f} MB, "
+            f"hit rate {memory_cache['hit_rate']:.0%}"
+        )
+        if cache_stats['disk']:
+            disk_cache = cache_stats['disk']
+            output.append(
+                f"Embedding disk cache: {disk_cache['entries']} entries, "
+                f"hit rate {disk_cache['hit_rate']:.0%}"
+            )
+
         return "\n".join(output)
     except Exception as e:
         return f"Error getting memory stats: {e}"
 
 
-def rebuild_memory_index() -> str:
-    """Rebuild embeddings and FTS index from scratch."""
+def rebuild_memory_index(full: bool = False) -> str:
+    """Re-embed memories whose embedding is missing or out of date.
+
+    Args:
+        full: Re-embed every memory instead of only missing or stale ones
+    """
     try:
-        db = MemoryDatabase("memory.db")
+        db = get_memory_database("memory.db")
         retrieval = MemoryRetrieval(db)
 
-        retrieval.rebuild_embeddings()
+        report = retrieval.rebuild_embeddings(full=full)
 
-        return "Memory index rebuilt successfully!"
+        return (
+            f"Memory index rebuilt successfully! Embedded {report['embedded']} "
+            f"of {report['scanned']} memories."
+        )
     except Exception as e:
         return f"Error rebuilding index: {e}"
 
@@ -47,15 +70,12 @@ def migrate_notes_to_memory(notes_file: str = "notes.txt") -> str:
         if not Path(notes_file).exists():
             return f"File not found: {notes_file}"
 
-        db = MemoryDatabase("memory.db")
+        db = get_memory_database("memory.db")
+        # Embeds and inserts the notes in batches
         count = db.migrate_from_notes_txt(notes_file)
 
         if count == 0:
-            return "No notes found to migrate"
-
-        # Generate embeddings for migrated notes
-        retrieval = MemoryRetrieval(db)
-        retrieval.rebuild_embeddings()
+            return "No new notes to migrate (already imported notes are skipped)"
 
         return f"Successfully migrated {count} notes and generated embeddings"
     except Exception as e:
@@ -6,8 +6,9 @@ from typing import Optional
 
 # Import memory system
 try:
-    from memory.storage import MemoryDatabase
-    from memory.retrieval import MemoryRetrieval
+    from memory.storage import MemoryDatabase, get_memory_database
+    from memory.retrieval import MemoryRetrieval, get_memory_retrieval
+    from memory.access_stats import get_access_stats_buffer
     MEMORY_AVAILABLE = True
 except ImportError:
     MEMORY_AVAILABLE = False
@@ -23,8 +24,9 @@ def _get_memory_system():
     global _db, _retrieval
     if _db is None and MEMORY_AVAILABLE:
         try:
-            _db = MemoryDatabase("memory.db")
-            _retrieval = MemoryRetrieval(_db)
+            _db = get_memory_database("memory.db")
+            # Shared with the agent's async retrieval, so the index is resident once
+            _retrieval = get_memory_retrieval("memory.db")
         except Exception as e:
             print(f"Warning: Memory system unavailable: {e}")
             return None, None
@@ -50,13 +52,15 @@ def save_note(title: str, content: str, tags: str = "") -> str:
             metadata = {'tags': tag_list} if tag_list else {}
 
             # Add to memory database with embedding
-            retrieval.add_memory_with_embedding(
+            _, created = retrieval.add_memory_if_new(
                 title=title,
                 content=content,
                 memory_type='note',
                 metadata=metadata,
                 source_type='manual'
             )
+            if not created:
+                return f"Already noted: '{title}'"
         except Exception as e:
             print(f"Warning: Failed to save to memory database: {e}")
 
@@ -86,6 +90,9 @@ def search_notes(query: str) -> str:
             if not results:
                 return f"No notes found matching '{query}'"
 
+            # Update access stats (written in batches)
+            get_access_stats_buffer(db.db_path).record(memory.id for memory in results)
+
             # Format results
             output = [f"Found {len(results)} note(s) matching '{query}':\n"]
             for i, memory in enumerate(results, 1):
@@ -0,0 +1,192 @@
+"""
+Per-stage latency tracing for the utterance pipeline.
+
+Every utterance gets a Trace that collects how long each stage took
+(queue wait, memory retrieval, the coordinator run, sub-agent tool calls,
+sending the response). Timings are always kept in-process: per trace for
+ProcessingResult / agent_response, and aggregated per stage for /health.
+When OpenTelemetry is installed, each stage is also an OTel span, exported
+according to TRACE_EXPORTER (no-op by default, so tracing works offline).
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from loop_lag import LatencyHistogram
+
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+
+class Trace:
+    """Stage timings (milliseconds) for one utterance."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    def record(self, stage: str, duration_ms: float):
+        """Add a stage duration; repeated stages (retries, tool calls) accumulate."""
+        self.timings[stage] = self.timings.get(stage, 0.0) + duration_ms
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the trace started."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def snapshot(self) -> Dict[str, float]:
+        """Stage timings rounded for reporting, plus the total so far."""
+        timings = {stage: round(ms, 2) for stage, ms in self.timings.items()}
+        timings['total'] = round(self.elapsed_ms(), 2)
+        return timings
+
+
+# Trace of the utterance being processed by the current task
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+# Per-stage latency across all utterances, reported by /health
+_stage_histograms: Dict[str, LatencyHistogram] = {}
+
+_tracer = None
+
+
+def _get_tracer():
+    """Get the OpenTelemetry tracer, configuring the exporter on first use."""
+    global _tracer
+    if _tracer is None and OTEL_AVAILABLE:
+        _configure_exporter(os.getenv("TRACE_EXPORTER", "none").lower())
+        _tracer = otel_trace.get_tracer("second_brain")
+    return _tracer
+
+
+def _configure_exporter(exporter: str):
+    """Install an OTel SDK tracer provider for TRACE_EXPORTER=console|otlp."""
+    if exporter in ("", "none"):
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        print("Warning: opentelemetry-sdk not installed, spans are not exported")
+        return
+
+    if exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    elif exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            print("Warning: opentelemetry-exporter-otlp-proto-http not installed, spans are not exported")
+            return
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        span_exporter = OTLPSpanExporter()
+    else:
+        print(f"Warning: Unknown TRACE_EXPORTER '{exporter}', spans are not exported")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "second-brain"}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    otel_trace.set_tracer_provider(provider)
+
+
+@contextmanager
+def _otel_span(name: str, attributes: Dict):
+    """OpenTelemetry span if available, otherwise nothing."""
+    tracer = _get_tracer()
+    if tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(name, attributes=attributes):
+        yield
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the utterance being processed, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, **attributes) -> Iterator[Trace]:
+    """
+    Trace an utterance.
+
+    Nested calls (e.g. the server tracing an utterance that the agent traces
+    too) join the outer trace, so all stages end up in one set of timings.
+
+    Args:
+        name: Root span name
+        **attributes: Span attributes (mode, retries, ...)
+
+    Yields:
+        The active Trace
+    """
+    existing = _current_trace.get()
+    if existing is not None:
+        with _otel_span(name, attributes):
+            yield existing
+        return
+
+    active = Trace(name)
+    token = _current_trace.set(active)
+    try:
+        with _otel_span(name, attributes):
+            yield active
+    finally:
+        _current_trace.reset(token)
+        _histogram(name).record(active.elapsed_ms())
+
+
+@contextmanager
+def span(stage: str, **attributes) -> Iterator[None]:
+    """
+    Time a pipeline stage into the current trace and the per-stage stats.
+
+    Args:
+        stage: Stage name (e.g. 'memory_retrieval', 'runner')
+        **attributes: Span attributes
+    """
+    start = time.perf_counter()
+    try:
+        with _otel_span(stage, attributes):
+            yield
+    finally:
+        record_stage(stage, (time.perf_counter() - start) * 1000)
+
+
+def record_stage(stage: str, duration_ms: float):
+    """Record a stage measured outside a span() block (e.g. between two events)."""
+    active = _current_trace.get()
+    if active is not None:
+        active.record(stage, duration_ms)
+    _histogram(stage).record(duration_ms)
+
+
+def _histogram(stage: str) -> LatencyHistogram:
+    histogram = _stage_histograms.get(stage)
+    if histogram is None:
+        histogram = _stage_histograms[stage] = LatencyHistogram(max_samples=1000)
+    return histogram
+
+
+def stage_percentile(stage: str, q: float) -> Optional[float]:
+    """Percentile (0-100) of a stage's recent latencies, or None if never recorded."""
+    histogram = _stage_histograms.get(stage)
+    return histogram.percentile(q) if histogram is not None and histogram.total else None
+
+
+def stage_summary() -> Dict[str, Dict]:
+    """Latency percentiles per stage across all traced utterances."""
+    return {
+        stage: {key: value for key, value in histogram.summary().items() if key != 'buckets'}
+        for stage, histogram in sorted(_stage_histograms.items())
+    }